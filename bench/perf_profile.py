@@ -0,0 +1,194 @@
+"""
+PERF_PROFILE の比較用ベンチマーク（Botは起動しない）。
+
+    python bench/perf_profile.py [--users 20000] [--events 20000]
+
+- store: おみくじ/除夜/ValoCheck相当のデータを utils/jsonio 経由で保存・読込
+- gateway: MESSAGE_CREATE 相当のペイロードのデコードと、commands.Bot.dispatch でのリスナー呼び出し
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import discord
+from discord.ext import commands
+
+from utils import jsonio
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
+
+def _best(fn, repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t)
+    return best
+
+
+def _stores(users: int) -> dict:
+    rnd = random.Random(0)
+    uid = lambda: str(rnd.randrange(10**17, 10**18))
+    points = {uid(): rnd.randrange(0, 5000) for _ in range(users)}
+    joya = {
+        "guilds": {"1": {"count": users, "config": {"cooldown": 30}}},
+        "users": {f"1:{uid()}": {"rings": rnd.randrange(0, 108), "last": time.time()} for _ in range(users)},
+    }
+    journal = [
+        {
+            "uid": uid(),
+            "rec": {
+                "score": rnd.randrange(0, 40),
+                "label": rnd.choice(["ガチ勢", "エンジョイ勢"]),
+                "answers": [{"choice": "はい", "score": rnd.randrange(0, 4)} for _ in range(10)],
+                "completed_at": "2026-01-01T00:00:00+00:00",
+            },
+        }
+        for _ in range(users // 4)
+    ]
+    return {"omikuji": points, "joya": joya, "valo_check_journal": journal}
+
+
+def bench_store(users: int) -> list[tuple[str, float]]:
+    rows = []
+    data = _stores(users)
+    d = tempfile.mkdtemp()
+    for name, obj in data.items():
+        path = os.path.join(d, name + ".json")
+        if name == "valo_check_journal":
+
+            def save():
+                with open(path, "w", encoding="utf-8") as f:
+                    for row in obj:
+                        f.write(jsonio.dumps(row))
+                        f.write("\n")
+
+            def load():
+                with open(path, "r", encoding="utf-8") as f:
+                    return [jsonio.loads(line) for line in f if line.strip()]
+
+        else:
+
+            def save():
+                with open(path, "w", encoding="utf-8") as f:
+                    jsonio.dump(obj, f)
+
+            def load():
+                with open(path, "r", encoding="utf-8") as f:
+                    return jsonio.load(f)
+
+        rows.append((f"{name} save", _best(save)))
+        rows.append((f"{name} load", _best(load)))
+    return rows
+
+
+def _message_payload(i: int) -> str:
+    return json.dumps(
+        {
+            "op": 0,
+            "s": i,
+            "t": "MESSAGE_CREATE",
+            "d": {
+                "id": str(10**18 + i),
+                "channel_id": "1200000000000000000",
+                "guild_id": "1100000000000000000",
+                "content": "アンレ募集 @2 よろしく！" * 3,
+                "author": {"id": "1300000000000000000", "username": "user", "bot": False},
+                "member": {"roles": [str(10**18 + r) for r in range(8)], "nick": "にっく"},
+                "mentions": [],
+                "embeds": [],
+                "attachments": [],
+                "timestamp": "2026-01-01T00:00:00.000000+00:00",
+            },
+        },
+        ensure_ascii=False,
+    )
+
+
+def bench_decode(events: int) -> list[tuple[str, float]]:
+    payloads = [_message_payload(i) for i in range(events)]
+    rows = [("gateway decode json", _best(lambda: [json.loads(p) for p in payloads]))]
+    if orjson is not None:
+        rows.append(("gateway decode orjson", _best(lambda: [orjson.loads(p) for p in payloads])))
+    return rows
+
+
+async def _dispatch(events: int) -> float:
+    bot = commands.Bot(command_prefix="/", intents=discord.Intents.none())
+    done = asyncio.Event()
+    seen = 0
+
+    async def on_bench(payload):
+        nonlocal seen
+        seen += 1
+        if seen >= events:
+            done.set()
+
+    async def on_bench_other(payload):
+        await asyncio.sleep(0)
+
+    bot.add_listener(on_bench, "on_bench")
+    bot.add_listener(on_bench_other, "on_bench")
+
+    async with bot:
+        started = time.perf_counter()
+        for i in range(events):
+            bot.dispatch("bench", i)
+        await done.wait()
+        return time.perf_counter() - started
+
+
+def bench_dispatch(events: int) -> list[tuple[str, float]]:
+    rows = [("dispatch asyncio", min(asyncio.run(_dispatch(events)) for _ in range(3)))]
+    if uvloop is not None:
+        policy = asyncio.get_event_loop_policy()
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+        try:
+            rows.append(("dispatch uvloop", min(asyncio.run(_dispatch(events)) for _ in range(3))))
+        finally:
+            asyncio.set_event_loop_policy(policy)
+    return rows
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--users", type=int, default=20000)
+    ap.add_argument("--events", type=int, default=20000)
+    args = ap.parse_args()
+
+    print(f"orjson: {'yes' if orjson else 'no'} / uvloop: {'yes' if uvloop else 'no'}")
+
+    results = {}
+    for profile in ("default", "fast"):
+        jsonio.configure(profile)
+        for name, sec in bench_store(args.users):
+            results.setdefault(name, {})[profile] = sec
+
+    print(f"\n{'store (' + str(args.users) + ' users)':<32} {'default':>10} {'fast':>10} {'x':>6}")
+    for name, r in results.items():
+        ratio = r["default"] / r["fast"] if r["fast"] else 0.0
+        print(f"{name:<32} {r['default'] * 1000:>8.1f}ms {r['fast'] * 1000:>8.1f}ms {ratio:>5.1f}x")
+
+    print(f"\n{'gateway (' + str(args.events) + ' events)':<32} {'time':>10}")
+    for name, sec in bench_decode(args.events) + bench_dispatch(args.events):
+        print(f"{name:<32} {sec * 1000:>8.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
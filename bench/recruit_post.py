@@ -0,0 +1,159 @@
+"""
+VALO募集の投稿1回あたりの処理時間（Botは起動しない）。
+
+    python bench/recruit_post.py [--n 50000]
+
+- filter: 一言のチェック。以前の lower() + 部分文字列の判定と、utils/text_filter
+  （招待リンク・チャンネルリンクも見る。当たりそうな文字が無い文は正規表現を通さない）。
+  禁止要素を含む文も混ぜた場合と、普通の一言だけの場合
+- embed: 以前の組み立て（毎回 Color / AllowedMentions を作る）と、今の _recruit_embed
+  （今の投稿は参加人数と締切も出すので、同じ内容を以前の書き方で作ったものも並べる）。
+  種類ごとの雛形を Embed.copy() する案も測る（copy は to_dict/from_dict を通るので組み立てより遅い）
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import discord
+
+from cogs.valorecruit import _recruit_embed
+from utils import text_filter
+from utils.recruits import t_recruit
+
+
+def _best(fn, repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t)
+    return best
+
+
+def _old_has_forbidden_mentions(text: str) -> bool:
+    t = (text or "").lower()
+    if "@here" in t or "@everyone" in t:
+        return True
+    if "<@&" in t or "<@" in t:
+        return True
+    return False
+
+
+def _old_embed(kind: str, need: int, note: str, label: str, owner: str):
+    if kind == "comp":
+        embed = discord.Embed(
+            title="VALORANT 募集（コンペ）",
+            description=f"タイプ: **{label}**\n募集: **{need}人**",
+            color=discord.Color.gold(),
+        )
+        am = discord.AllowedMentions(everyone=False, roles=True, users=False)
+    else:
+        embed = discord.Embed(
+            title="VALORANT 募集（アンレ）",
+            description=f"募集: **{need}人**",
+            color=discord.Color.blurple(),
+        )
+        am = discord.AllowedMentions(everyone=False, roles=False, users=False)
+    if note:
+        embed.add_field(name="一言", value=note, inline=False)
+    embed.set_footer(text=f"募集主: {owner}")
+    return embed, am
+
+
+def _old_embed_same_content(r: t_recruit):
+    if r.kind == "comp":
+        desc = f"タイプ: **{r.label}**\n募集: **{r.need}人**（参加 {len(r.members)}/{r.need}）\n締切: <t:{int(r.expires)}:R>"
+        embed = discord.Embed(title="VALORANT 募集（コンペ）", description=desc, color=discord.Color.gold())
+        am = discord.AllowedMentions(everyone=False, roles=True, users=False)
+    else:
+        desc = f"募集: **{r.need}人**（参加 {len(r.members)}/{r.need}）\n締切: <t:{int(r.expires)}:R>"
+        embed = discord.Embed(title="VALORANT 募集（アンレ）", description=desc, color=discord.Color.blurple())
+        am = discord.AllowedMentions(everyone=False, roles=False, users=False)
+    if r.note:
+        embed.add_field(name="一言", value=r.note, inline=False)
+    embed.set_footer(text=f"募集主: {r.owner_name}")
+    return embed, am
+
+
+def _notes(n: int) -> list[str]:
+    rnd = random.Random(0)
+    pool = [
+        "VCあり / 初心者OK",
+        "ゆるく回します、報告多めで",
+        "ダイヤ帯 5スタック目指し",
+        "",
+        "18時から 2時間くらい",
+        "@here 来て",
+        "discord.gg/abcdef 参加して",
+    ]
+    return [rnd.choice(pool) for _ in range(n)]
+
+
+def bench_filter(notes: list[str]) -> list[tuple[str, float]]:
+    clean = [t for t in notes if not text_filter.has_forbidden(t)]
+    clean = (clean * (len(notes) // max(1, len(clean)) + 1))[:len(notes)]
+    return [
+        ("old lower()+in", _best(lambda: [_old_has_forbidden_mentions(t) for t in notes])),
+        ("text_filter", _best(lambda: [text_filter.find_forbidden(t) for t in notes])),
+        ("old lower()+in (clean)", _best(lambda: [_old_has_forbidden_mentions(t) for t in clean])),
+        ("text_filter (clean)", _best(lambda: [text_filter.find_forbidden(t) for t in clean])),
+    ]
+
+
+def bench_embed(notes: list[str]) -> list[tuple[str, float]]:
+    recs = [
+        t_recruit(i, 1, 1, 1, "owner", "comp" if i % 2 else "unrated", 3, 1.9e9, note, "ガチ勢")
+        for i, note in enumerate(notes)
+    ]
+
+    def old():
+        for r in recs:
+            _old_embed(r.kind, r.need, r.note, r.label, r.owner_name)
+
+    def old_same():
+        for r in recs:
+            _old_embed_same_content(r)
+
+    def new():
+        for r in recs:
+            _recruit_embed(r)
+            text_filter.ROLE_MENTIONS if r.kind == "comp" else text_filter.NO_MENTIONS
+
+    skeletons = {
+        "comp": discord.Embed(title="VALORANT 募集（コンペ）", color=discord.Color.gold()),
+        "unrated": discord.Embed(title="VALORANT 募集（アンレ）", color=discord.Color.blurple()),
+    }
+
+    def copied():
+        for r in recs:
+            embed = skeletons[r.kind].copy()
+            embed.description = f"募集: **{r.need}人**（参加 {len(r.members)}/{r.need}）\n締切: <t:{int(r.expires)}:R>"
+            if r.note:
+                embed.add_field(name="一言", value=r.note, inline=False)
+            embed.set_footer(text=f"募集主: {r.owner_name}")
+
+    return [
+        ("old build", _best(old)),
+        ("old build (same content)", _best(old_same)),
+        ("_recruit_embed", _best(new)),
+        ("skeleton copy()", _best(copied)),
+    ]
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--n", type=int, default=50000)
+    args = ap.parse_args()
+    notes = _notes(args.n)
+
+    print(f"{'recruit post (' + str(args.n) + ' submits)':<32} {'total':>10} {'per submit':>12}")
+    for name, sec in bench_filter(notes) + bench_embed(notes):
+        print(f"{name:<32} {sec * 1000:>8.1f}ms {sec / args.n * 1e6:>10.2f}us")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,4 @@
 import asyncio
-import json
 import os
 import random
 import time
@@ -10,6 +9,12 @@ import discord
 from discord import app_commands
 from discord.ext import commands
 
+from utils import jsonio
+from utils.guild_config import get_config
+from utils.members import get_or_fetch_member
+from utils.metrics import timed, track_flush
+from utils.panels import PanelKind, get_panels
+
 
 def _get_int_env(key: str, default: int) -> int:
     v = os.getenv(key)
@@ -72,20 +77,24 @@ class _JoyaStore:
             return
         try:
             with open(self._path, "r", encoding="utf-8") as f:
-                self._data = json.load(f)
+                self._data = jsonio.load(f)
         except Exception:
             self._data = {"guilds": {}, "users": {}}
 
     def save(self) -> None:
         tmp = self._path + ".tmp"
-        with open(tmp, "w", encoding="utf-8") as f:
-            json.dump(self._data, f, ensure_ascii=False, indent=2)
-        os.replace(tmp, self._path)
+        with track_flush("joya"):
+            with open(tmp, "w", encoding="utf-8") as f:
+                jsonio.dump(self._data, f)
+            os.replace(tmp, self._path)
 
     def get_guild(self, guild_id: int) -> Dict[str, Any]:
         g = self._data.setdefault("guilds", {})
         return g.setdefault(str(guild_id), {})
 
+    def guilds(self) -> Dict[str, Dict[str, Any]]:
+        return self._data.setdefault("guilds", {})
+
     def get_user(self, guild_id: int, user_id: int) -> Dict[str, Any]:
         u = self._data.setdefault("users", {})
         key = f"{guild_id}:{user_id}"
@@ -116,6 +125,7 @@ class JoyaView(discord.ui.View):
         style=discord.ButtonStyle.primary,
         custom_id="joya:ring",
     )
+    @timed("joya:ring")
     async def ring(
         self,
         interaction: discord.Interaction,
@@ -136,15 +146,44 @@ class JoyaGacha(commands.Cog):
         self.bot = bot
         self._min_env = _get_int_env("JOYA_MIN_SEC", 60)
         self._max_env = _get_int_env("JOYA_MAX_SEC", 300)
-        self._role_id = _get_int_env("JOYA_WINNER_ROLE_ID", 0)
-        self._channel_id = _get_int_env("JOYA_CHANNEL_ID", 0)
-        self._block_role_id = 1451758143636901960
+        # チャンネル/ロールはギルドごと（JOYA_CHANNEL_ID / JOYA_WINNER_ROLE_ID / JOYA_BLOCK_ROLE_ID）
+        self._config = get_config()
+        self._home_block_role_id = _get_int_env("JOYA_BLOCK_ROLE_ID", 1451758143636901960)
         path = os.getenv("JOYA_DATA_PATH", "./data/joya_state.json")
         self._store = _JoyaStore(path)
         self._locks: Dict[int, asyncio.Lock] = {}
 
     async def cog_load(self) -> None:
-        self.bot.add_view(JoyaView())
+        panels = get_panels()
+        # 以前は store にパネルの場所を持っていた
+        for gid, g in self._store.guilds().items():
+            if gid.isdigit():
+                panels.adopt(
+                    "joya",
+                    int(gid),
+                    int(g.get("panel_channel_id") or 0),
+                    int(g.get("panel_message_id") or 0),
+                )
+        panels.register(PanelKind("joya", self._render_panel, views=[JoyaView()]))
+
+    async def cog_unload(self) -> None:
+        get_panels().unregister("joya")
+
+    def _render_panel(self, guild_id: int):
+        _count, finished = self._get_count_state(guild_id)
+        if finished:
+            return "🔔 **除夜の鐘（終了）**\n108回、鳴り切った。", None, JoyaView(disabled=True)
+        return "🔔 **除夜の鐘**", None, JoyaView()
+
+    def _role_id(self, guild_id: int) -> int:
+        return self._config.get_int(guild_id, "JOYA_WINNER_ROLE_ID")
+
+    def _channel_id(self, guild_id: int) -> int:
+        return self._config.get_int(guild_id, "JOYA_CHANNEL_ID")
+
+    def _block_role_id(self, guild_id: int) -> int:
+        default = self._home_block_role_id if guild_id == self._config.home_guild_id else 0
+        return self._config.get_int(guild_id, "JOYA_BLOCK_ROLE_ID", default)
 
     def _lock(self, guild_id: int) -> asyncio.Lock:
         if guild_id not in self._locks:
@@ -249,30 +288,10 @@ class JoyaGacha(commands.Cog):
         e.set_footer(text="今年も生き延びたな。")
         return e
 
-    async def _disable_panel_if_any(self, guild: discord.Guild) -> None:
-        g = self._store.get_guild(guild.id)
-        ch_id = g.get("panel_channel_id")
-        msg_id = g.get("panel_message_id")
-        if not isinstance(ch_id, int) or not isinstance(msg_id, int):
-            return
-        ch = guild.get_channel(ch_id)
-        if not isinstance(ch, discord.TextChannel):
-            return
-        try:
-            msg = await ch.fetch_message(msg_id)
-        except Exception:
-            return
-        try:
-            await msg.edit(
-                content="🔔 **除夜の鐘（終了）**\n108回、鳴り切った。",
-                view=JoyaView(disabled=True),
-            )
-        except Exception:
-            return
-
     def _has_block_role(self, member: discord.Member) -> bool:
+        block_role_id = self._block_role_id(member.guild.id)
         for r in member.roles:
-            if r.id == self._block_role_id:
+            if r.id == block_role_id:
                 return True
         return False
 
@@ -305,7 +324,9 @@ class JoyaGacha(commands.Cog):
                 await interaction.followup.send(msg)
                 return
 
-            member = interaction.guild.get_member(user_id)
+            member = interaction.user
+            if not isinstance(member, discord.Member):
+                member = await get_or_fetch_member(interaction.guild, user_id)
             if not isinstance(member, discord.Member):
                 await interaction.followup.send(
                     "メンバー情報が取れない。もう一回押して。"
@@ -345,9 +366,9 @@ class JoyaGacha(commands.Cog):
                 return
 
             self._set_count_state(guild_id, 108, True, user_id)
-            await self._disable_panel_if_any(interaction.guild)
+            await get_panels().refresh(self.bot, "joya", guild_id)
 
-            role = interaction.guild.get_role(self._role_id)
+            role = interaction.guild.get_role(self._role_id(guild_id))
             if role is None:
                 await interaction.followup.send(
                     embed=self._final_embed(member),
@@ -384,33 +405,26 @@ class JoyaGacha(commands.Cog):
                 "サーバー内で使ってね。", ephemeral=True
             )
             return
-        if self._channel_id <= 0:
+        channel_id = self._channel_id(interaction.guild.id)
+        if channel_id <= 0:
             await interaction.response.send_message(
                 "JOYA_CHANNEL_ID が未設定。", ephemeral=True
             )
             return
-        ch = interaction.guild.get_channel(self._channel_id)
+        ch = interaction.guild.get_channel(channel_id)
         if not isinstance(ch, discord.TextChannel):
             await interaction.response.send_message(
                 "指定チャンネルが見つからない。", ephemeral=True
             )
             return
 
-        count, finished = self._get_count_state(interaction.guild.id)
-        if finished:
-            msg = await ch.send(
-                "🔔 **除夜の鐘（終了）**\n108回、鳴り切った。",
-                view=JoyaView(disabled=True),
-            )
-        else:
-            msg = await ch.send("🔔 **除夜の鐘**", view=JoyaView())
-
-        g = self._store.get_guild(interaction.guild.id)
-        g["panel_channel_id"] = ch.id
-        g["panel_message_id"] = msg.id
-        self._store.save()
-
-        await interaction.response.send_message("投稿した。", ephemeral=True)
+        await interaction.response.defer(ephemeral=True)
+        msg = await get_panels().publish(
+            self.bot, "joya", ch, interaction.guild.id, verify=True
+        )
+        await interaction.followup.send(
+            "投稿した。" if msg is not None else "パネルはもう置いてある。", ephemeral=True
+        )
 
     @app_commands.command(
         name="joya_status",
@@ -427,15 +441,16 @@ class JoyaGacha(commands.Cog):
         cfg = self._get_cfg(guild_id)
 
         g = self._store.get_guild(guild_id)
-        pch = g.get("panel_channel_id")
-        pmsg = g.get("panel_message_id")
+        rec = get_panels().record("joya", guild_id)
+        pch = rec.channel_id if rec else None
+        pmsg = rec.message_id if rec else None
 
         msg = (
             f"🔔 現在: **{count} / 108**\n"
             f"⏱ クールダウン: **{_fmt_mmss(cfg.cd_min_sec)}"
             f" 〜 {_fmt_mmss(cfg.cd_max_sec)}**\n"
-            f"🏷 ロールID: **{self._role_id}**\n"
-            f"🛑 ブロックロールID: **{self._block_role_id}**\n"
+            f"🏷 ロールID: **{self._role_id(guild_id)}**\n"
+            f"🛑 ブロックロールID: **{self._block_role_id(guild_id)}**\n"
             f"📍 パネルch: **{pch if isinstance(pch, int) else '未'}**\n"
             f"🧷 パネルmsg: **{pmsg if isinstance(pmsg, int) else '未'}**"
         )
@@ -491,7 +506,7 @@ class JoyaGacha(commands.Cog):
 
     @app_commands.command(
         name="joya_reset_all",
-        description="除夜の鐘の状態を完全リセット（回数/勝者/CD/パネル情報）",
+        description="除夜の鐘の状態を完全リセット（回数/勝者/CD）",
     )
     @app_commands.check(_only_user(746347536100360283))
     async def joya_reset_all(self, interaction: discord.Interaction) -> None:
@@ -507,6 +522,8 @@ class JoyaGacha(commands.Cog):
             f"完全リセットした。クールダウン情報 {removed} 件を削除。",
             ephemeral=True,
         )
+        # 終了表示のパネルが残っていれば押せる状態に戻す
+        await get_panels().refresh(self.bot, "joya", guild_id)
 
     @joya_panel.error
     @joya_config.error
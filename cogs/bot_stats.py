@@ -0,0 +1,269 @@
+import os
+import time
+import asyncio
+from typing import Optional
+
+import discord
+from aiohttp import web
+from discord import app_commands
+from discord.ext import commands
+
+from utils import metrics
+from utils.watchdog import LoopWatchdog
+
+
+def _get_opt_int_env(key: str, default: int) -> int:
+    v = os.getenv(key)
+    if not v:
+        return default
+    try:
+        return int(v)
+    except ValueError:
+        return default
+
+
+def _get_opt_id_env(key: str) -> Optional[int]:
+    v = os.getenv(key)
+    if not v:
+        return None
+    try:
+        return int(v)
+    except ValueError:
+        return None
+
+
+def _ms(sec: float) -> str:
+    return f"{sec * 1000:.1f}ms"
+
+
+class BotStatsCog(commands.Cog):
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+        self.metrics_host = os.getenv("METRICS_HOST") or "127.0.0.1"
+        self.metrics_port = _get_opt_int_env("METRICS_PORT", 0)
+        self.lag_interval = _get_opt_int_env("LOOP_LAG_INTERVAL_MS", 500) / 1000
+        self.started_at = time.time()
+        self._lag_task: Optional[asyncio.Task] = None
+        self._runner: Optional[web.AppRunner] = None
+
+        self.admin_dm_user_id = _get_opt_id_env("DM_FORWARD_USER_ID")
+        self.watchdog: Optional[LoopWatchdog] = None
+        if os.getenv("LOOP_WATCHDOG_ENABLED", "1") != "0":
+            self.watchdog = LoopWatchdog(
+                threshold=_get_opt_int_env("LOOP_WATCHDOG_THRESHOLD_MS", 200) / 1000,
+                sample_interval=_get_opt_int_env("LOOP_WATCHDOG_SAMPLE_MS", 20) / 1000,
+            )
+        # 停止をまとめてDMする間隔（分）。0で無効
+        self.watchdog_report_min = _get_opt_int_env("LOOP_WATCHDOG_REPORT_MIN", 60)
+        self._watchdog_task: Optional[asyncio.Task] = None
+
+    async def cog_load(self) -> None:
+        if self._lag_task is None:
+            self._lag_task = asyncio.create_task(self._lag_loop())
+        if self.watchdog is not None and self._watchdog_task is None:
+            self.watchdog.start()
+            self._watchdog_task = asyncio.create_task(self._watchdog_loop())
+        if self.metrics_port > 0:
+            await self._start_http()
+
+    async def cog_unload(self) -> None:
+        if self._lag_task is not None:
+            self._lag_task.cancel()
+            self._lag_task = None
+        if self._watchdog_task is not None:
+            self._watchdog_task.cancel()
+            self._watchdog_task = None
+        if self.watchdog is not None:
+            self.watchdog.stop()
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    # ------------------------------------------------------
+    # イベントループ遅延（sleep の予定時刻とのずれ）
+    # ------------------------------------------------------
+    async def _lag_loop(self) -> None:
+        interval = max(0.05, self.lag_interval)
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(interval)
+            lag = max(0.0, time.perf_counter() - started - interval)
+            metrics.LOOP_LAG_SECONDS.observe(lag)
+            metrics.LOOP_LAG_LAST.set(lag)
+
+    # ------------------------------------------------------
+    # ブロッキング検知（utils/watchdog.py）の結果をログとDMに流す
+    # ------------------------------------------------------
+    async def _watchdog_loop(self) -> None:
+        digest: dict[str, list] = {}
+        last_report = time.monotonic()
+        while True:
+            await asyncio.sleep(5)
+            for site, sec, stack in self.watchdog.drain():
+                print(f"🐢 Event loop blocked {_ms(sec)} at {site}\n    " + "\n    ".join(stack))
+                metrics.LOOP_STALL_SECONDS.observe(sec)
+                row = digest.setdefault(site, [0, 0.0])
+                row[0] += 1
+                row[1] = max(row[1], sec)
+
+            if self.watchdog_report_min <= 0:
+                digest.clear()
+                continue
+            if not digest or time.monotonic() - last_report < self.watchdog_report_min * 60:
+                continue
+            last_report = time.monotonic()
+            rows = sorted(digest.items(), key=lambda kv: kv[1][1], reverse=True)
+            digest = {}
+            body = "\n".join(
+                f"`{site}` {n}回 / 最大 {_ms(worst)}" for site, (n, worst) in rows[:10]
+            )
+            await self._notify_admin("🐢 Event loop blocked", body)
+
+    async def _notify_admin(self, title: str, body: str):
+        if not self.admin_dm_user_id:
+            return
+        admin = self.bot.get_user(self.admin_dm_user_id)
+        if admin is None:
+            try:
+                admin = await self.bot.fetch_user(self.admin_dm_user_id)
+            except Exception:
+                admin = None
+        if admin is None:
+            return
+        try:
+            await admin.send(f"**{title}**\n{body}")
+        except Exception:
+            pass
+
+    # ------------------------------------------------------
+    # Prometheus テキスト形式（ローカルのみ）
+    # ------------------------------------------------------
+    async def _start_http(self) -> None:
+        async def _handle(_request: web.Request) -> web.Response:
+            self._refresh_gauges()
+            return web.Response(
+                text=metrics.REGISTRY.render_prometheus(),
+                content_type="text/plain",
+                charset="utf-8",
+            )
+
+        app = web.Application()
+        app.router.add_get("/metrics", _handle)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        try:
+            await web.TCPSite(runner, self.metrics_host, self.metrics_port).start()
+        except OSError as e:
+            await runner.cleanup()
+            print(f"⚠️ Metrics endpoint failed to start: {e}")
+            return
+        self._runner = runner
+        print(f"📈 Metrics: http://{self.metrics_host}:{self.metrics_port}/metrics")
+
+    def _refresh_gauges(self) -> None:
+        metrics.REGISTRY.gauge("bot_guilds", "Guilds in cache").set(len(self.bot.guilds))
+        metrics.REGISTRY.gauge("bot_gateway_latency_seconds", "Heartbeat latency").set(
+            self.bot.latency if self.bot.latency == self.bot.latency else 0.0
+        )
+        metrics.REGISTRY.gauge("bot_uptime_seconds", "Process uptime").set(
+            time.time() - self.started_at
+        )
+        metrics.REGISTRY.gauge("bot_process_rss_bytes", "Resident set size").set(
+            metrics.process_rss_mb() * 1024 * 1024
+        )
+        metrics.REGISTRY.gauge("bot_cached_members", "Members held in the cache").set(
+            sum(len(g.members) for g in self.bot.guilds)
+        )
+
+    @commands.Cog.listener()
+    async def on_app_command_completion(self, interaction: discord.Interaction, command):
+        metrics.observe_app_command(interaction, command)
+
+    # ------------------------------------------------------
+    # /bot_stats
+    # ------------------------------------------------------
+    @app_commands.command(name="bot_stats", description="Botの内部メトリクスを表示します（管理者のみ）")
+    @app_commands.checks.has_permissions(administrator=True)
+    async def show_stats(self, interaction: discord.Interaction):
+        self._refresh_gauges()
+        lag = metrics.LOOP_LAG_SECONDS
+        uptime = int(time.time() - self.started_at)
+
+        e = discord.Embed(title="📈 Bot Stats", color=0x264653)
+        e.add_field(
+            name="概要",
+            value=(
+                f"稼働: **{uptime // 3600}h{uptime % 3600 // 60}m**\n"
+                f"ギルド: **{len(self.bot.guilds)}**\n"
+                f"RSS: **{metrics.process_rss_mb():.1f}MB** / キャッシュ中メンバー: "
+                f"**{sum(len(g.members) for g in self.bot.guilds)}**\n"
+                f"Gateway遅延: **{_ms(self.bot.latency)}**\n"
+                f"REST 429: **{int(sum(metrics.REST_429.values.values()))}**"
+            ),
+            inline=False,
+        )
+        e.add_field(
+            name="イベントループ遅延",
+            value=(
+                f"直近 **{_ms(metrics.LOOP_LAG_LAST.get())}** / "
+                f"p50 **{_ms(lag.quantile(0.5))}** / p99 **{_ms(lag.quantile(0.99))}**"
+            ),
+            inline=False,
+        )
+
+        rows = sorted(metrics.HANDLER_SECONDS.summary(), key=lambda r: r[3], reverse=True)
+        lines = [
+            f"`{r[0].get('handler', '?')}` n={r[1]} p50={_ms(r[2])} p99={_ms(r[3])}"
+            for r in rows[:12]
+        ]
+        e.add_field(name="ハンドラ（p99順）", value="\n".join(lines) or "-", inline=False)
+
+        flush = sorted(metrics.STORE_FLUSH_SECONDS.summary(), key=lambda r: r[3], reverse=True)
+        lines = [
+            f"`{r[0].get('store', '?')}` n={r[1]} p50={_ms(r[2])} p99={_ms(r[3])}"
+            for r in flush[:8]
+        ]
+        e.add_field(name="ストア書き込み", value="\n".join(lines) or "-", inline=False)
+
+        if self.watchdog is not None:
+            lines = [
+                f"`{site}` {n}回 計{_ms(total)} 最大{_ms(worst)}"
+                for site, n, total, worst, _stack in self.watchdog.top(5)
+            ]
+            e.add_field(
+                name=f"ループ停止（>{_ms(self.watchdog.threshold)}）",
+                value="\n".join(lines) or "-",
+                inline=False,
+            )
+
+        hits = sorted(metrics.MODERATION_HITS.values.items(), key=lambda kv: kv[1], reverse=True)
+        if hits:
+            lines = [
+                f"`{dict(k).get('scope', '?')}` {dict(k).get('reason', '?')} {int(v)}"
+                for k, v in hits[:8]
+            ]
+            e.add_field(name="モデレーション（NGワード・連投）", value="\n".join(lines), inline=False)
+
+        errors = sorted(metrics.HANDLER_ERRORS.values.items(), key=lambda kv: kv[1], reverse=True)
+        if errors:
+            lines = [f"`{dict(k).get('handler', '?')}` {int(v)}" for k, v in errors[:8]]
+            e.add_field(name="例外", value="\n".join(lines), inline=False)
+
+        await interaction.response.send_message(embed=e, ephemeral=True)
+
+    @show_stats.error
+    async def show_stats_error(
+        self,
+        interaction: discord.Interaction,
+        error: app_commands.AppCommandError,
+    ):
+        if isinstance(error, app_commands.MissingPermissions):
+            await interaction.response.send_message(
+                "このコマンドは管理者のみ実行できます。", ephemeral=True
+            )
+            return
+        raise error
+
+
+async def setup(bot: commands.Bot):
+    await bot.add_cog(BotStatsCog(bot))
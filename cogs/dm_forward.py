@@ -2,6 +2,10 @@ import os
 import discord
 from discord.ext import commands
 
+from utils import text_filter
+from utils.metrics import timed
+from utils.moderation import get_moderator
+
 
 def _get_opt_int_env(key: str):
     v = os.getenv(key)
@@ -17,8 +21,11 @@ class DmForwardCog(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
         self.forward_user_id = _get_opt_int_env("DM_FORWARD_USER_ID")
+        # 連投で転送しなかった件数（user_id → 件数）。次に転送するときに転送先へ知らせる
+        self._suppressed: dict[int, int] = {}
 
     @commands.Cog.listener()
+    @timed("on_message:dm_forward")
     async def on_message(self, message: discord.Message):
         if message.author.bot:
             return
@@ -41,13 +48,33 @@ class DmForwardCog(commands.Cog):
             f"📩 **DM転送**\n"
             f"From: **{message.author}** (`{message.author.id}`)\n"
         )
+        verdict = get_moderator().check("dm_forward", message.author.id, content)
+        if verdict.reason == "rate":
+            # 連投は転送しない（転送先のDMが埋まらないように）。送り主には続けて来た最初の1回だけ知らせる
+            n = self._suppressed.get(message.author.id, 0) + 1
+            self._suppressed[message.author.id] = n
+            print(f"⚠️ DM forward rate-limited: {message.author} ({message.author.id}) x{n}")
+            if n == 1:
+                try:
+                    await message.channel.send(verdict.message() + "（この間のDMは運営に届いていません）")
+                except discord.HTTPException:
+                    pass
+            return
+        skipped = self._suppressed.pop(message.author.id, 0)
+        if skipped:
+            header += f"⚠️ 直前の連投 {skipped}件は転送していません\n"
+        if verdict.reason == "ng_word":
+            header += f"⚠️ NGワード「{verdict.detail}」を含むDM\n"
+        kind = text_filter.find_forbidden(content)
+        if kind is not None:
+            header += f"⚠️ {text_filter.LABELS[kind]}を含むDM（スパムかも）\n"
 
-        # まず本文を送る
+        # まず本文を送る（転送先で誰かに通知が飛ばないよう、メンションは無効）
         try:
             if content.strip():
-                await target.send(header + content)
+                await target.send(header + content, allowed_mentions=text_filter.NO_MENTIONS)
             else:
-                await target.send(header + "（本文なし）")
+                await target.send(header + "（本文なし）", allowed_mentions=text_filter.NO_MENTIONS)
         except Exception:
             return
 
@@ -0,0 +1,771 @@
+import asyncio
+import functools
+import os
+import random
+import time
+from typing import Dict, List, Optional
+
+import discord
+from discord import app_commands
+from discord.ext import commands
+
+from utils import jsonio
+from utils.events import (
+    DEFAULT_DIR,
+    DEFAULT_STATE_PATH,
+    EventRegistry,
+    EventStore,
+    base_name,
+    make_nick,
+    t_event,
+)
+from utils.guild_config import get_config
+from utils.members import chunk_members
+from utils.metrics import timed
+from utils.nicknames import NickWriter
+from utils.pager import EmbedPager
+from utils.panels import PanelKind, get_panels
+from utils.points import PointLedger
+from utils.scheduler import get_scheduler
+
+DEFAULT_POINTS_DIR = os.path.join("data", "event_points")
+
+
+def _get_int_env(key: str, default: int) -> int:
+    v = os.getenv(key)
+    if not v:
+        return default
+    try:
+        return int(v)
+    except ValueError:
+        return default
+
+
+def _fmt_mmss(sec: int) -> str:
+    m = sec // 60
+    s = sec % 60
+    if m <= 0:
+        return f"{s}秒"
+    if s == 0:
+        return f"{m}分"
+    return f"{m}分{s}秒"
+
+
+def _fill(text: str, ev: t_event, **extra: str) -> str:
+    # パネル文は中に { } を含みうるので format ではなく置換だけにする
+    values = {
+        "title": ev.title,
+        "cost": str(ev.cost),
+        "multi": str(ev.multi_pull),
+        "start": ev.start.strftime("%m/%d %H:%M"),
+        "end": ev.end.strftime("%m/%d %H:%M"),
+        **extra,
+    }
+    for k, v in values.items():
+        text = text.replace("{" + k + "}", v)
+    return text
+
+
+class EventButton(
+    discord.ui.DynamicItem[discord.ui.Button],
+    template=r"event:(?P<event>[0-9a-z_]+):(?P<action>pull|multi|points|revert)",
+):
+    """全イベント共通のボタン。custom_id からイベントを引くので、イベント追加で登録し直す必要はない。"""
+
+    def __init__(
+        self,
+        event_id: str,
+        action: str,
+        label: str = "",
+        style: discord.ButtonStyle = discord.ButtonStyle.secondary,
+        disabled: bool = False,
+    ) -> None:
+        super().__init__(
+            discord.ui.Button(
+                label=label or action,
+                style=style,
+                disabled=disabled,
+                custom_id=f"event:{event_id}:{action}",
+            )
+        )
+        self.event_id = event_id
+        self.action = action
+
+    @classmethod
+    async def from_custom_id(cls, interaction, item, match):
+        return cls(match["event"], match["action"])
+
+    @timed("event:button")
+    async def callback(self, interaction: discord.Interaction) -> None:
+        cog = interaction.client.get_cog("EventsCog")
+        if not isinstance(cog, EventsCog):
+            await interaction.response.send_message(
+                "Cogが見つからない。管理者に連絡して。", ephemeral=True
+            )
+            return
+        await cog.handle(interaction, self.event_id, self.action)
+
+
+class EventTopView(discord.ui.View):
+    PAGE_SIZE = 10
+
+    def __init__(self, ev: t_event, ledger: PointLedger, guild_id: int, user_id: int, page: int = 0):
+        super().__init__(timeout=180)
+        self._ev = ev
+        self._rank = ledger.rank(guild_id)
+        self._user_id = user_id
+        self.page = page
+        self._sync_buttons()
+
+    def _pages(self) -> int:
+        n = len(self._rank)
+        return max(1, (n + self.PAGE_SIZE - 1) // self.PAGE_SIZE)
+
+    def _sync_buttons(self) -> None:
+        self.prev_page.disabled = self.page <= 0
+        self.next_page.disabled = self.page >= self._pages() - 1
+
+    def embed(self) -> discord.Embed:
+        rank = self._rank
+        rows = rank.page(self.page * self.PAGE_SIZE, self.PAGE_SIZE)
+        lines = [f"**{rank.rank(uid)}位** <@{uid}> — {pts}pt" for uid, pts in rows]
+        e = discord.Embed(
+            title=f"🏆 {self._ev.title} ポイントランキング",
+            description="\n".join(lines) or "まだ誰もいません。",
+            color=0xE9C46A,
+        )
+        e.set_footer(text=f"{self.page + 1} / {self._pages()} ページ（{len(rank)}人）")
+        return e
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        return interaction.user is not None and interaction.user.id == self._user_id
+
+    @discord.ui.button(label="◀", style=discord.ButtonStyle.secondary)
+    @timed("event:top_page")
+    async def prev_page(self, interaction: discord.Interaction, button: discord.ui.Button) -> None:
+        self.page = max(0, self.page - 1)
+        self._sync_buttons()
+        await interaction.response.edit_message(embed=self.embed(), view=self)
+
+    @discord.ui.button(label="▶", style=discord.ButtonStyle.secondary)
+    @timed("event:top_page")
+    async def next_page(self, interaction: discord.Interaction, button: discord.ui.Button) -> None:
+        self.page = min(self._pages() - 1, self.page + 1)
+        self._sync_buttons()
+        await interaction.response.edit_message(embed=self.embed(), view=self)
+
+    @discord.ui.button(label="自分の順位", style=discord.ButtonStyle.primary)
+    @timed("event:top_mine")
+    async def my_rank(self, interaction: discord.Interaction, button: discord.ui.Button) -> None:
+        r = self._rank.rank(interaction.user.id)
+        if r is None:
+            await interaction.response.send_message(
+                "まだランキングにいません（VCに入るかガチャを引くと載ります）。",
+                ephemeral=True,
+            )
+            return
+        self.page = (r - 1) // self.PAGE_SIZE
+        self._sync_buttons()
+        await interaction.response.edit_message(embed=self.embed(), view=self)
+
+
+def _panel_view(ev: t_event, disabled: bool = False) -> discord.ui.View:
+    view = discord.ui.View(timeout=None)
+    view.add_item(
+        EventButton(
+            ev.id,
+            "pull",
+            str(ev.panel.get("button") or "🎁 ガチャを引く"),
+            discord.ButtonStyle.success,
+            disabled,
+        )
+    )
+    if ev.multi_pull > 1:
+        label = ev.panel.get("multi_button") or f"🎁×{ev.multi_pull} {ev.multi_pull}連"
+        if ev.cost > 0:
+            label += f"（{ev.cost * ev.multi_pull}pt）"
+        view.add_item(
+            EventButton(ev.id, "multi", _fill(str(label), ev), discord.ButtonStyle.primary, disabled)
+        )
+    if ev.uses_points:
+        view.add_item(EventButton(ev.id, "points", "💰 ポイント確認", disabled=disabled))
+    return view
+
+
+def _result_view(ev: t_event, pages: List[discord.Embed]) -> Optional[discord.ui.View]:
+    if not ev.renames and len(pages) <= 1:
+        return None
+    view = EmbedPager(pages, timeout=300)
+    if ev.renames:
+        view.add_item(EventButton(ev.id, "revert", "↩️ 名前を戻す"))
+    return view
+
+
+def _reward_embed(ev: t_event, r) -> discord.Embed:
+    return discord.Embed(
+        title=f"{r.icon or '🎁'} {r.title} 〔{r.rarity}〕",
+        description=r.desc,
+        color=ev.color_for(r.rarity),
+    )
+
+
+def _panel_embed(ev: t_event) -> discord.Embed:
+    p = ev.panel
+    e = discord.Embed(
+        title=_fill(str(p.get("title") or ev.title), ev),
+        description=_fill(str(p.get("description") or ""), ev),
+        color=int(p.get("color", 0x2ECC71)),
+    )
+    if p.get("footer"):
+        e.set_footer(text=_fill(str(p["footer"]), ev))
+    return e
+
+
+def _closed_embed(ev: t_event, first: bool = False) -> discord.Embed:
+    c = ev.closed
+    messages = list(c.get("messages") or ["このイベントは終了しました。"])
+    e = discord.Embed(
+        title=_fill(str(c.get("title") or f"{ev.title}（終了）"), ev),
+        # パネルに出すものは毎回同じ文にする（内容ハッシュが変わらないように）
+        description=messages[0] if first else random.choice(messages),
+        color=0x2B2B2B,
+    )
+    if c.get("footer"):
+        e.set_footer(text=str(c["footer"]))
+    return e
+
+
+class EventsCog(commands.Cog):
+    """
+    data/events/*.json で定義した季節イベント（ガチャ）を動かす。
+    定義の追加・変更は /event_reload（または定期チェック）で反映され、再起動は要らない。
+    """
+
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+        self.config = get_config()
+        self.registry = EventRegistry(os.getenv("EVENTS_DIR") or DEFAULT_DIR)
+        self.store = EventStore(os.getenv("EVENTS_STATE_PATH") or DEFAULT_STATE_PATH)
+        # ポイントはイベントごとの台帳（<id>.json がスナップショット、<id>.jsonl が追記分）
+        self.points_dir = os.getenv("EVENTS_POINTS_DIR") or DEFAULT_POINTS_DIR
+        self.snapshot_every = max(1, _get_int_env("EVENTS_SNAPSHOT_EVERY", 1000))
+        self._ledgers: Dict[str, PointLedger] = {}
+        self.flush_sec = max(1, _get_int_env("EVENTS_FLUSH_SEC", 10))
+        # 名前の変更はイベントごと・メンバーごとにまとめる（連打しても最後の1つだけ送る）
+        self.nick_debounce = max(0, _get_int_env("EVENTS_NICK_DEBOUNCE_MS", 1500)) / 1000
+        self._nicks: Dict[str, NickWriter] = {}
+        self._task: Optional[asyncio.Task] = None
+        # 開催中のイベントID。開始/終了はスケジューラが切り替え、ボタン側はこれを見るだけ
+        self._open: set = set()
+
+    def _reload(self, force: bool = False) -> None:
+        changed, removed = self.registry.reload(force)
+        panels = get_panels()
+        for eid in changed:
+            ev = self.registry.get(eid)
+            self._migrate(ev)
+            self._schedule(ev)
+            # 定義が変わったら、置いてあるパネルも台帳側で確認・更新される
+            panels.register(PanelKind(f"event:{eid}", functools.partial(self._render_panel, eid)))
+            state = "open" if eid in self._open else "closed"
+            print(f"🎪 Event loaded: {eid} ({len(ev.sampler)} rewards, {state})")
+        for eid in removed:
+            get_scheduler().cancel_prefix(f"event:{eid}:")
+            panels.unregister(f"event:{eid}")
+            self._open.discard(eid)
+            ledger = self._ledgers.pop(eid, None)
+            if ledger is not None:
+                ledger.close()
+            print(f"🎪 Event removed: {eid}")
+        for name, err in self.registry.errors.items():
+            print(f"⚠️ Event {name}: {err}")
+
+    def _ledger(self, ev: t_event) -> Optional[PointLedger]:
+        if not ev.uses_points:
+            return None
+        ledger = self._ledgers.get(ev.id)
+        if ledger is None:
+            base = os.path.join(self.points_dir, ev.id)
+            ledger = PointLedger(base + ".json", base + ".jsonl", ev.points_initial, self.snapshot_every)
+            ledger.load()
+            self._ledgers[ev.id] = ledger
+        return ledger
+
+    def _migrate(self, ev: t_event) -> None:
+        """
+        以前の置き場所にあった状態を一度だけ引き継ぐ（元のファイルは消さない）。
+        - events_state.json の points → ポイント台帳
+        - 定義の legacy: 専用Cogのポイント台帳・元ニックネーム・締切済みフラグ・パネル
+        """
+        meta = self.store.meta(ev.id)
+        if meta.get("migrated"):
+            return
+        legacy = ev.legacy
+        home = self.config.home_guild_id
+        notes: List[str] = []
+        try:
+            ledger = self._ledger(ev)
+            if ledger is not None and ledger.empty:
+                old = self.store.take_points(ev.id)
+                if old:
+                    notes.append(f"points={ledger.import_points(old)}")
+                elif legacy.get("points") and home:
+                    n = ledger.import_legacy(legacy["points"], legacy.get("points_ledger", ""), home)
+                    notes.append(f"legacy points={n}")
+            state = {}
+            if legacy.get("state") and os.path.exists(legacy["state"]):
+                with open(legacy["state"], "r", encoding="utf-8") as f:
+                    state = jsonio.load(f)
+                if not isinstance(state, dict):
+                    state = {}
+            if isinstance(state.get("orig_nick"), dict):
+                notes.append(f"nicks={self.store.import_nicks(ev.id, state['orig_nick'])}")
+            if state.get("closed_done") and not ev.is_open():
+                meta["closed_done"] = True
+        except (OSError, ValueError, TypeError) as e:
+            print(f"⚠️ Event {ev.id} migration failed (will retry on next load): {e}")
+            return
+
+        panels = get_panels()
+        if legacy.get("panel_kind"):
+            n = panels.rename(legacy["panel_kind"], f"event:{ev.id}")
+            if n:
+                notes.append(f"panels={n}")
+        channel_env = legacy.get("panel_channel_env")
+        if channel_env and home:
+            panels.adopt(
+                f"event:{ev.id}", home, _get_int_env(channel_env, 0),
+                int(state.get("panel_message_id", 0) or 0),
+            )
+        meta["migrated"] = True
+        self.store.dirty = True
+        self.store.flush()
+        if notes:
+            print(f"🎪 Event {ev.id} migrated: {' '.join(notes)}")
+
+    def _render_panel(self, event_id: str, guild_id: int):
+        ev = self.registry.get(event_id)
+        if event_id in self._open:
+            return None, _panel_embed(ev), _panel_view(ev)
+        return None, _closed_embed(ev, first=True), _panel_view(ev, disabled=True)
+
+    def _schedule(self, ev: t_event) -> None:
+        sched = get_scheduler()
+        if ev.is_open():
+            self._mark_open(ev.id)
+        else:
+            self._open.discard(ev.id)
+            sched.call_at(ev.start, f"event:{ev.id}:open", functools.partial(self._on_open, ev.id))
+        # 終了済みならすぐ発火する（片付けは closed_done で一度だけ）
+        sched.call_at(ev.end, f"event:{ev.id}:close", functools.partial(self._on_close, ev.id))
+
+    def _mark_open(self, event_id: str) -> None:
+        self._open.add(event_id)
+        meta = self.store.meta(event_id)
+        if meta.pop("closed_done", None):
+            self.store.dirty = True
+
+    async def _on_open(self, event_id: str) -> None:
+        ev = self.registry.get(event_id)
+        if ev is None or not ev.is_open():
+            return
+        self._mark_open(event_id)
+        print(f"🎪 Event opened: {event_id}")
+
+    async def _on_close(self, event_id: str) -> None:
+        """終了時の片付け：パネルを終了表示にし、名前を変えるイベントなら全員戻す。"""
+        self._open.discard(event_id)
+        ev = self.registry.get(event_id)
+        meta = self.store.meta(event_id)
+        if ev is None or meta.get("closed_done"):
+            return
+        await self.bot.wait_until_ready()
+        print(f"🎪 Event closed: {event_id}")
+        panels = get_panels()
+        for gid, _rec in panels.records(f"event:{event_id}"):
+            await panels.refresh(self.bot, f"event:{event_id}", gid)
+        if ev.renames:
+            for gid in self.store.nick_guilds(event_id):
+                guild = self.bot.get_guild(gid)
+                if guild is None:
+                    continue
+                ok, fail, skip = await self.revert_all(ev, guild)
+                print(f"🎪 Reverted nicknames for {event_id} in {gid}: ok={ok} fail={fail} skip={skip}")
+        meta["closed_done"] = True
+        self.store.dirty = True
+        self.store.flush()
+
+    async def cog_load(self) -> None:
+        self.bot.add_dynamic_items(EventButton)
+        self._reload()
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def cog_unload(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        get_scheduler().cancel_prefix("event:")
+        panels = get_panels()
+        for eid in self.registry.events:
+            panels.unregister(f"event:{eid}")
+        self.bot.remove_dynamic_items(EventButton)
+        for writer in self._nicks.values():
+            writer.close()
+        for ledger in self._ledgers.values():
+            ledger.close()
+        self._ledgers.clear()
+        self.store.flush()
+
+    async def _loop(self) -> None:
+        await self.bot.wait_until_ready()
+        last_tick = time.monotonic()
+        while not self.bot.is_closed():
+            await asyncio.sleep(self.flush_sec)
+            try:
+                now = time.monotonic()
+                if now - last_tick >= 60:
+                    last_tick = now
+                    self._reload()
+                    self._tick_vc_points()
+                self.store.flush()
+            except Exception as e:
+                print(f"⚠️ Event loop error: {e}")
+
+    def _tick_vc_points(self) -> None:
+        events = [
+            ev for eid in self._open
+            if (ev := self.registry.get(eid)) is not None and ev.points_vc_per_minute > 0
+        ]
+        if not events:
+            return
+        for g in self.bot.guilds:
+            rest_vc_id = self.config.get_int(g.id, "EVENT_REST_VC_ID")
+            afk_id = g.afk_channel.id if g.afk_channel else 0
+            present = [
+                m.id
+                for vc in g.voice_channels if vc.id not in (rest_vc_id, afk_id)
+                for m in vc.members if not m.bot
+            ]
+            if not present:
+                continue
+            # VCの加算はイベント・ギルドごとに1分1行（全員分まとめて）
+            for ev in events:
+                self._ledger(ev).add_many(
+                    g.id, dict.fromkeys(present, ev.points_vc_per_minute), "vc"
+                )
+
+    # ------------------------------------------------------
+    # ボタン
+    # ------------------------------------------------------
+    async def handle(self, interaction: discord.Interaction, event_id: str, action: str) -> None:
+        if not interaction.guild or not isinstance(interaction.user, discord.Member):
+            await interaction.response.send_message("サーバー内で使ってね。", ephemeral=True)
+            return
+        ev = self.registry.get(event_id)
+        if ev is None:
+            await interaction.response.send_message(
+                "このイベントは見つからない（終了したか、定義が消えた）。", ephemeral=True
+            )
+            return
+        if action == "pull":
+            await self._pull(interaction, ev, 1)
+        elif action == "multi" and ev.multi_pull > 1:
+            await self._pull(interaction, ev, ev.multi_pull)
+        elif action == "points":
+            ledger = self._ledger(ev)
+            if ledger is None:
+                await interaction.response.send_message("このイベントにポイントはありません。", ephemeral=True)
+                return
+            gid = interaction.guild.id
+            msg = f"あなたのポイント：**{ledger.get(gid, interaction.user.id)}pt**"
+            rank = ledger.rank(gid)
+            r = rank.rank(interaction.user.id)
+            if r is not None:
+                msg += f"（{r}位 / {len(rank)}人）"
+            await interaction.response.send_message(msg, ephemeral=True)
+        elif action == "revert":
+            await self._revert(interaction, ev)
+
+    async def _pull(self, interaction: discord.Interaction, ev: t_event, count: int) -> None:
+        """count 回まとめて引く。ポイントの減算・クールダウン・名前の変更は何連でも1回。"""
+        if ev.id not in self._open:
+            await interaction.response.send_message(embed=_closed_embed(ev), ephemeral=True)
+            return
+        member = interaction.user
+        gid = interaction.guild.id
+
+        left = self.store.cooldown_left(ev.id, gid, member.id)
+        if left > 0:
+            await interaction.response.send_message(
+                f"まだ早い。あと **{_fmt_mmss(left)}** 待って。⏳", ephemeral=True
+            )
+            return
+
+        remain = None
+        if ev.cost > 0:
+            ledger = self._ledger(ev)
+            cost = ev.cost * count
+            pts = ledger.get(gid, member.id)
+            if pts < cost:
+                await interaction.response.send_message(
+                    f"ポイント不足です（必要：{cost}pt / 現在：{pts}pt）", ephemeral=True
+                )
+                return
+            # 減算は応答より先に台帳へ追記される（何連でも1行）
+            remain = ledger.add(gid, member.id, -cost, "draw" if count == 1 else f"draw{count}")
+
+        picks = ev.sampler.draw(count)
+        best = ev.sampler.best(picks)
+        self.store.set_cooldown(ev.id, gid, member.id, ev.cooldown_sec)
+
+        if count == 1:
+            e = _reward_embed(ev, best)
+        else:
+            lines = [
+                f"`{i:>2}` {'👑 ' if r is best else ''}{r.icon or '🎁'} {r.title} 〔{r.rarity}〕"
+                for i, r in enumerate(picks, 1)
+            ]
+            e = discord.Embed(
+                title=f"{ev.title} {count}連",
+                description="\n".join(lines),
+                color=ev.color_for(best.rarity),
+            )
+        author = ev.result.get("author")
+        if author:
+            e.set_author(
+                name=_fill(str(author), ev, user=member.display_name),
+                icon_url=member.display_avatar.url,
+            )
+        if ev.renames:
+            # ニックの変更は直前の変更とまとめるため待つことがある。応答期限に間に合うよう先に defer
+            await interaction.response.defer(ephemeral=True, thinking=True)
+            self.store.remember_nick(
+                ev.id, gid, member.id, base_name(member.nick) if member.nick else None
+            )
+            new_nick = make_nick(ev.nick_format, member.display_name, best.name, ev.nick_max_len)
+            changed = await self._try_set_nick(member, new_nick, ev)
+            e.add_field(name="", value=f"`{new_nick}`", inline=False)
+            e.set_footer(text="世界が少しだけ変わった気がする" if changed else "名前は変えられなかった")
+        if remain is not None:
+            e.add_field(name="残りポイント", value=f"{remain}pt", inline=False)
+
+        pages = [e]
+        if count > 1:
+            for i, r in enumerate(picks, 1):
+                p = _reward_embed(ev, r)
+                p.set_footer(text=f"{i}/{count}" + ("　👑" if r is best else ""))
+                pages.append(p)
+        view = _result_view(ev, pages)
+        kwargs = {"embed": e, "ephemeral": True}
+        if view is not None:
+            kwargs["view"] = view
+        if interaction.response.is_done():
+            await interaction.followup.send(**kwargs)
+        else:
+            await interaction.response.send_message(**kwargs)
+
+    async def _try_set_nick(self, member: discord.Member, nick: Optional[str], ev: t_event) -> bool:
+        writer = self._nicks.get(ev.id)
+        if writer is None:
+            writer = self._nicks[ev.id] = NickWriter(f"Event {ev.id} nickname", self.nick_debounce)
+        return await writer.set(member, nick)
+
+    def _restore_target(self, ev: t_event, member: discord.Member):
+        """(戻す名前, 記録を消すか)。記録がなければ今のニックから＠以降を外す。"""
+        targets = self.store.nick_targets(ev.id, member.guild.id)
+        if member.id in targets:
+            return targets[member.id], True
+        cur = member.nick or ""
+        if "＠" in cur or "@" in cur:
+            base = base_name(cur)
+            return (None if base == "unknown" else base), False
+        return None, False
+
+    async def _revert(self, interaction: discord.Interaction, ev: t_event) -> None:
+        member = interaction.user
+        target, recorded = self._restore_target(ev, member)
+        if not recorded and target is None:
+            await interaction.response.send_message(
+                "戻す元の名前が見つからなかった…！", ephemeral=True
+            )
+            return
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        if await self._try_set_nick(member, target, ev):
+            self.store.forget_nick(ev.id, member.guild.id, member.id)
+            await interaction.followup.send("名前を元に戻したよ。", ephemeral=True)
+        else:
+            await interaction.followup.send("権限の都合で戻せなかった…！", ephemeral=True)
+
+    # ------------------------------------------------------
+    # コマンド
+    # ------------------------------------------------------
+    async def _event_autocomplete(
+        self, interaction: discord.Interaction, current: str
+    ) -> List[app_commands.Choice[str]]:
+        cur = current.lower()
+        return [
+            app_commands.Choice(name=f"{ev.id}（{ev.title}）"[:100], value=ev.id)
+            for ev in self.registry.events.values() if cur in ev.id
+        ][:25]
+
+    @app_commands.command(name="event_list", description="イベント定義の一覧と状態を表示します")
+    @app_commands.checks.has_permissions(manage_guild=True)
+    async def event_list(self, interaction: discord.Interaction) -> None:
+        lines = []
+        for ev in sorted(self.registry.events.values(), key=lambda x: x.start):
+            state = "🟢 開催中" if ev.id in self._open else "⚪ 期間外"
+            extra = []
+            if ev.cost:
+                extra.append(f"{ev.cost}pt/回")
+            if ev.cooldown_sec:
+                extra.append(f"CD {_fmt_mmss(ev.cooldown_sec)}")
+            if ev.renames:
+                extra.append("名前変更あり")
+            lines.append(
+                f"{state} `{ev.id}` {ev.title}\n"
+                f"　{ev.start:%m/%d %H:%M} 〜 {ev.end:%m/%d %H:%M} / 景品 {len(ev.sampler)}種"
+                + (" / " + " / ".join(extra) if extra else "")
+            )
+        for name, err in self.registry.errors.items():
+            lines.append(f"⚠️ `{name}`: {err}")
+        e = discord.Embed(
+            title="🎪 イベント",
+            description="\n".join(lines)[:4000] or "定義がありません（data/events/*.json）",
+            color=0x264653,
+        )
+        await interaction.response.send_message(embed=e, ephemeral=True)
+
+    @app_commands.command(name="event_panel", description="イベントのパネルをこのチャンネルに投稿します")
+    @app_commands.describe(event_id="イベントID")
+    @app_commands.autocomplete(event_id=_event_autocomplete)
+    @app_commands.checks.has_permissions(manage_guild=True)
+    async def event_panel(self, interaction: discord.Interaction, event_id: str) -> None:
+        ev = self.registry.get(event_id)
+        if ev is None:
+            await interaction.response.send_message(f"不明なイベント: `{event_id}`", ephemeral=True)
+            return
+        if not isinstance(interaction.channel, (discord.TextChannel, discord.Thread)):
+            await interaction.response.send_message("テキストチャンネルで使ってね。", ephemeral=True)
+            return
+        await interaction.response.defer(ephemeral=True)
+        msg = await get_panels().publish(
+            self.bot, f"event:{ev.id}", interaction.channel, interaction.guild_id, verify=True
+        )
+        await interaction.followup.send(
+            "パネルを投稿しました。" if msg is not None else "パネルはもうこのチャンネルにあります。",
+            ephemeral=True,
+        )
+
+    @app_commands.command(name="event_top", description="イベントのポイントランキングを表示します")
+    @app_commands.describe(event_id="イベントID")
+    @app_commands.autocomplete(event_id=_event_autocomplete)
+    async def event_top(self, interaction: discord.Interaction, event_id: str) -> None:
+        ev = self.registry.get(event_id)
+        ledger = self._ledger(ev) if ev is not None else None
+        if ledger is None:
+            await interaction.response.send_message(
+                f"ポイントのあるイベントではありません: `{event_id}`", ephemeral=True
+            )
+            return
+        if interaction.guild_id is None:
+            await interaction.response.send_message("サーバー内で使ってね。", ephemeral=True)
+            return
+        view = EventTopView(ev, ledger, interaction.guild_id, interaction.user.id)
+        await interaction.response.send_message(embed=view.embed(), view=view, ephemeral=True)
+
+    @app_commands.command(name="event_reload", description="イベント定義を読み直します（管理者のみ）")
+    @app_commands.checks.has_permissions(administrator=True)
+    async def event_reload(self, interaction: discord.Interaction) -> None:
+        self._reload(force=True)
+        msg = f"{len(self.registry.events)} 件のイベントを読み込みました。"
+        if self.registry.errors:
+            msg += "\n" + "\n".join(f"⚠️ `{k}`: {v}" for k, v in self.registry.errors.items())
+        await interaction.response.send_message(msg[:2000], ephemeral=True)
+
+    @app_commands.command(name="event_reset", description="イベントのポイントとクールダウンをリセットします（管理者のみ）")
+    @app_commands.describe(event_id="イベントID")
+    @app_commands.autocomplete(event_id=_event_autocomplete)
+    @app_commands.checks.has_permissions(administrator=True)
+    async def event_reset(self, interaction: discord.Interaction, event_id: str) -> None:
+        ev = self.registry.get(event_id)
+        if ev is None:
+            await interaction.response.send_message(f"不明なイベント: `{event_id}`", ephemeral=True)
+            return
+        n = self.store.reset(event_id, interaction.guild_id)
+        ledger = self._ledger(ev)
+        if ledger is not None:
+            n += ledger.reset_guild(interaction.guild_id)
+        self.store.flush()
+        await interaction.response.send_message(
+            f"`{event_id}` をリセットしました（{n} 件削除）。", ephemeral=True
+        )
+
+    @app_commands.command(name="event_revert_all", description="イベントで変わった名前を可能な限り全員戻します（管理者のみ）")
+    @app_commands.describe(event_id="イベントID")
+    @app_commands.autocomplete(event_id=_event_autocomplete)
+    @app_commands.checks.has_permissions(administrator=True)
+    async def event_revert_all(self, interaction: discord.Interaction, event_id: str) -> None:
+        ev = self.registry.get(event_id)
+        if ev is None or not ev.renames:
+            await interaction.response.send_message(
+                f"名前を変えるイベントではありません: `{event_id}`", ephemeral=True
+            )
+            return
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        ok, fail, skip = await self.revert_all(ev, interaction.guild)
+        await interaction.followup.send(
+            f"🎪 全員戻し：成功 {ok} / 失敗 {fail} / 対象外 {skip}\n"
+            "失敗が残る場合は、Botロールの位置と `Manage Nicknames` を確認してね。",
+            ephemeral=True,
+        )
+
+    async def revert_all(self, ev: t_event, guild: discord.Guild):
+        recorded = self.store.nick_targets(ev.id, guild.id)
+        members: Dict[int, discord.Member] = {m.id: m for m in await chunk_members(guild)}
+        targets = set(recorded)
+        targets.update(
+            m.id for m in members.values() if m.nick and ("＠" in m.nick or "@" in m.nick)
+        )
+        ok = fail = skip = 0
+        for uid in targets:
+            member = members.get(uid)
+            if member is None:
+                skip += 1
+                continue
+            target, is_recorded = self._restore_target(ev, member)
+            if target == member.nick:
+                if is_recorded:
+                    self.store.forget_nick(ev.id, guild.id, uid)
+                skip += 1
+                continue
+            if await self._try_set_nick(member, target, ev):
+                ok += 1
+                if is_recorded:
+                    self.store.forget_nick(ev.id, guild.id, uid)
+            else:
+                fail += 1
+            await asyncio.sleep(0.8)
+        self.store.flush()
+        return ok, fail, skip
+
+    @event_list.error
+    @event_panel.error
+    @event_reload.error
+    @event_reset.error
+    @event_revert_all.error
+    async def event_error(
+        self,
+        interaction: discord.Interaction,
+        error: app_commands.AppCommandError,
+    ) -> None:
+        if isinstance(error, app_commands.MissingPermissions):
+            await interaction.response.send_message(
+                "このコマンドは管理者のみ実行できます。", ephemeral=True
+            )
+            return
+        raise error
+
+
+async def setup(bot: commands.Bot) -> None:
+    await bot.add_cog(EventsCog(bot))
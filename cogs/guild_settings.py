@@ -0,0 +1,118 @@
+import discord
+from discord import app_commands
+from discord.ext import commands
+
+from utils.guild_config import KEYS, get_config
+
+
+class GuildSettingsCog(commands.Cog):
+    """ギルドごとの設定（utils/guild_config.py）を Discord 上から確認・変更する。"""
+
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+        self.config = get_config()
+
+    async def _key_autocomplete(
+        self, interaction: discord.Interaction, current: str
+    ) -> list[app_commands.Choice[str]]:
+        cur = current.upper()
+        return [
+            app_commands.Choice(name=k, value=k) for k in KEYS if cur in k
+        ][:25]
+
+    @app_commands.command(
+        name="guild_config_show",
+        description="このサーバーの設定値を表示します（管理者のみ）",
+    )
+    @app_commands.checks.has_permissions(administrator=True)
+    async def guild_config_show(self, interaction: discord.Interaction):
+        gid = interaction.guild_id
+        own = self.config.section(gid)
+        lines = []
+        for key, (kind, shared) in KEYS.items():
+            value = self.config.get(gid, key)
+            if value is None:
+                shown = "-"
+            elif kind == "ids":
+                shown = ", ".join(str(x) for x in sorted(value)) or "-"
+            elif kind == "map":
+                shown = ", ".join(f"{k}:{v}" for k, v in value.items()) or "-"
+            else:
+                shown = str(value)
+            src = "server" if key in own else ("env" if value is not None else "")
+            lines.append(f"`{key}` = {shown}" + (f"  _({src})_" if src else ""))
+
+        e = discord.Embed(
+            title="⚙️ サーバー設定",
+            description="\n".join(lines)[:4000],
+            color=0x264653,
+        )
+        e.set_footer(text=f"guild_id={gid} / 変更は /guild_config_set")
+        await interaction.response.send_message(embed=e, ephemeral=True)
+
+    @app_commands.command(
+        name="guild_config_set",
+        description="このサーバーの設定値を変更します（管理者のみ）",
+    )
+    @app_commands.describe(
+        key="設定キー（.env と同じ名前）",
+        value="値（ID一覧は 1,2,3 / 対応表は emoji_id:role_id,...）",
+    )
+    @app_commands.autocomplete(key=_key_autocomplete)
+    @app_commands.checks.has_permissions(administrator=True)
+    async def guild_config_set(
+        self, interaction: discord.Interaction, key: str, value: str
+    ):
+        key = key.strip().upper()
+        if key not in KEYS:
+            await interaction.response.send_message(
+                f"不明なキーです: `{key}`", ephemeral=True
+            )
+            return
+        try:
+            self.config.set(interaction.guild_id, key, value)
+        except (TypeError, ValueError):
+            await interaction.response.send_message(
+                f"`{key}` の値として読めません: `{value}`", ephemeral=True
+            )
+            return
+        print(f"⚙️ Guild config {interaction.guild_id}.{key} set by {interaction.user}")
+        await interaction.response.send_message(
+            f"`{key}` を更新しました。", ephemeral=True
+        )
+
+    @app_commands.command(
+        name="guild_config_unset",
+        description="このサーバーの設定値を削除して既定値に戻します（管理者のみ）",
+    )
+    @app_commands.autocomplete(key=_key_autocomplete)
+    @app_commands.checks.has_permissions(administrator=True)
+    async def guild_config_unset(self, interaction: discord.Interaction, key: str):
+        key = key.strip().upper()
+        if not self.config.unset(interaction.guild_id, key):
+            await interaction.response.send_message(
+                f"`{key}` はこのサーバーで設定されていません。", ephemeral=True
+            )
+            return
+        await interaction.response.send_message(
+            f"`{key}` を既定値に戻しました。", ephemeral=True
+        )
+
+    @guild_config_show.error
+    @guild_config_set.error
+    @guild_config_unset.error
+    async def guild_config_error(
+        self,
+        interaction: discord.Interaction,
+        error: app_commands.AppCommandError,
+    ):
+        if isinstance(error, app_commands.MissingPermissions):
+            await interaction.response.send_message(
+                "このコマンドは管理者のみ実行できます。", ephemeral=True
+            )
+            return
+        raise error
+
+
+async def setup(bot: commands.Bot):
+    await bot.add_cog(GuildSettingsCog(bot))
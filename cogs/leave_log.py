@@ -1,24 +1,34 @@
 import discord
 from discord.ext import commands
 import asyncio
-import os
+
+from utils.guild_config import get_config
+from utils.metrics import timed
 
 class LeaveLog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.LEAVE_LOG_CHANNEL_ID = int(os.getenv("LEAVE_LOG_CHANNEL_ID"))
+        self.config = get_config()  # LEAVE_LOG_CHANNEL_ID はギルドごと
         self.recent_bans = {}
         self.recent_kicks = {}
 
     # ======================================================
     # ✅ 退出イベント（leave/kick/ban）
     # ======================================================
+    # メンバーを全員キャッシュしない構成でも届くよう raw イベントを使う
     @commands.Cog.listener()
-    async def on_member_remove(self, member: discord.Member):
-        guild = member.guild
-        channel = guild.get_channel(self.LEAVE_LOG_CHANNEL_ID)
+    @timed("on_raw_member_remove:leave_log")
+    async def on_raw_member_remove(self, payload: discord.RawMemberRemoveEvent):
+        guild = self.bot.get_guild(payload.guild_id)
+        if guild is None:
+            return
+        member = payload.user  # キャッシュにいれば Member、いなければ User
+        channel_id = self.config.get_int(guild.id, "LEAVE_LOG_CHANNEL_ID")
+        if not channel_id:
+            return  # 退出ログ未設定のサーバー
+        channel = guild.get_channel(channel_id)
         if not channel:
-            print("⚠️ 退出ログチャンネルが見つかりません。")
+            print(f"⚠️ 退出ログチャンネルが見つかりません。(guild={guild.id})")
             return
 
         # Kick/Ban情報を待つ（AuditLog反映遅延対策）
@@ -38,8 +48,11 @@ class LeaveLog(commands.Cog):
             color = 0x6B8AFF
 
         # 退出時のロール一覧
-        roles = [r.mention for r in member.roles if r != guild.default_role]
-        role_list = ", ".join(roles) if roles else "なし"
+        if isinstance(member, discord.Member):
+            roles = [r.mention for r in member.roles if r != guild.default_role]
+            role_list = ", ".join(roles) if roles else "なし"
+        else:
+            role_list = "不明（キャッシュ外）"
 
         # タイトルごとに変化
         titles = {
@@ -64,6 +77,7 @@ class LeaveLog(commands.Cog):
     # ✅ BAN検知イベント
     # ======================================================
     @commands.Cog.listener()
+    @timed("on_member_ban:leave_log")
     async def on_member_ban(self, guild, user):
         try:
             entry = await guild.fetch_ban(user)
@@ -77,6 +91,7 @@ class LeaveLog(commands.Cog):
     # ✅ KICK検知イベント（AuditLog）
     # ======================================================
     @commands.Cog.listener()
+    @timed("on_audit_log_entry_create:leave_log")
     async def on_audit_log_entry_create(self, entry):
         if entry.action == discord.AuditLogAction.kick:
             target = entry.target
@@ -88,6 +103,7 @@ class LeaveLog(commands.Cog):
     # ✅ 起動時ログ
     # ======================================================
     @commands.Cog.listener()
+    @timed("on_ready:leave_log")
     async def on_ready(self):
         print("✅ LeaveLog cog loaded (kick/ban detection active).")
 
@@ -1,56 +1,51 @@
-import os
 import discord
 from discord.ext import commands
 from discord import app_commands
 
+from utils.guild_config import get_config
+from utils.members import get_or_fetch_member
+from utils.matchmaking import VALO_RANK_MAP
+from utils.metrics import timed
+
 
 class ReactionRoles(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.GUILD_ID = int(os.getenv("GUILD_ID"))
-
-        # カンマ区切りで複数のメッセージに対応
-        raw_ids = os.getenv("REACTION_ROLE_MESSAGE_IDS", "")
-        self.REACTION_ROLE_MESSAGE_IDS = {
-            int(x) for x in raw_ids.split(",") if x.strip().isdigit()
-        }
-
-        self.reaction_role_map = {}
+        # 対象メッセージIDと 絵文字→ロール の対応はギルドごと
+        # （GUILD_ID のサーバーは .env の REACTION_ROLE_MESSAGE_IDS / RR_xxx=emoji_id:role_id）
+        self.config = get_config()
         self.load_reaction_roles()
 
     # ======================================================
-    # ✅ .env 読み込み
+    # ✅ 設定読み込み
     # ======================================================
     def load_reaction_roles(self):
-        self.reaction_role_map.clear()
-        for key, value in os.environ.items():
-            if key.startswith("RR_"):
-                try:
-                    emoji_id, role_id = value.split(":")
-                    self.reaction_role_map[int(emoji_id)] = int(role_id)
-                except ValueError:
-                    print(f"⚠️ Invalid RR_ format: {key}={value}")
-        print(f"✅ Reaction roles loaded: {len(self.reaction_role_map)} entries")
+        self.config.load()
+        count = len(self.config.get_map(None, "REACTION_ROLE_MAP"))
+        print(f"✅ Reaction roles loaded: {count} entries")
 
     # ======================================================
     # ✅ ロール操作共通処理
     # ======================================================
     async def handle_reaction(self, payload, add=True):
-        if payload.message_id not in self.REACTION_ROLE_MESSAGE_IDS:
+        if payload.guild_id is None:
+            return
+        if payload.message_id not in self.config.get_ids(payload.guild_id, "REACTION_ROLE_MESSAGE_IDS"):
             return
         if payload.user_id == self.bot.user.id:
             return
 
-        guild = self.bot.get_guild(self.GUILD_ID)
+        guild = self.bot.get_guild(payload.guild_id)
         if not guild:
             return
 
-        member = guild.get_member(payload.user_id)
+        # 追加イベントには member が付いてくる。外すときはキャッシュ外なら取得する
+        member = payload.member or await get_or_fetch_member(guild, payload.user_id)
         if not member:
             return
 
         emoji_id = payload.emoji.id if payload.emoji.is_custom_emoji() else None
-        role_id = self.reaction_role_map.get(emoji_id)
+        role_id = self.config.get_map(guild.id, "REACTION_ROLE_MAP").get(emoji_id)
         if not role_id:
             return
 
@@ -66,10 +61,12 @@ class ReactionRoles(commands.Cog):
             print(f"🗑 Removed {role.name} → {member.display_name}")
 
     @commands.Cog.listener()
+    @timed("on_raw_reaction_add:reaction_roles")
     async def on_raw_reaction_add(self, payload):
         await self.handle_reaction(payload, add=True)
 
     @commands.Cog.listener()
+    @timed("on_raw_reaction_remove:reaction_roles")
     async def on_raw_reaction_remove(self, payload):
         await self.handle_reaction(payload, add=False)
 
@@ -78,10 +75,12 @@ class ReactionRoles(commands.Cog):
     # ======================================================
     @app_commands.command(name="rrcreate", description="よく遊ぶゲームを選ぶリアクションメッセージを作成します")
     async def rrcreate(self, interaction: discord.Interaction):
+        guild = interaction.guild
+        if guild is None:
+            return await interaction.response.send_message("サーバー内で使ってね。", ephemeral=True)
         if not interaction.user.guild_permissions.administrator:
             return await interaction.response.send_message("⛔ 管理者のみ実行可", ephemeral=True)
 
-        guild = interaction.guild
         embed = discord.Embed(
             title="🎮 よく遊ぶゲームを選択してね",
             description="リアクションを付けると自動でロールが付きます！",
@@ -111,8 +110,9 @@ class ReactionRoles(commands.Cog):
         # ======== .env 出力（改善版） ========
         print("\n📝 以下を .env に必ず追記してください。")
         print("（他の ID がある場合はカンマ区切りで追加）\n")
+        print("（GUILD_ID 以外のサーバーでは /guild_config_set の REACTION_ROLE_MESSAGE_IDS / REACTION_ROLE_MAP に設定）\n")
 
-        all_ids = list(self.REACTION_ROLE_MESSAGE_IDS | {msg.id})
+        all_ids = list(self.config.get_ids(guild.id, "REACTION_ROLE_MESSAGE_IDS") | {msg.id})
         print("# Reaction Role 対象メッセージID")
         print(f"REACTION_ROLE_MESSAGE_IDS={','.join(str(x) for x in all_ids)}\n")
 
@@ -129,10 +129,12 @@ class ReactionRoles(commands.Cog):
     # ======================================================
     @app_commands.command(name="rrcreate_valorank", description="VALORANTランク選択用のリアクションメッセージを作成します")
     async def rrcreate_valorank(self, interaction: discord.Interaction):
+        guild = interaction.guild
+        if guild is None:
+            return await interaction.response.send_message("サーバー内で使ってね。", ephemeral=True)
         if not interaction.user.guild_permissions.administrator:
             return await interaction.response.send_message("⛔ 管理者のみ実行可", ephemeral=True)
 
-        guild = interaction.guild
         embed = discord.Embed(
             title="🎯 Valorantの現在のランクを選択してね",
             description="（ランクが変わった場合、付け直してください）",
@@ -142,17 +144,7 @@ class ReactionRoles(commands.Cog):
         msg = await interaction.channel.send(embed=embed)
         await interaction.response.send_message("✅ ランク選択メッセージを作成しました！", ephemeral=True)
 
-        rank_map = {
-            "v_iron_1": "v_Iron",
-            "v_bronze_1": "v_Bronze",
-            "v_silver_1": "v_Silver",
-            "v_gold_1": "v_Gold",
-            "v_platinum_1": "v_Platinum",
-            "v_diamond_1": "v_Diamond",
-            "v_ascendant_1": "v_Ascendant",
-            "v_immortal_1": "v_Immortal",
-            "v_radiant": "v_Radiant",
-        }
+        rank_map = VALO_RANK_MAP
 
         for emoji_name in rank_map:
             emoji = discord.utils.get(guild.emojis, name=emoji_name)
@@ -165,8 +157,9 @@ class ReactionRoles(commands.Cog):
         # ======== .env 出力（改善版） ========
         print("\n📝 以下を .env に必ず追記してください。")
         print("（他の ID がある場合はカンマ区切りで追加）\n")
+        print("（GUILD_ID 以外のサーバーでは /guild_config_set の REACTION_ROLE_MESSAGE_IDS / REACTION_ROLE_MAP に設定）\n")
 
-        all_ids = list(self.REACTION_ROLE_MESSAGE_IDS | {msg.id})
+        all_ids = list(self.config.get_ids(guild.id, "REACTION_ROLE_MESSAGE_IDS") | {msg.id})
         print("# Reaction Role 対象メッセージID")
         print(f"REACTION_ROLE_MESSAGE_IDS={','.join(str(x) for x in all_ids)}\n")
 
@@ -191,38 +184,26 @@ class ReactionRoles(commands.Cog):
     # ======================================================
     @app_commands.command(name="rrstatus", description="現在のリアクションロール設定を確認します")
     async def rrstatus(self, interaction: discord.Interaction):
-        guild = self.bot.get_guild(self.GUILD_ID)
+        guild = interaction.guild
+        if guild is None:
+            await interaction.response.send_message("サーバー内で使ってね。", ephemeral=True)
+            return
+        message_ids = self.config.get_ids(guild.id, "REACTION_ROLE_MESSAGE_IDS")
 
         embed = discord.Embed(
             title="Reaction Role Status",
-            description=f"対象メッセージID: `{','.join(str(x) for x in self.REACTION_ROLE_MESSAGE_IDS)}`",
+            description=f"対象メッセージID: `{','.join(str(x) for x in message_ids)}`",
             color=0x00BFFF
         )
 
         lines = []
-        for emoji_id, role_id in self.reaction_role_map.items():
+        for emoji_id, role_id in self.config.get_map(guild.id, "REACTION_ROLE_MAP").items():
             role = guild.get_role(role_id)
             lines.append(f"<:{emoji_id}> → {role.mention if role else '❌ Not Found'}")
 
         embed.add_field(name="カスタム絵文字 → ロール", value="\n".join(lines), inline=False)
         await interaction.response.send_message(embed=embed, ephemeral=False)
 
-    # ======================================================
-    # 起動時同期
-    # ======================================================
-    @commands.Cog.listener()
-    async def on_ready(self):
-        guild = discord.Object(id=self.GUILD_ID)
-        try:
-            self.bot.tree.add_command(self.rrcreate, guild=guild)
-            self.bot.tree.add_command(self.rrcreate_valorank, guild=guild)
-            self.bot.tree.add_command(self.rrreload, guild=guild)
-            self.bot.tree.add_command(self.rrstatus, guild=guild)
-            await self.bot.tree.sync(guild=guild)
-            print("✅ ReactionRole commands synced successfully.")
-        except Exception as e:
-            print(f"⚠️ Failed to sync ReactionRole commands: {e}")
-
 
 async def setup(bot):
     await bot.add_cog(ReactionRoles(bot))
\ No newline at end of file
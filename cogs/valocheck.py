@@ -1,12 +1,22 @@
 import os
-import json
+import time
+import heapq
+import hashlib
 import random
+import asyncio
+from collections import Counter
 from datetime import datetime, timezone
+from types import MappingProxyType
+from typing import Optional
 
 import discord
 from discord import app_commands
 from discord.ext import commands
 
+from utils import jsonio
+from utils.guild_config import get_config
+from utils.metrics import timed, track_flush
+
 
 def _get_int_env(key: str) -> int:
     v = os.getenv(key)
@@ -42,10 +52,6 @@ def _get_opt_id_env(key: str):
         return None
 
 
-def _get_opt_channel_id_env(key: str):
-    return _get_opt_id_env(key)
-
-
 def _utc_now() -> str:
     return datetime.now(timezone.utc).isoformat()
 
@@ -53,7 +59,7 @@ def _utc_now() -> str:
 def _load_json_file(path: str):
     try:
         with open(path, "r", encoding="utf-8") as f:
-            return json.load(f)
+            return jsonio.load(f)
     except Exception:
         return None
 
@@ -61,7 +67,7 @@ def _load_json_file(path: str):
 def _load_intro(path: str):
     try:
         with open(path, "r", encoding="utf-8") as f:
-            data = json.load(f)
+            data = jsonio.load(f)
         title = data.get("title")
         text = data.get("text")
         if not isinstance(title, str) or not isinstance(text, str):
@@ -106,6 +112,60 @@ def _calc_max_score(questions):
     return total
 
 
+class _CompiledQuestion:
+    __slots__ = ("text", "labels", "scores", "score_of")
+
+    def __init__(self, text: str, choices):
+        self.text = text
+        self.labels = tuple(label for label, _ in choices)
+        self.scores = tuple(int(score) for _, score in choices)
+        self.score_of = MappingProxyType(dict(zip(self.labels, self.scores)))
+
+
+class _QuestionBank:
+    """
+    読み込み時に一度だけ作る不変の質問バンク。
+    埋め込みも問題ごとに作り置きし、リロードはバンクごと差し替える。
+    """
+
+    __slots__ = ("questions", "max_score", "digest", "embeds")
+
+    def __init__(self, normalized):
+        self.questions = tuple(
+            _CompiledQuestion(q["q"], q["choices"]) for q in normalized
+        )
+        self.max_score = _calc_max_score(normalized)
+        raw = jsonio.canonical(
+            [[q.text, q.labels, q.scores] for q in self.questions]
+        )
+        self.digest = hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+        n = len(self.questions)
+        embeds = []
+        for i, q in enumerate(self.questions):
+            e = discord.Embed(
+                title=f"VALORANT ロール診断（{i + 1}/{n}）",
+                description=q.text,
+                color=0xF4A261,
+            )
+            e.set_footer(text="回答すると次の問題に進みます。")
+            embeds.append(e)
+        self.embeds = tuple(embeds)
+
+    def __len__(self) -> int:
+        return len(self.questions)
+
+    def shuffle(self) -> list[bytes]:
+        """セッション用に、問題ごとの選択肢の並び順（元のindexの順列）を作る。"""
+        return [
+            bytes(random.sample(range(len(q.labels)), len(q.labels)))
+            for q in self.questions
+        ]
+
+
+# 判定のしきい値の既定値（ギルド設定 VALO_CHECK_THRESH_* → .env → これ）
+DEFAULT_THRESH_ENJOY_ONLY = 6
+DEFAULT_THRESH_GACHI_ONLY = 12
+
 DEFAULT_INTRO_TITLE = "VALORANT ロール診断（Gachi/Enjoy）"
 DEFAULT_INTRO_TEXT = (
     "この診断は、コンペにおけるプレイスタイルのズレを減らすためのものです。\n\n"
@@ -129,100 +189,435 @@ DEFAULT_QUESTIONS = [
 ]
 
 
-class ChoiceButton(discord.ui.Button):
-    def __init__(self, label: str, score: int, row: int = 0):
-        super().__init__(label=label, style=discord.ButtonStyle.secondary, row=row)
-        self.score = int(score)
-        self.choice_label = label
-
-    async def callback(self, interaction: discord.Interaction):
-        view = self.view  # type: ignore
-        if view is None:
-            return
-        await view.disable_all(interaction)  # 連打対策
-        await view.cog.on_answer(interaction, self.score, self.choice_label)
+class _Session:
+    """
+    進行中の診断1件分。DMメッセージはIDだけ持ち、Messageオブジェクトは保持しない。
+    perms[i] は問題iのボタン順（元の選択肢index）、picks[i] は選んだ元の選択肢index。
+    """
+
+    __slots__ = (
+        "user_id",
+        "guild_id",
+        "idx",
+        "score",
+        "picks",
+        "perms",
+        "bank",
+        "invoked_by",
+        "invoked_by_name",
+        "forced",
+        "force_enjoy",
+        "channel_id",
+        "message_id",
+        "expires_at",
+        "stale",
+    )
 
+    def __init__(
+        self,
+        user_id: int,
+        bank: "_QuestionBank",
+        perms: list,
+        invoked_by=None,
+        invoked_by_name: str = "unknown",
+        forced: bool = False,
+        guild_id: int = 0,
+    ):
+        self.user_id = int(user_id)
+        self.guild_id = int(guild_id or 0)
+        self.idx = -1
+        self.score = 0
+        self.picks = bytearray()
+        self.perms = perms
+        self.bank = bank
+        self.invoked_by = invoked_by
+        self.invoked_by_name = invoked_by_name
+        self.forced = bool(forced)
+        self.force_enjoy = False
+        self.channel_id = 0
+        self.message_id = 0
+        self.expires_at = 0.0
+        # 保存後に質問が変わったセッション。bank と perms/picks が合わないので答えは引けない
+        self.stale = False
+
+    def answers(self) -> list[dict]:
+        if self.stale:
+            return []
+        out = []
+        for i, pick in enumerate(self.picks):
+            q = self.bank.questions[i]
+            out.append({"choice": q.labels[pick], "score": q.scores[pick]})
+        return out
+
+    def to_dict(self) -> dict:
+        return {
+            "user_id": self.user_id,
+            "guild_id": self.guild_id,
+            "idx": self.idx,
+            "score": self.score,
+            "picks": list(self.picks),
+            "perms": [list(p) for p in self.perms],
+            "digest": self.bank.digest,
+            "invoked_by": self.invoked_by,
+            "invoked_by_name": self.invoked_by_name,
+            "forced": self.forced,
+            "force_enjoy": self.force_enjoy,
+            "channel_id": self.channel_id,
+            "message_id": self.message_id,
+            "expires_at": self.expires_at,
+        }
 
-class QuizView(discord.ui.View):
-    def __init__(self, cog: "ValoCheckCog", user_id: int, timeout_sec: int):
-        super().__init__(timeout=timeout_sec)
-        self.cog = cog
-        self.user_id = user_id
+    @classmethod
+    def from_dict(cls, data, bank: "_QuestionBank"):
+        if not isinstance(data, dict):
+            return None
+        try:
+            perms = [bytes(p) for p in data.get("perms") or []]
+            s = cls(int(data["user_id"]), bank, perms, guild_id=int(data.get("guild_id") or 0))
+            s.idx = int(data.get("idx", -1))
+            s.score = int(data.get("score", 0))
+            s.picks = bytearray(data.get("picks") or [])
+            s.invoked_by = data.get("invoked_by")
+            s.invoked_by_name = data.get("invoked_by_name", "unknown")
+            s.forced = bool(data.get("forced"))
+            s.force_enjoy = bool(data.get("force_enjoy"))
+            s.channel_id = int(data.get("channel_id") or 0)
+            s.message_id = int(data.get("message_id") or 0)
+            s.expires_at = float(data.get("expires_at") or 0.0)
+        except (KeyError, TypeError, ValueError):
+            return None
+        if data.get("digest") != bank.digest or len(perms) != len(bank):
+            # 質問が変わった後のセッションは続けられないので即期限切れ扱い
+            s.stale = True
+            s.expires_at = 0.0
+        return s
+
+
+class _SessionTable:
+    """
+    進行中セッションの永続テーブル。
+    期限は (expires_at, user_id) のヒープで管理し、古いエントリは取り出し時に捨てる。
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._rows: dict[int, _Session] = {}
+        self._heap: list[tuple[float, int]] = []
+        self.dirty = False
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, user_id: int) -> bool:
+        return user_id in self._rows
+
+    def get(self, user_id: int):
+        return self._rows.get(user_id)
+
+    def ids(self) -> list[int]:
+        return list(self._rows.keys())
+
+    def values(self) -> list[_Session]:
+        return list(self._rows.values())
+
+    def put(self, s: _Session, ttl_sec: int) -> None:
+        self._rows[s.user_id] = s
+        self.touch(s, ttl_sec)
+
+    def touch(self, s: _Session, ttl_sec: int) -> None:
+        s.expires_at = time.time() + ttl_sec
+        heapq.heappush(self._heap, (s.expires_at, s.user_id))
+        if len(self._heap) > 2 * len(self._rows) + 64:
+            self._rebuild_heap()
+
+    def pop(self, user_id: int):
+        return self._rows.pop(user_id, None)
+
+    def pop_all(self) -> list[_Session]:
+        rows = list(self._rows.values())
+        self._rows.clear()
+        self._heap.clear()
+        return rows
+
+    def pop_expired(self, now: float) -> list[_Session]:
+        out = []
+        while self._heap and self._heap[0][0] <= now:
+            exp, uid = heapq.heappop(self._heap)
+            s = self._rows.get(uid)
+            if s is None or s.expires_at != exp:
+                continue
+            out.append(self._rows.pop(uid))
+        return out
+
+    def next_expiry(self):
+        while self._heap:
+            exp, uid = self._heap[0]
+            s = self._rows.get(uid)
+            if s is not None and s.expires_at == exp:
+                return exp
+            heapq.heappop(self._heap)
+        return None
 
-    async def interaction_check(self, interaction: discord.Interaction) -> bool:
-        if interaction.user.id != self.user_id:
-            await interaction.response.send_message(
-                "このクイズはあなた用ではありません。", ephemeral=True
-            )
+    def _rebuild_heap(self) -> None:
+        self._heap = [(s.expires_at, uid) for uid, s in self._rows.items()]
+        heapq.heapify(self._heap)
+
+    def load(self, bank: _QuestionBank) -> None:
+        self._rows.clear()
+        data = _load_json_file(self.path)
+        if not isinstance(data, list):
+            data = []
+        for item in data:
+            s = _Session.from_dict(item, bank)
+            if s is not None:
+                self._rows[s.user_id] = s
+        self._rebuild_heap()
+
+    def flush(self) -> bool:
+        """dirty のときだけ書き出す（回答のたびには書かず、Cogの定期処理とアンロード時にまとめて）。"""
+        if not self.dirty:
             return False
+        d = os.path.dirname(self.path)
+        if d:
+            os.makedirs(d, exist_ok=True)
+        tmp = self.path + ".tmp"
+        with track_flush("valo_check_sessions"):
+            with open(tmp, "w", encoding="utf-8") as f:
+                jsonio.dump([s.to_dict() for s in self._rows.values()], f, indent=False)
+            os.replace(tmp, self.path)
+        self.dirty = False
         return True
 
-    async def on_timeout(self) -> None:
-        await self.cog.expire_session(self.user_id, origin="QuizView.on_timeout")
-
-    def set_buttons(self, choices):
-        self.clear_items()
-        for idx, (label, score) in enumerate(choices):
-            self.add_item(ChoiceButton(label=label, score=score, row=idx // 2))
 
-    async def disable_all(self, interaction: discord.Interaction):
-        for item in self.children:
-            if isinstance(item, discord.ui.Button):
-                item.disabled = True
+class _CompletionJournal:
+    """
+    診断完了記録の追記専用ジャーナル（JSONL）。
+    1行 = {"uid": "<user_id>", "rec": {...}}。同じuidは後の行が優先。
+    """
+
+    def __init__(self, path: str, legacy_path: str = ""):
+        self.path = path
+        self.legacy_path = legacy_path
+        self._lines = 0
+        # 旧形式から読んだがジャーナルへの書き出しがまだ（失敗した）。次の書き込みで全件を書く
+        self.needs_migration = False
+
+    def load(self) -> dict[str, dict]:
+        index: dict[str, dict] = {}
+        self._lines = 0
+        if not os.path.exists(self.path):
+            legacy = _load_json_file(self.legacy_path) if self.legacy_path else None
+            if isinstance(legacy, dict):
+                index = {str(k): v for k, v in legacy.items() if isinstance(v, dict)}
+                try:
+                    self.compact(index)
+                except OSError as e:
+                    # 旧形式のファイルはそのまま。ジャーナルが無いまま追記すると履歴が消えるので印を付ける
+                    self.needs_migration = True
+                    print(f"⚠️ VALO check journal migration failed ({len(index)} records kept in memory): {e}")
+            return index
         try:
-            await interaction.response.edit_message(view=self)
-        except Exception:
-            try:
-                await interaction.edit_original_response(view=self)
-            except Exception:
-                pass
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    self._lines += 1
+                    try:
+                        row = jsonio.loads(line)
+                    except ValueError:
+                        continue  # 書き込み途中で落ちた行
+                    if isinstance(row, dict) and isinstance(row.get("rec"), dict):
+                        index[str(row.get("uid"))] = row["rec"]
+        except OSError:
+            pass
+        return index
+
+    def append(self, uid: str, rec: dict) -> None:
+        d = os.path.dirname(self.path)
+        if d:
+            os.makedirs(d, exist_ok=True)
+        line = jsonio.dumps({"uid": uid, "rec": rec})
+        with track_flush("valo_check_journal"):
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+        self._lines += 1
+
+    def needs_compaction(self, live: int) -> bool:
+        return self._lines > 2 * live + 64
+
+    def compact(self, index: dict[str, dict]) -> None:
+        """index 全件でジャーナルを書き直す。成功したら旧形式からの移行も済んだことになる。"""
+        d = os.path.dirname(self.path)
+        if d:
+            os.makedirs(d, exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            for uid, rec in index.items():
+                f.write(jsonio.dumps({"uid": uid, "rec": rec}))
+                f.write("\n")
+        os.replace(tmp, self.path)
+        self._lines = len(index)
+        self.needs_migration = False
+
+
+class _RoleJobReport:
+    __slots__ = (
+        "total",
+        "changed",
+        "unchanged",
+        "missing",
+        "forbidden",
+        "failed",
+        "retries",
+        "elapsed",
+    )
+
+    def __init__(self, total: int = 0):
+        self.total = total
+        self.changed = 0
+        self.unchanged = 0
+        self.missing = 0
+        self.forbidden = 0
+        self.failed = 0
+        self.retries = 0
+        self.elapsed = 0.0
+
+    def format(self) -> str:
+        return (
+            f"対象: **{self.total}**\n"
+            f"✅ 変更: **{self.changed}**\n"
+            f"⏭️ 変更なし: **{self.unchanged}**\n"
+            f"👻 不在: **{self.missing}**\n"
+            f"⛔ 権限不足: **{self.forbidden}**\n"
+            f"❌ 失敗: **{self.failed}**（リトライ {self.retries} 回）\n"
+            f"⏱ {self.elapsed:.1f}秒"
+        )
 
 
-class StartView(discord.ui.View):
-    def __init__(self, cog: "ValoCheckCog", user_id: int, timeout_sec: int):
-        super().__init__(timeout=timeout_sec)
-        self.cog = cog
+def _valo_cog(interaction: discord.Interaction) -> Optional["ValoCheckCog"]:
+    cog = interaction.client.get_cog("ValoCheckCog")
+    return cog if isinstance(cog, ValoCheckCog) else None
+
+
+async def _check_owner(interaction: discord.Interaction, user_id: int, text: str) -> bool:
+    if interaction.user.id != user_id:
+        await interaction.response.send_message(text, ephemeral=True)
+        return False
+    return True
+
+
+# ボタンは custom_id（対象ユーザー・問題番号・位置）から状態を引く DynamicItem。
+# メッセージごとの View を ViewStore に登録しないので、診断の数だけ View が溜まることはない。
+class ChoiceButton(
+    discord.ui.DynamicItem[discord.ui.Button],
+    template=r"valo_check:(?P<uid>\d+):(?P<idx>\d+):(?P<pos>\d+)",
+):
+    def __init__(self, user_id: int, idx: int, pos: int, label: str = "?",
+                 row: int = 0, disabled: bool = False):
+        super().__init__(
+            discord.ui.Button(
+                label=label,
+                style=discord.ButtonStyle.secondary,
+                custom_id=f"valo_check:{user_id}:{idx}:{pos}",
+                row=row,
+                disabled=disabled,
+            )
+        )
         self.user_id = user_id
+        self.idx = idx
+        self.pos = pos
+
+    @classmethod
+    async def from_custom_id(cls, interaction, item, match):
+        return cls(int(match["uid"]), int(match["idx"]), int(match["pos"]), item.label or "?")
 
     async def interaction_check(self, interaction: discord.Interaction) -> bool:
-        if interaction.user.id != self.user_id:
-            await interaction.response.send_message(
-                "この操作はあなた用ではありません。", ephemeral=True
+        return await _check_owner(interaction, self.user_id, "このクイズはあなた用ではありません。")
+
+    @timed("valo_check:answer")
+    async def callback(self, interaction: discord.Interaction):
+        cog = _valo_cog(interaction)
+        if cog is None:
+            return
+        await cog.disable_buttons(interaction)  # 連打対策
+        await cog.on_answer(interaction, self.idx, self.pos)
+
+
+class StartButton(
+    discord.ui.DynamicItem[discord.ui.Button],
+    template=r"valo_check:(?P<uid>\d+):start",
+):
+    def __init__(self, user_id: int, disabled: bool = False):
+        super().__init__(
+            discord.ui.Button(
+                label="開始",
+                style=discord.ButtonStyle.primary,
+                custom_id=f"valo_check:{user_id}:start",
+                disabled=disabled,
             )
-            return False
-        return True
+        )
+        self.user_id = user_id
+
+    @classmethod
+    async def from_custom_id(cls, interaction, item, match):
+        return cls(int(match["uid"]))
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        return await _check_owner(interaction, self.user_id, "この操作はあなた用ではありません。")
+
+    @timed("valo_check:start")
+    async def callback(self, interaction: discord.Interaction):
+        cog = _valo_cog(interaction)
+        if cog is None:
+            return
+        await interaction.response.edit_message(view=_start_view(self.user_id, disabled=True))
+        await cog.start_questions(interaction.user)
+
+
+def _start_view(user_id: int, disabled: bool = False) -> discord.ui.View:
+    view = discord.ui.View(timeout=None)
+    view.add_item(StartButton(user_id, disabled))
+    return view
 
-    async def on_timeout(self) -> None:
-        await self.cog.expire_session(self.user_id, origin="StartView.on_timeout")
 
-    @discord.ui.button(label="開始", style=discord.ButtonStyle.primary)
-    async def start(self, interaction: discord.Interaction, _btn: discord.ui.Button):
-        for item in self.children:
-            if isinstance(item, discord.ui.Button):
-                item.disabled = True
-        await interaction.response.edit_message(view=self)
-        await self.cog.start_questions(interaction.user)
+def _quiz_view(user_id: int, idx: int, labels, disabled: bool = False) -> discord.ui.View:
+    view = discord.ui.View(timeout=None)
+    for i, label in enumerate(labels):
+        view.add_item(ChoiceButton(user_id, idx, i, label, row=i // 2, disabled=disabled))
+    return view
 
 
 class ValoCheckCog(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
 
+        # 診断を送ったサーバーごとに ROLE_ENJOY_ID / ROLE_GACHI_ID / VALO_ROLE_LOG_CHANNEL_ID を引く
+        # （guild_id の無い古い記録・セッションは GUILD_ID のサーバー扱い）
         self.guild_id = _get_int_env("GUILD_ID")
-        self.role_enjoy_id = _get_int_env("ROLE_ENJOY_ID")
-        self.role_gachi_id = _get_int_env("ROLE_GACHI_ID")
+        self.config = get_config()
 
-        self.log_channel_id = _get_opt_channel_id_env("VALO_ROLE_LOG_CHANNEL_ID")
         self.admin_dm_user_id = _get_opt_id_env("DM_FORWARD_USER_ID")
         self.view_timeout_sec = _get_opt_int_env("VALO_CHECK_VIEW_TIMEOUT_SEC", 1800)
+        # セッションの書き出し間隔（回答のたびには書かない）
+        self.flush_sec = max(1, _get_opt_int_env("VALO_CHECK_FLUSH_SEC", 5))
+        self.role_job_concurrency = max(
+            1, _get_opt_int_env("VALO_CHECK_ROLE_JOB_CONCURRENCY", 4)
+        )
 
         self.data_path = _get_str_env(
             "VALO_CHECK_DATA_PATH", "data/valo_check_completed.json"
         )
+        self.journal_path = _get_str_env(
+            "VALO_CHECK_JOURNAL_PATH", "data/valo_check_completed.jsonl"
+        )
         self.questions_path = _get_str_env(
             "VALO_CHECK_QUESTIONS_PATH", "data/valo_questions.json"
         )
         self.intro_path = _get_str_env("VALO_CHECK_INTRO_PATH", "data/valo_intro.json")
+        self.sessions_path = _get_str_env(
+            "VALO_CHECK_SESSIONS_PATH", "data/valo_check_sessions.json"
+        )
 
         intro = _load_intro(self.intro_path)
         if intro is None:
@@ -231,76 +626,338 @@ class ValoCheckCog(commands.Cog):
         else:
             self.intro_title, self.intro_text = intro
 
-        self.thresh_enjoy_only = _get_opt_int_env("VALO_CHECK_THRESH_ENJOY_ONLY", 6)
-        self.thresh_gachi_only = _get_opt_int_env("VALO_CHECK_THRESH_GACHI_ONLY", 12)
-
         self.label_enjoy = _get_str_env("VALO_CHECK_LABEL_ENJOY", "ENJOYのみ")
         self.label_gachi = _get_str_env("VALO_CHECK_LABEL_GACHI", "GACHIのみ")
         self.label_both = _get_str_env("VALO_CHECK_LABEL_BOTH", "GACHI+ENJOY")
 
-        self.questions = []
-        self.max_score = 0
+        self.bank = _QuestionBank(DEFAULT_QUESTIONS)
         self._reload_questions(use_default=True)
 
-        self.sessions: dict[int, dict] = {}
+        self.sessions = _SessionTable(self.sessions_path)
+        self.sessions.load(self.bank)
+        self._expiry_task = None
+
+        # completed はジャーナルから復元した「ユーザーごとの最新結果」インデックス
+        self.journal = _CompletionJournal(self.journal_path, self.data_path)
         self.completed: dict[str, dict] = {}
+        # completed が変わるたびに増える。集計キャッシュの無効化に使う
+        self.completed_version = 0
         self._load_completed()
 
+    async def cog_load(self) -> None:
+        # ボタンは custom_id から引くので、再起動前のセッションにViewを付け直す必要はない
+        self.bot.add_dynamic_items(StartButton, ChoiceButton)
+        if self._expiry_task is None:
+            self._expiry_task = asyncio.create_task(self._expiry_loop())
+
+    async def cog_unload(self) -> None:
+        if self._expiry_task is not None:
+            self._expiry_task.cancel()
+            self._expiry_task = None
+        self.bot.remove_dynamic_items(StartButton, ChoiceButton)
+        self.sessions.flush()
+
+    async def _expiry_loop(self) -> None:
+        await self.bot.wait_until_ready()
+        while not self.bot.is_closed():
+            expired = self.sessions.pop_expired(time.time())
+            if expired:
+                self.sessions.dirty = True
+            try:
+                self.sessions.flush()
+            except OSError as e:
+                print(f"⚠️ VALO check sessions flush failed: {e}")
+            # 1件の失敗で残りの期限切れを取りこぼさないよう、セッションごとに囲う
+            for s in expired:
+                try:
+                    await self._expire(s, origin="stale" if s.stale else "ttl")
+                except Exception as e:
+                    print(f"⚠️ VALO check expire failed for {s.user_id}: {e!r}")
+            try:
+                if self.journal.needs_migration or self.journal.needs_compaction(len(self.completed)):
+                    self.journal.compact(self.completed)
+            except OSError as e:
+                print(f"⚠️ VALO check journal compaction failed: {e}")
+            nxt = self.sessions.next_expiry()
+            delay = float(self.flush_sec)
+            if nxt is not None:
+                delay = min(delay, max(1.0, nxt - time.time()))
+            await asyncio.sleep(delay)
+
+    @property
+    def max_score(self) -> int:
+        return self.bank.max_score
+
+    def _view_for(self, s: _Session, disabled: bool = False) -> discord.ui.View:
+        if s.idx < 0 or s.idx >= len(s.bank):
+            return _start_view(s.user_id, disabled)
+        labels = s.bank.questions[s.idx].labels
+        return _quiz_view(s.user_id, s.idx, [labels[j] for j in s.perms[s.idx]], disabled)
+
+    async def disable_buttons(self, interaction: discord.Interaction) -> None:
+        s = self.sessions.get(interaction.user.id)
+        if s is None or s.stale:
+            await interaction.response.defer()
+            return
+        try:
+            await interaction.response.edit_message(view=self._view_for(s, disabled=True))
+        except discord.HTTPException:
+            if not interaction.response.is_done():
+                await interaction.response.defer()
+
+    def _dm_message(self, s: _Session):
+        if not s.channel_id or not s.message_id:
+            return None
+        ch = self.bot.get_partial_messageable(
+            s.channel_id, type=discord.ChannelType.private
+        )
+        return ch.get_partial_message(s.message_id)
+
     def _reload_questions(self, use_default: bool = False) -> bool:
         raw = _load_json_file(self.questions_path)
         norm = _normalize_questions(raw)
         if norm is None and use_default:
-            self.questions = DEFAULT_QUESTIONS
-            self.max_score = _calc_max_score(self.questions)
+            self.bank = _QuestionBank(DEFAULT_QUESTIONS)
             return True
         if norm is None:
             return False
-        self.questions = norm
-        self.max_score = _calc_max_score(self.questions)
+        # 進行中のセッションは自分のバンクを参照し続けるので、差し替えるだけでよい
+        self.bank = _QuestionBank(norm)
         return True
 
     def _load_completed(self):
         try:
-            with open(self.data_path, "r", encoding="utf-8") as f:
-                self.completed = json.load(f)
-        except Exception:
+            self.completed = self.journal.load()
+        except Exception as e:
+            print(f"⚠️ VALO check completions could not be loaded: {e!r}")
             self.completed = {}
+        self.completed_version += 1
+        if self.journal.needs_compaction(len(self.completed)):
+            try:
+                self.journal.compact(self.completed)
+            except OSError as e:
+                print(f"⚠️ VALO check journal compaction failed: {e}")
+
+    def _record_completed(self, uid: str, rec: dict):
+        self.completed[uid] = rec
+        self.completed_version += 1
+        if self.journal.needs_migration:
+            # 移行が済んでいないので、追記ではなく旧形式の分も含めて全件を書く
+            self.journal.compact(self.completed)
+        else:
+            self.journal.append(uid, rec)
 
-    def _save_completed(self):
-        os.makedirs(os.path.dirname(self.data_path), exist_ok=True)
-        tmp = self.data_path + ".tmp"
-        with open(tmp, "w", encoding="utf-8") as f:
-            json.dump(self.completed, f, ensure_ascii=False, indent=2)
-        os.replace(tmp, self.data_path)
+    def _thresholds(self, guild_id: int) -> tuple[int, int]:
+        """(ENJOYのみ の上限, GACHIのみ の下限)。サーバーごとの設定。"""
+        return (
+            self.config.get_int(guild_id, "VALO_CHECK_THRESH_ENJOY_ONLY", DEFAULT_THRESH_ENJOY_ONLY),
+            self.config.get_int(guild_id, "VALO_CHECK_THRESH_GACHI_ONLY", DEFAULT_THRESH_GACHI_ONLY),
+        )
 
-    def _calc_roles(self, score: int) -> tuple[bool, bool, str]:
-        if score >= self.thresh_gachi_only:
+    def _calc_roles(self, score: int, guild_id: int) -> tuple[bool, bool, str]:
+        thresh_enjoy, thresh_gachi = self._thresholds(guild_id)
+        if score >= thresh_gachi:
             return True, False, self.label_gachi
-        if score <= self.thresh_enjoy_only:
+        if score <= thresh_enjoy:
             return False, True, self.label_enjoy
         return True, True, self.label_both
 
+    def _calc_label(
+        self, score: int, force_enjoy: bool, thresh_enjoy: int, thresh_gachi: int
+    ) -> str:
+        if force_enjoy:
+            return self.label_enjoy
+        if score >= thresh_gachi:
+            return self.label_gachi
+        if score <= thresh_enjoy:
+            return self.label_enjoy
+        return self.label_both
+
+    def _rescore_all(self, overrides: Optional[dict[int, tuple[int, int]]] = None):
+        """
+        保存済みの回答を現在の質問バンク/しきい値で採点し直す。
+        しきい値は記録のサーバーごとの設定（overrides: guild_id -> (enjoy, gachi) で上書き）。
+        回答テキストは質問ごとの {選択肢: 点数} 表で引く（見つからなければ保存時の点数）。
+        戻り値: (変更レコード dict[uid, rec], ラベル遷移 Counter, 未一致回答数)
+        """
+        lookups = [q.score_of for q in self.bank.questions]
+        qlen = len(lookups)
+        last_two = {qlen - 2, qlen - 1} if qlen >= 2 else set()
+
+        updated: dict[str, dict] = {}
+        transitions: Counter = Counter()
+        unmatched = 0
+        thresholds = dict(overrides or {})
+        for uid, rec in self.completed.items():
+            if not isinstance(rec, dict):
+                continue
+            answers = rec.get("answers")
+            if not isinstance(answers, list):
+                continue
+            score = 0
+            force_enjoy = False
+            for i, a in enumerate(answers):
+                if not isinstance(a, dict):
+                    continue
+                pts = None
+                if i < qlen:
+                    pts = lookups[i].get(str(a.get("choice", "")))
+                if pts is None:
+                    unmatched += 1
+                    pts = int(a.get("score", 0))
+                if i in last_two and pts == 0:
+                    force_enjoy = True
+                score += pts
+
+            old_label = str(rec.get("result", ""))
+            gid = self._rec_guild_id(rec)
+            if gid not in thresholds:
+                thresholds[gid] = self._thresholds(gid)
+            new_label = self._calc_label(score, force_enjoy, *thresholds[gid])
+            if old_label != new_label:
+                transitions[(old_label, new_label)] += 1
+            if (
+                old_label != new_label
+                or int(rec.get("score", 0)) != score
+                or bool(rec.get("force_enjoy")) != force_enjoy
+            ):
+                new_rec = dict(rec)
+                new_rec["score"] = score
+                new_rec["max_score"] = self.max_score
+                new_rec["result"] = new_label
+                new_rec["force_enjoy"] = force_enjoy
+                new_rec["rescored_at"] = _utc_now()
+                updated[uid] = new_rec
+        return updated, transitions, unmatched
+
+    def _roles_for_label(self, label: str):
+        if label == self.label_gachi:
+            return True, False
+        if label == self.label_enjoy:
+            return False, True
+        if label == self.label_both:
+            return True, True
+        return None
+
+    def _valo_roles(self, guild: discord.Guild):
+        role_enjoy = guild.get_role(self.config.get_int(guild.id, "ROLE_ENJOY_ID"))
+        role_gachi = guild.get_role(self.config.get_int(guild.id, "ROLE_GACHI_ID"))
+        return role_enjoy, role_gachi
+
+    def _rec_guild_id(self, rec: dict) -> int:
+        return int(rec.get("guild_id") or self.guild_id)
+
+    def _target_roles(
+        self,
+        member: discord.Member,
+        role_enjoy: discord.Role,
+        role_gachi: discord.Role,
+        is_enjoy: bool,
+        is_gachi: bool,
+    ):
+        """ENJOY/GACHI以外のロールはそのままに、付けるべきロール一式を返す。変更不要ならNone。"""
+        keep = [
+            r
+            for r in member.roles
+            if not r.is_default() and r.id not in (role_enjoy.id, role_gachi.id)
+        ]
+        if is_enjoy:
+            keep.append(role_enjoy)
+        if is_gachi:
+            keep.append(role_gachi)
+        current = {r.id for r in member.roles if not r.is_default()}
+        if {r.id for r in keep} == current:
+            return None
+        return keep
+
+    async def _set_valo_roles(
+        self,
+        member: discord.Member,
+        role_enjoy: discord.Role,
+        role_gachi: discord.Role,
+        is_enjoy: bool,
+        is_gachi: bool,
+        reason: str,
+    ) -> bool:
+        # member は直前に取ったもの（このCogはメンバーをキャッシュしない）なので、ロール一覧は新しい。
+        # 付け外しを別々に投げず、最終的なロール一式を1回の member.edit で送る
+        roles = self._target_roles(member, role_enjoy, role_gachi, is_enjoy, is_gachi)
+        if roles is None:
+            return False
+        await member.edit(roles=roles, reason=reason)
+        return True
+
+    async def _apply_role_job(
+        self,
+        guild: discord.Guild,
+        targets: dict[int, tuple[bool, bool]],
+        reason: str,
+    ) -> _RoleJobReport:
+        """
+        targets: user_id -> (is_gachi, is_enjoy)
+        メンバーごとに member.edit(roles=...) を1回だけ投げる。同時実行数は絞り、
+        429/5xx は指数バックオフでリトライする。
+        """
+        report = _RoleJobReport(len(targets))
+        started = time.monotonic()
+        role_enjoy, role_gachi = self._valo_roles(guild)
+        if role_enjoy is None or role_gachi is None:
+            report.failed = len(targets)
+            return report
+
+        sem = asyncio.Semaphore(self.role_job_concurrency)
+
+        async def _one(uid: int, want: tuple[bool, bool]):
+            is_gachi, is_enjoy = want
+            async with sem:
+                member = guild.get_member(uid)
+                if member is None:
+                    try:
+                        member = await guild.fetch_member(uid)
+                    except discord.NotFound:
+                        report.missing += 1
+                        return
+                    except discord.HTTPException:
+                        report.failed += 1
+                        return
+                for attempt in range(4):
+                    try:
+                        changed = await self._set_valo_roles(
+                            member, role_enjoy, role_gachi, is_enjoy, is_gachi, reason
+                        )
+                    except discord.Forbidden:
+                        report.forbidden += 1
+                        return
+                    except discord.HTTPException as e:
+                        if e.status == 429 or e.status >= 500:
+                            report.retries += 1
+                            await asyncio.sleep(1.0 * (2**attempt))
+                            continue
+                        report.failed += 1
+                        return
+                    if changed:
+                        report.changed += 1
+                    else:
+                        report.unchanged += 1
+                    return
+                report.failed += 1
+
+        await asyncio.gather(*(_one(uid, want) for uid, want in targets.items()))
+        report.elapsed = time.monotonic() - started
+        return report
+
     async def _get_log_channel(self, guild: discord.Guild):
-        if not self.log_channel_id:
+        channel_id = self.config.get_int(guild.id, "VALO_ROLE_LOG_CHANNEL_ID")
+        if not channel_id:
             return None
-        ch = guild.get_channel(self.log_channel_id)
+        ch = guild.get_channel(channel_id)
         if ch is not None:
             return ch
         try:
-            return await guild.fetch_channel(self.log_channel_id)
+            return await guild.fetch_channel(channel_id)
         except Exception:
             return None
 
-    def _make_embed(self, idx: int) -> discord.Embed:
-        q = self.questions[idx]
-        e = discord.Embed(
-            title=f"VALORANT ロール診断（{idx + 1}/{len(self.questions)}）",
-            description=q["q"],
-            color=0xF4A261,
-        )
-        e.set_footer(text="回答すると次の問題に進みます。")
-        return e
-
     def _build_summary_line(self, answers) -> str:
         parts = []
         for i, a in enumerate(answers or []):
@@ -340,12 +997,14 @@ class ValoCheckCog(commands.Cog):
         except Exception:
             pass
 
-    async def _notify_admin_session(self, title: str, user_id: int, s: dict, origin: str):
-        idx = int(s.get("idx", -1))
-        score = int(s.get("score", 0))
-        invoked_by = s.get("invoked_by_name", "unknown")
-        invoked_by_id = s.get("invoked_by")
-        answers = s.get("answers", [])
+    async def _notify_admin_session(
+        self, title: str, user_id: int, s: _Session, origin: str
+    ):
+        idx = s.idx
+        score = s.score
+        invoked_by = s.invoked_by_name
+        invoked_by_id = s.invoked_by
+        answers = s.answers()
         summary = self._build_summary_line(answers)
         recent = self._build_recent_answers(answers, 3)
 
@@ -358,17 +1017,20 @@ class ValoCheckCog(commands.Cog):
             body += f" (`{invoked_by_id}`)"
         body += (
             "\n"
-            f"Session: idx={idx} score={score}/{self.max_score}\n"
+            f"Session: idx={idx} score={score}/{s.bank.max_score}\n"
             f"Summary: {summary}\n"
             f"Recent:\n{recent}\n"
         )
         await self._notify_admin(title, body)
 
     async def expire_session(self, user_id: int, origin: str = "expire_session"):
-        s = self.sessions.pop(user_id, None)
-        if not isinstance(s, dict):
+        s = self.sessions.pop(user_id)
+        if s is None:
             return
+        self.sessions.dirty = True
+        await self._expire(s, origin)
 
+    async def _expire(self, s: _Session, origin: str):
         expired = discord.Embed(
             title="VALORANT ロール診断",
             description=(
@@ -377,28 +1039,20 @@ class ValoCheckCog(commands.Cog):
             ),
             color=0xE76F51,
         )
-        msg = s.get("dm_message")
+        msg = self._dm_message(s)
         try:
-            if isinstance(msg, discord.Message):
+            if msg is not None:
                 await msg.edit(embed=expired, view=None)
         except Exception:
             pass
 
         await self._notify_admin_session(
             "⏰ VALO診断: セッション期限切れ",
-            user_id,
+            s.user_id,
             s,
             origin,
         )
 
-    def _shuffle_questions_for_session(self):
-        qs = []
-        for q in self.questions:
-            choices = list(q["choices"])
-            random.shuffle(choices)
-            qs.append({"q": q["q"], "choices": choices})
-        return qs
-
     async def _send_intro(self, user: discord.User):
         embed = discord.Embed(
             title=self.intro_title,
@@ -409,9 +1063,12 @@ class ValoCheckCog(commands.Cog):
             embed.set_thumbnail(url=self.bot.user.avatar.url)
         embed.set_footer(text="灯麗会 Discord サーバー｜VALORANT ロール診断 🐶")
 
-        view = StartView(self, user.id, self.view_timeout_sec)
-        msg = await user.send(embed=embed, view=view)
-        self.sessions[user.id]["dm_message"] = msg
+        msg = await user.send(embed=embed, view=_start_view(user.id))
+        s = self.sessions.get(user.id)
+        if s is not None:
+            s.channel_id = msg.channel.id
+            s.message_id = msg.id
+            self.sessions.dirty = True
 
     async def start_questions(self, user: discord.User):
         s = self.sessions.get(user.id)
@@ -421,7 +1078,12 @@ class ValoCheckCog(commands.Cog):
                 f"Target: <@{user.id}> (`{user.id}`)\nOrigin: `start_questions`",
             )
             return
-        s["idx"] = 0
+        if s.stale:
+            await self.expire_session(user.id, origin="stale")
+            return
+        s.idx = 0
+        self.sessions.touch(s, self.view_timeout_sec)
+        self.sessions.dirty = True
         await self._send_question(user, 0)
 
     async def _send_question(self, user: discord.User, idx: int):
@@ -433,8 +1095,7 @@ class ValoCheckCog(commands.Cog):
             )
             return
 
-        sess_qs = s.get("questions")
-        if not isinstance(sess_qs, list) or len(sess_qs) == 0:
+        if len(s.bank) == 0:
             await self._notify_admin_session(
                 "⚠️ VALO診断: セッション質問が無い",
                 user.id,
@@ -443,7 +1104,7 @@ class ValoCheckCog(commands.Cog):
             )
             return
 
-        if idx < 0 or idx >= len(sess_qs):
+        if idx < 0 or idx >= len(s.bank):
             await self._notify_admin_session(
                 "⚠️ VALO診断: idx範囲外",
                 user.id,
@@ -452,36 +1113,41 @@ class ValoCheckCog(commands.Cog):
             )
             return
 
-        view = QuizView(self, user.id, self.view_timeout_sec)
-        view.set_buttons(sess_qs[idx]["choices"])
-        embed = discord.Embed(
-            title=f"VALORANT ロール診断（{idx + 1}/{len(sess_qs)}）",
-            description=sess_qs[idx]["q"],
-            color=0xF4A261,
-        )
-        embed.set_footer(text="回答すると次の問題に進みます。")
+        view = self._view_for(s)
+        embed = s.bank.embeds[idx]
 
-        msg: discord.Message = s["dm_message"]
+        msg = self._dm_message(s)
+        if msg is None:
+            await self._notify_admin_session(
+                "⚠️ VALO診断: DMメッセージ不明",
+                user.id,
+                s,
+                origin=f"_send_question idx={idx}",
+            )
+            return
         await msg.edit(embed=embed, view=view)
 
+    def _cancelled_embed(self, reason: str) -> discord.Embed:
+        return discord.Embed(
+            title="VALORANT ロール診断 中断",
+            description=(
+                "この診断は管理者によって中断されました。\n"
+                "判定・ロール付与は行われません。\n\n"
+                f"理由: {reason}"
+            ),
+            color=0xE76F51,
+        )
+
     async def _cancel_session(self, uid: int, reason: str, invoker: discord.abc.User):
-        s = self.sessions.pop(uid, None)
-        if not s:
+        s = self.sessions.pop(uid)
+        if s is None:
             return False
+        self.sessions.dirty = True
 
-        msg = s.get("dm_message")
-        if isinstance(msg, discord.Message):
-            e = discord.Embed(
-                title="VALORANT ロール診断 中断",
-                description=(
-                    "この診断は管理者によって中断されました。\n"
-                    "判定・ロール付与は行われません。\n\n"
-                    f"理由: {reason}"
-                ),
-                color=0xE76F51,
-            )
+        msg = self._dm_message(s)
+        if msg is not None:
             try:
-                await msg.edit(embed=e, view=None)
+                await msg.edit(embed=self._cancelled_embed(reason), view=None)
             except Exception:
                 pass
 
@@ -493,9 +1159,7 @@ class ValoCheckCog(commands.Cog):
         )
         return True
 
-    async def on_answer(
-        self, interaction: discord.Interaction, add_score: int, choice_label: str
-    ):
+    async def on_answer(self, interaction: discord.Interaction, idx: int, pos: int):
         uid = interaction.user.id
         s = self.sessions.get(uid)
         if not s:
@@ -505,38 +1169,59 @@ class ValoCheckCog(commands.Cog):
             )
             await self._notify_admin(
                 "⚠️ VALO診断: on_answerでセッション無し",
-                f"Target: <@{uid}> (`{uid}`)\nChoice: {choice_label} ({add_score}点)",
+                f"Target: <@{uid}> (`{uid}`)\nButton: {pos}",
             )
             return
 
-        sess_qs = s.get("questions", [])
-        qlen = len(sess_qs) if isinstance(sess_qs, list) else 0
+        if s.stale:
+            await self.expire_session(uid, origin="stale")
+            return
+
+        qlen = len(s.bank)
 
-        current_idx = int(s.get("idx", 0))
+        current_idx = s.idx
         if current_idx < 0:
             current_idx = 0
+        if idx != current_idx:
+            # 表示が古い（編集に失敗した等）。今の問題を出し直す
+            await self._send_question(interaction.user, current_idx)
+            return
+        if current_idx >= qlen or pos >= len(s.perms[current_idx]):
+            await self._notify_admin_session(
+                "⚠️ VALO診断: 回答位置が不正",
+                uid,
+                s,
+                origin=f"on_answer pos={pos}",
+            )
+            return
+
+        pick = s.perms[current_idx][pos]
+        add_score = s.bank.questions[current_idx].scores[pick]
 
         last_two = {qlen - 2, qlen - 1} if qlen >= 2 else set()
-        if current_idx in last_two and int(add_score) == 0:
-            s["force_enjoy"] = True
+        if current_idx in last_two and add_score == 0:
+            s.force_enjoy = True
 
-        s["score"] = int(s.get("score", 0)) + int(add_score)
-        s.setdefault("answers", [])
-        s["answers"].append({"choice": choice_label, "score": int(add_score)})
-        s["idx"] = current_idx + 1
+        s.score += add_score
+        s.picks.append(pick)
+        s.idx = current_idx + 1
 
-        if s["idx"] >= qlen:
+        if s.idx >= qlen:
+            self.sessions.pop(uid)
+            self.sessions.dirty = True
             await self._finalize(interaction.user, s)
-            self.sessions.pop(uid, None)
             return
 
-        await self._send_question(interaction.user, s["idx"])
+        self.sessions.touch(s, self.view_timeout_sec)
+        self.sessions.dirty = True
+        await self._send_question(interaction.user, s.idx)
 
-    async def _finalize(self, user: discord.User, s: dict):
-        guild = self.bot.get_guild(self.guild_id)
+    async def _finalize(self, user: discord.User, s: _Session):
+        guild_id = s.guild_id or self.guild_id
+        guild = self.bot.get_guild(guild_id)
         if guild is None:
             try:
-                guild = await self.bot.fetch_guild(self.guild_id)
+                guild = await self.bot.fetch_guild(guild_id)
             except Exception:
                 guild = None
         if guild is None:
@@ -561,8 +1246,7 @@ class ValoCheckCog(commands.Cog):
             )
             return
 
-        role_enjoy = guild.get_role(self.role_enjoy_id)
-        role_gachi = guild.get_role(self.role_gachi_id)
+        role_enjoy, role_gachi = self._valo_roles(guild)
         if role_enjoy is None or role_gachi is None:
             await self._notify_admin_session(
                 "❌ VALO診断: ロールID不正",
@@ -576,29 +1260,21 @@ class ValoCheckCog(commands.Cog):
                 pass
             return
 
-        score = int(s.get("score", 0))
-        if s.get("force_enjoy"):
+        score = s.score
+        if s.force_enjoy:
             is_gachi, is_enjoy, label = False, True, self.label_enjoy
         else:
-            is_gachi, is_enjoy, label = self._calc_roles(score)
-
-        remove_roles = []
-        if role_enjoy in member.roles:
-            remove_roles.append(role_enjoy)
-        if role_gachi in member.roles:
-            remove_roles.append(role_gachi)
-
-        add_roles = []
-        if is_enjoy:
-            add_roles.append(role_enjoy)
-        if is_gachi:
-            add_roles.append(role_gachi)
+            is_gachi, is_enjoy, label = self._calc_roles(score, guild.id)
 
         try:
-            if remove_roles:
-                await member.remove_roles(*remove_roles, reason="VALO role check reset")
-            if add_roles:
-                await member.add_roles(*add_roles, reason="VALO role check result")
+            await self._set_valo_roles(
+                member,
+                role_enjoy,
+                role_gachi,
+                is_enjoy,
+                is_gachi,
+                reason="VALO role check result",
+            )
         except discord.Forbidden:
             await self._notify_admin_session(
                 "❌ VALO診断: ロール付与権限不足",
@@ -628,12 +1304,12 @@ class ValoCheckCog(commands.Cog):
 
         e = discord.Embed(
             title="VALORANT ロール診断 完了 🐶",
-            description=(f"✅ 判定：**{label}**\n" f"スコア：**{score}/{self.max_score}**"),
+            description=(f"✅ 判定：**{label}**\n" f"スコア：**{score}/{s.bank.max_score}**"),
             color=0xF4A261,
         )
 
-        msg = s.get("dm_message")
-        if isinstance(msg, discord.Message):
+        msg = self._dm_message(s)
+        if msg is not None:
             try:
                 await msg.edit(embed=e, view=None)
             except Exception:
@@ -648,18 +1324,19 @@ class ValoCheckCog(commands.Cog):
                 pass
 
         uid = str(member.id)
-        self.completed[uid] = {
+        rec = {
             "completed_at": _utc_now(),
+            "guild_id": guild.id,
             "score": score,
-            "max_score": self.max_score,
+            "max_score": s.bank.max_score,
             "result": label,
-            "answers": s.get("answers", []),
-            "invoked_by": s.get("invoked_by"),
-            "invoked_by_name": s.get("invoked_by_name"),
-            "forced": bool(s.get("forced")),
-            "force_enjoy": bool(s.get("force_enjoy")),
+            "answers": s.answers(),
+            "invoked_by": s.invoked_by,
+            "invoked_by_name": s.invoked_by_name,
+            "forced": s.forced,
+            "force_enjoy": s.force_enjoy,
         }
-        self._save_completed()
+        self._record_completed(uid, rec)
         await self._log_to_channel(guild, member, score, label, s)
 
     async def _log_to_channel(
@@ -668,17 +1345,17 @@ class ValoCheckCog(commands.Cog):
         member: discord.Member,
         score: int,
         label: str,
-        s: dict,
+        s: _Session,
     ):
         ch = await self._get_log_channel(guild)
         if ch is None:
             return
 
-        invoker = s.get("invoked_by_name", "unknown")
-        forced = "YES" if s.get("forced") else "NO"
-        force_enjoy = "YES" if s.get("force_enjoy") else "NO"
+        invoker = s.invoked_by_name
+        forced = "YES" if s.forced else "NO"
+        force_enjoy = "YES" if s.force_enjoy else "NO"
 
-        answers = s.get("answers", [])
+        answers = s.answers()
         summary_line = self._build_summary_line(answers)
 
         e = discord.Embed(
@@ -687,7 +1364,7 @@ class ValoCheckCog(commands.Cog):
                 f"対象: {member.mention}\n"
                 f"🧾 {summary_line}\n"
                 f"結果: **{label}**\n"
-                f"スコア: **{score}/{self.max_score}**\n"
+                f"スコア: **{score}/{s.bank.max_score}**\n"
                 f"管理者: **{invoker}**\n"
                 f"force: **{forced}**\n"
                 f"force_enjoy(last2=0): **{force_enjoy}**"
@@ -695,11 +1372,10 @@ class ValoCheckCog(commands.Cog):
             color=0x264653,
         )
 
-        sess_qs = s.get("questions", [])
         for i, a in enumerate(answers):
             qtext = f"Q{i + 1}"
-            if isinstance(sess_qs, list) and i < len(sess_qs):
-                qtext = sess_qs[i].get("q", qtext)
+            if i < len(s.bank):
+                qtext = s.bank.questions[i].text
 
             if isinstance(a, dict):
                 choice = a.get("choice", "")
@@ -744,7 +1420,7 @@ class ValoCheckCog(commands.Cog):
             )
             return
 
-        if len(self.questions) == 0:
+        if len(self.bank) == 0:
             await interaction.followup.send(
                 "質問が読み込めていません。運営に連絡してね。",
                 ephemeral=True,
@@ -755,23 +1431,26 @@ class ValoCheckCog(commands.Cog):
             )
             return
 
-        sess_questions = self._shuffle_questions_for_session()
-
-        self.sessions[member.id] = {
-            "idx": -1,
-            "score": 0,
-            "answers": [],
-            "questions": sess_questions,
-            "invoked_by": interaction.user.id,
-            "invoked_by_name": str(interaction.user),
-            "forced": force,
-            "force_enjoy": False,
-        }
+        bank = self.bank
+
+        self.sessions.put(
+            _Session(
+                member.id,
+                bank,
+                bank.shuffle(),
+                invoked_by=interaction.user.id,
+                invoked_by_name=str(interaction.user),
+                forced=force,
+                guild_id=interaction.guild_id,
+            ),
+            self.view_timeout_sec,
+        )
 
         try:
             await self._send_intro(member)
         except discord.Forbidden:
-            self.sessions.pop(member.id, None)
+            self.sessions.pop(member.id)
+            self.sessions.dirty = True
             await interaction.followup.send(
                 "DMを送れませんでした。相手がサーバーDMを拒否しています。",
                 ephemeral=True,
@@ -782,7 +1461,8 @@ class ValoCheckCog(commands.Cog):
             )
             return
         except Exception:
-            self.sessions.pop(member.id, None)
+            self.sessions.pop(member.id)
+            self.sessions.dirty = True
             await interaction.followup.send(
                 "DM送信に失敗しました。管理者に連絡してね。",
                 ephemeral=True,
@@ -805,13 +1485,6 @@ class ValoCheckCog(commands.Cog):
     async def valo_role_reload(self, interaction: discord.Interaction):
         await interaction.response.defer(ephemeral=True)
 
-        if len(self.sessions) > 0:
-            await interaction.followup.send(
-                "現在診断中のユーザーがいるため、リロードできません。",
-                ephemeral=True,
-            )
-            return
-
         ok = self._reload_questions(use_default=False)
         if not ok:
             await interaction.followup.send(
@@ -825,8 +1498,9 @@ class ValoCheckCog(commands.Cog):
             return
 
         await interaction.followup.send(
-            f"質問を再読み込みしました。質問数={len(self.questions)} "
-            f"/ max_score={self.max_score}",
+            f"質問を再読み込みしました。質問数={len(self.bank)} "
+            f"/ max_score={self.max_score}\n"
+            f"（診断中の {len(self.sessions)} 件は旧バンクのまま完了します）",
             ephemeral=True,
         )
 
@@ -864,24 +1538,164 @@ class ValoCheckCog(commands.Cog):
     ):
         await interaction.response.defer(ephemeral=True)
 
-        ids = list(self.sessions.keys())
-        if len(ids) == 0:
+        rows = self.sessions.pop_all()
+        if len(rows) == 0:
             await interaction.followup.send(
                 "診断中のユーザーはいません。", ephemeral=True
             )
             return
+        self.sessions.dirty = True
 
-        cnt = 0
-        for uid in ids:
-            ok = await self._cancel_session(uid, reason, interaction.user)
-            if ok:
-                cnt += 1
+        # DM編集はメッセージIDから直接行う（fetchしない）。同時実行数は絞る
+        embed = self._cancelled_embed(reason)
+        sem = asyncio.Semaphore(5)
+
+        async def _edit(s: _Session):
+            msg = self._dm_message(s)
+            if msg is None:
+                return
+            async with sem:
+                try:
+                    await msg.edit(embed=embed, view=None)
+                except Exception:
+                    pass
+
+        await asyncio.gather(*(_edit(s) for s in rows))
+        cnt = len(rows)
+
+        await self._notify_admin(
+            "🛑 VALO診断: 管理者一括中断",
+            f"InvokedBy: {interaction.user}\nReason: {reason}\nCount: {cnt}",
+        )
 
         await interaction.followup.send(
             f"診断中セッションを {cnt} 件中断しました（判定なし）。",
             ephemeral=True,
         )
 
+    @app_commands.command(
+        name="valo_role_sync",
+        description="診断済みメンバー全員のロールを記録済みの判定結果に合わせます（管理者のみ）",
+    )
+    @app_commands.checks.has_permissions(administrator=True)
+    async def valo_role_sync(self, interaction: discord.Interaction):
+        await interaction.response.defer(ephemeral=True)
+
+        guild = interaction.guild
+        if guild is None:
+            await interaction.followup.send("サーバー内で使ってね。", ephemeral=True)
+            return
+
+        targets: dict[int, tuple[bool, bool]] = {}
+        for uid, rec in self.completed.items():
+            if not isinstance(rec, dict) or self._rec_guild_id(rec) != guild.id:
+                continue
+            want = self._roles_for_label(str(rec.get("result", "")))
+            if want is None or not uid.isdigit():
+                continue
+            targets[int(uid)] = want
+
+        if len(targets) == 0:
+            await interaction.followup.send("対象の診断結果がありません。", ephemeral=True)
+            return
+
+        report = await self._apply_role_job(
+            guild, targets, reason=f"VALO role sync by {interaction.user}"
+        )
+        await interaction.followup.send(
+            f"ロール一括同期が完了しました。\n{report.format()}",
+            ephemeral=True,
+        )
+
+    @app_commands.command(
+        name="valo_role_rescore",
+        description="診断済みの回答を現在の質問/しきい値で再採点します（既定はdry-run）",
+    )
+    @app_commands.checks.has_permissions(administrator=True)
+    async def valo_role_rescore(
+        self,
+        interaction: discord.Interaction,
+        apply: bool = False,
+        thresh_enjoy: Optional[int] = None,
+        thresh_gachi: Optional[int] = None,
+    ):
+        await interaction.response.defer(ephemeral=True)
+
+        guild = interaction.guild
+        if guild is None:
+            await interaction.followup.send("サーバー内で使ってね。", ephemeral=True)
+            return
+
+        cur_enjoy, cur_gachi = self._thresholds(guild.id)
+        t_enjoy = cur_enjoy if thresh_enjoy is None else thresh_enjoy
+        t_gachi = cur_gachi if thresh_gachi is None else thresh_gachi
+        updated, transitions, unmatched = self._rescore_all({guild.id: (t_enjoy, t_gachi)})
+
+        changed_label = {
+            uid: rec
+            for uid, rec in updated.items()
+            if rec["result"] != str(self.completed[uid].get("result", ""))
+        }
+
+        e = discord.Embed(
+            title="VALO診断 再採点" + ("（適用）" if apply else "（dry-run）"),
+            description=(
+                f"しきい値（このサーバー）: ENJOY≦**{t_enjoy}** / GACHI≧**{t_gachi}**\n"
+                f"max_score: **{self.max_score}**\n"
+                f"診断済み: **{len(self.completed)}**\n"
+                f"スコア更新: **{len(updated)}** / 判定変更: **{len(changed_label)}**\n"
+                f"未一致の回答: **{unmatched}**（保存時の点数で計算）"
+            ),
+            color=0x264653,
+        )
+        if transitions:
+            lines = [
+                f"{old or '(なし)'} → {new}: **{n}**"
+                for (old, new), n in transitions.most_common()
+            ]
+            e.add_field(name="判定の変化", value="\n".join(lines)[:1024], inline=False)
+            sample = " ".join(f"<@{uid}>" for uid in list(changed_label)[:15])
+            e.add_field(name="対象（一部）", value=sample[:1024], inline=False)
+
+        if not apply:
+            e.set_footer(text="apply:True で記録更新とロール変更を実行します。")
+            await interaction.followup.send(embed=e, ephemeral=True)
+            return
+
+        # 指定したしきい値はこのサーバーの設定として保存する（他のサーバーはそれぞれの設定のまま）
+        if thresh_enjoy is not None:
+            self.config.set(guild.id, "VALO_CHECK_THRESH_ENJOY_ONLY", str(t_enjoy))
+        if thresh_gachi is not None:
+            self.config.set(guild.id, "VALO_CHECK_THRESH_GACHI_ONLY", str(t_gachi))
+        for uid, rec in updated.items():
+            self._record_completed(uid, rec)
+
+        # ロールは各記録のサーバーで付け替える
+        by_guild: dict[int, dict[int, tuple[bool, bool]]] = {}
+        for uid, rec in changed_label.items():
+            want = self._roles_for_label(rec["result"])
+            if want is not None and uid.isdigit():
+                by_guild.setdefault(self._rec_guild_id(rec), {})[int(uid)] = want
+        if not by_guild:
+            e.add_field(name="ロール変更", value="対象なし", inline=False)
+        for gid, targets in sorted(by_guild.items(), key=lambda kv: kv[0] != guild.id):
+            g = self.bot.get_guild(gid)
+            if g is None:
+                e.add_field(
+                    name=f"ロール変更（guild {gid}）",
+                    value=f"サーバーが見つかりません（{len(targets)}件未適用）",
+                    inline=False,
+                )
+                continue
+            report = await self._apply_role_job(
+                g, targets, reason=f"VALO role rescore by {interaction.user}"
+            )
+            name = "ロール変更" if gid == guild.id else f"ロール変更（{g.name}）"
+            e.add_field(name=name, value=report.format(), inline=False)
+        if thresh_enjoy is not None or thresh_gachi is not None:
+            e.set_footer(text="しきい値はこのサーバーの設定に保存しました（/guild_config_show で確認）。")
+        await interaction.followup.send(embed=e, ephemeral=True)
+
     @valo_role.error
     async def valo_role_error(
         self,
@@ -950,6 +1764,40 @@ class ValoCheckCog(commands.Cog):
         )
         raise error
 
+    @valo_role_sync.error
+    async def valo_role_sync_error(
+        self,
+        interaction: discord.Interaction,
+        error: app_commands.AppCommandError,
+    ):
+        if isinstance(error, app_commands.MissingPermissions):
+            await interaction.response.send_message(
+                "このコマンドは管理者のみ実行できます。", ephemeral=True
+            )
+            return
+        await self._notify_admin(
+            "❌ VALO診断: valo_role_sync コマンドエラー",
+            f"InvokedBy: {interaction.user}\nError: {type(error).__name__}: {error}",
+        )
+        raise error
+
+    @valo_role_rescore.error
+    async def valo_role_rescore_error(
+        self,
+        interaction: discord.Interaction,
+        error: app_commands.AppCommandError,
+    ):
+        if isinstance(error, app_commands.MissingPermissions):
+            await interaction.response.send_message(
+                "このコマンドは管理者のみ実行できます。", ephemeral=True
+            )
+            return
+        await self._notify_admin(
+            "❌ VALO診断: valo_role_rescore コマンドエラー",
+            f"InvokedBy: {interaction.user}\nError: {type(error).__name__}: {error}",
+        )
+        raise error
+
 
 async def setup(bot: commands.Bot):
     await bot.add_cog(ValoCheckCog(bot))
@@ -0,0 +1,198 @@
+import math
+import time
+from array import array
+from collections import Counter
+
+import discord
+from discord import app_commands
+from discord.ext import commands
+
+
+MISSING = -1
+
+
+class _AnswerMatrix:
+    """
+    診断済み回答の列指向テーブル。
+    cells[q][row] = 問題qの点数（未回答は -1）、totals[row] = 合計点。
+    """
+
+    __slots__ = ("n_rows", "cells", "totals", "labels")
+
+    def __init__(self, n_questions: int):
+        self.n_rows = 0
+        self.cells = [array("b") for _ in range(n_questions)]
+        self.totals = array("h")
+        self.labels: list[str] = []
+
+    @classmethod
+    def from_completed(cls, completed: dict, n_questions: int) -> "_AnswerMatrix":
+        m = cls(n_questions)
+        for rec in completed.values():
+            if not isinstance(rec, dict):
+                continue
+            answers = rec.get("answers")
+            if not isinstance(answers, list):
+                continue
+            total = 0
+            for q in range(n_questions):
+                pts = MISSING
+                if q < len(answers) and isinstance(answers[q], dict):
+                    try:
+                        pts = int(answers[q].get("score", 0))
+                    except (TypeError, ValueError):
+                        pts = MISSING
+                    if pts < 0 or pts > 127:
+                        pts = MISSING
+                m.cells[q].append(pts)
+                if pts != MISSING:
+                    total += pts
+            m.totals.append(total)
+            m.labels.append(str(rec.get("result", "")))
+            m.n_rows += 1
+        return m
+
+
+def _pearson(xs, ys) -> float:
+    n = len(xs)
+    if n < 2:
+        return 0.0
+    mx = sum(xs) / n
+    my = sum(ys) / n
+    sxy = sxx = syy = 0.0
+    for x, y in zip(xs, ys):
+        dx = x - mx
+        dy = y - my
+        sxy += dx * dy
+        sxx += dx * dx
+        syy += dy * dy
+    if sxx == 0 or syy == 0:
+        return 0.0
+    return sxy / math.sqrt(sxx * syy)
+
+
+class _QuestionStats:
+    __slots__ = ("answered", "mean", "dist", "discrimination")
+
+    def __init__(self, answered: int, mean: float, dist: Counter, discrimination: float):
+        self.answered = answered
+        self.mean = mean
+        self.dist = dist
+        self.discrimination = discrimination
+
+
+class _Summary:
+    __slots__ = ("version", "members", "mean_total", "labels", "questions", "built_ms")
+
+    def __init__(self, version: int):
+        self.version = version
+        self.members = 0
+        self.mean_total = 0.0
+        self.labels: Counter = Counter()
+        self.questions: list[_QuestionStats] = []
+        self.built_ms = 0.0
+
+
+def _summarize(m: _AnswerMatrix, version: int) -> _Summary:
+    s = _Summary(version)
+    s.members = m.n_rows
+    s.labels = Counter(m.labels)
+    if m.n_rows:
+        s.mean_total = sum(m.totals) / m.n_rows
+    for col in m.cells:
+        xs = []
+        rest = []
+        for row, pts in enumerate(col):
+            if pts == MISSING:
+                continue
+            xs.append(pts)
+            # 項目-残余相関：自分の点を除いた合計と比べる
+            rest.append(m.totals[row] - pts)
+        mean = sum(xs) / len(xs) if xs else 0.0
+        s.questions.append(
+            _QuestionStats(len(xs), mean, Counter(xs), _pearson(xs, rest))
+        )
+    return s
+
+
+class ValoCheckStatsCog(commands.Cog):
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+        self._cache = None
+
+    def _source(self):
+        return self.bot.get_cog("ValoCheckCog")
+
+    def _get_summary(self, src) -> _Summary:
+        if self._cache is not None and self._cache.version == src.completed_version:
+            return self._cache
+        started = time.perf_counter()
+        m = _AnswerMatrix.from_completed(src.completed, len(src.bank))
+        summary = _summarize(m, src.completed_version)
+        summary.built_ms = (time.perf_counter() - started) * 1000
+        self._cache = summary
+        return summary
+
+    def _build_embed(self, src, summary: _Summary) -> discord.Embed:
+        lines = []
+        for label, n in summary.labels.most_common():
+            ratio = n / summary.members * 100 if summary.members else 0.0
+            lines.append(f"{label or '(なし)'}: **{n}** ({ratio:.0f}%)")
+        e = discord.Embed(
+            title="VALO診断 統計",
+            description=(
+                f"診断済み: **{summary.members}**\n"
+                f"平均スコア: **{summary.mean_total:.2f}/{src.max_score}**\n"
+                + ("\n".join(lines) if lines else "(データなし)")
+            ),
+            color=0x264653,
+        )
+        for i, qs in enumerate(summary.questions[:24]):
+            name = f"Q{i + 1}"
+            if i < len(src.bank):
+                name = src.bank.questions[i].text[:200]
+            dist = " / ".join(f"{pts}点:{n}" for pts, n in sorted(qs.dist.items()))
+            e.add_field(
+                name=name,
+                value=(
+                    f"平均 **{qs.mean:.2f}** / 識別力 r=**{qs.discrimination:+.2f}**"
+                    f"（回答 {qs.answered}）\n{dist or '-'}"
+                )[:1024],
+                inline=False,
+            )
+        e.set_footer(text=f"集計 {summary.built_ms:.1f}ms（新しい完了があると再集計）")
+        return e
+
+    @app_commands.command(
+        name="valo_role_stats",
+        description="VALO診断の回答統計を表示します（管理者のみ）",
+    )
+    @app_commands.checks.has_permissions(administrator=True)
+    async def valo_role_stats(self, interaction: discord.Interaction):
+        src = self._source()
+        if src is None:
+            await interaction.response.send_message(
+                "VALO診断のCogが読み込まれていません。", ephemeral=True
+            )
+            return
+        summary = self._get_summary(src)
+        await interaction.response.send_message(
+            embed=self._build_embed(src, summary), ephemeral=True
+        )
+
+    @valo_role_stats.error
+    async def valo_role_stats_error(
+        self,
+        interaction: discord.Interaction,
+        error: app_commands.AppCommandError,
+    ):
+        if isinstance(error, app_commands.MissingPermissions):
+            await interaction.response.send_message(
+                "このコマンドは管理者のみ実行できます。", ephemeral=True
+            )
+            return
+        raise error
+
+
+async def setup(bot: commands.Bot):
+    await bot.add_cog(ValoCheckStatsCog(bot))
@@ -4,7 +4,9 @@ from discord import app_commands
 import aiohttp
 import random
 import os
-import json
+
+from utils import jsonio
+from utils.metrics import timed, track_flush
 
 VALO_API_URL = "https://valorant-api.com/v1/maps"
 BAN_FILE = "valomap_bans.json"
@@ -24,7 +26,7 @@ class ValorantMap(commands.Cog):
         if os.path.exists(BAN_FILE):
             try:
                 with open(BAN_FILE, "r", encoding="utf-8") as f:
-                    data = json.load(f)
+                    data = jsonio.load(f)
                     self.banned_maps = set(data.get("bans", []))
                 print(f"🚫 Loaded banned maps: {self.banned_maps}")
             except Exception as e:
@@ -32,8 +34,8 @@ class ValorantMap(commands.Cog):
 
     def save_bans(self):
         try:
-            with open(BAN_FILE, "w", encoding="utf-8") as f:
-                json.dump({"bans": list(self.banned_maps)}, f, ensure_ascii=False, indent=2)
+            with track_flush("valomap_bans"), open(BAN_FILE, "w", encoding="utf-8") as f:
+                jsonio.dump({"bans": list(self.banned_maps)}, f)
             print(f"💾 Saved banned maps: {self.banned_maps}")
         except Exception as e:
             print(f"⚠️ Failed to save ban file: {e}")
@@ -147,6 +149,7 @@ class ValorantMap(commands.Cog):
             ]
             super().__init__(placeholder="BANするマップを選んでください", options=options, min_values=1, max_values=1)
 
+        @timed("valomap:ban_select")
         async def callback(self, interaction: discord.Interaction):
             selected = self.values[0]
             self.cog.banned_maps.add(selected)
@@ -212,23 +215,11 @@ class ValorantMap(commands.Cog):
         await interaction.response.send_message(embed=embed, ephemeral=True)
 
     # -------------------------------
-    # 🔹 起動時同期
+    # 🔹 起動時マップ取得（コマンド同期は main.py でまとめて行う）
     # -------------------------------
     @commands.Cog.listener()
+    @timed("on_ready:valomap")
     async def on_ready(self):
-        guild = discord.Object(id=int(os.getenv("GUILD_ID")))
-        try:
-            self.bot.tree.add_command(self.valomap_all, guild=guild)
-            self.bot.tree.add_command(self.valomap_pool, guild=guild)
-            self.bot.tree.add_command(self.valomap_select, guild=guild)
-            self.bot.tree.add_command(self.valomap_ban_ui, guild=guild)
-            self.bot.tree.add_command(self.valomap_clear, guild=guild)
-            self.bot.tree.add_command(self.valomap_help, guild=guild)
-            synced = await self.bot.tree.sync(guild=guild)
-            print(f"✅ Slash commands synced (valomap): {[cmd.name for cmd in synced]}")
-        except Exception as e:
-            print(f"⚠️ Failed to sync valomap commands: {e}")
-
         if not self.cached_maps:
             await self.get_comp_maps()
 
@@ -1,41 +1,101 @@
+import asyncio
+import functools
 import os
 import time
+from typing import Dict, List, Optional
+
 import discord
 from discord import app_commands
 from discord.ext import commands
 
-
-def _get_int_env(key: str) -> int:
-    v = os.getenv(key)
-    if not v:
-        raise RuntimeError(f"Missing env: {key}")
-    return int(v)
-
-
-def _get_opt_int_env(key: str, default: int) -> int:
-    v = os.getenv(key)
-    if not v:
-        return default
+from utils import text_filter
+from utils.guild_config import get_config
+from utils.matchmaking import VALO_RANK_MAP, MatchIndex
+from utils.members import chunk_members, get_or_fetch_member
+from utils.moderation import get_moderator
+from utils.metrics import timed
+from utils.panels import PanelKind, get_panels
+from utils.recruits import DEFAULT_PATH, RecruitStore, t_recruit
+from utils.scheduler import get_scheduler
+
+DEFAULT_COOLDOWN_SECONDS = 300
+DEFAULT_TTL_MINUTES = 60
+DEFAULT_INVITE_COUNT = 5
+MAX_INVITE_COUNT = 10
+MAX_NEED = 9
+# お誘いの索引はこの秒数ごとに作り直す（キャッシュにいない人のロール変更はイベントが届かないため）
+INDEX_TTL_SECONDS = 600
+# キャッシュにいない opt-in の人がこれより多ければ、1人ずつ fetch せずギルドを chunk する
+INDEX_FETCH_LIMIT = 25
+
+
+def _forbidden_message(user_id: int, text: str) -> Optional[str]:
+    kind = text_filter.find_forbidden(text)
+    if kind is not None:
+        return f"{text_filter.LABELS[kind]}は書けないよ（@here/@everyone/メンション/招待リンクは禁止）。"
+    # 投稿の連投は cooldown で見るので、ここでは NG ワードだけ
+    verdict = get_moderator().check("valo_recruit", user_id, text, rate=False)
+    return None if verdict.ok else verdict.message()
+
+
+def _parse_need(text: str) -> Optional[int]:
     try:
-        return int(v)
+        n = int(str(text).strip().translate(str.maketrans("０１２３４５６７８９", "0123456789")))
     except ValueError:
-        return default
-
-
-def _has_forbidden_mentions(text: str) -> bool:
-    t = (text or "").lower()
-    if "@here" in t or "@everyone" in t:
-        return True
-    if "<@&" in t or "<@" in t:
-        return True
-    return False
-
-
-def _cooldown_left(now: float, last: float, cd: int) -> int:
-    left = int(cd - (now - last))
-    if left < 0:
-        return 0
-    return left
+        return None
+    if n < 1 or n > MAX_NEED:
+        return None
+    return n
+
+
+class _RecruitStyle:
+    """
+    募集の種類ごとのタイトル・色・タイプ表示の有無（定数）。Embed は投稿のたびに組み立てる
+    （雛形の Embed.copy() は to_dict/from_dict を通るので、組み立てるより遅い。bench/recruit_post.py）。
+    """
+
+    __slots__ = ("title", "color", "labeled")
+
+    def __init__(self, title: str, color: discord.Color, labeled: bool):
+        self.title = title
+        self.color = color.value
+        self.labeled = labeled
+
+
+_STYLES = {
+    "unrated": _RecruitStyle("VALORANT 募集（アンレ）", discord.Color.blurple(), False),
+    "comp": _RecruitStyle("VALORANT 募集（コンペ）", discord.Color.gold(), True),
+}
+_CLOSED_COLOR = discord.Color.dark_grey().value
+_STATUS_TEXT = {
+    "full": "✅ 満員になりました",
+    "expired": "⌛ 期限切れで締め切りました",
+    "closed": "🔒 募集主が締め切りました",
+}
+
+
+def _recruit_embed(rec: t_recruit, status: Optional[str] = None) -> discord.Embed:
+    style = _STYLES.get(rec.kind) or _STYLES["unrated"]
+    head = f"タイプ: **{rec.label}**\n" if style.labeled else ""
+    if status is None:
+        tail = f"締切: <t:{int(rec.expires)}:R>"
+    else:
+        tail = _STATUS_TEXT.get(status, status)
+    embed = discord.Embed(
+        title=style.title,
+        description=f"{head}募集: **{rec.need}人**（参加 {len(rec.members)}/{rec.need}）\n{tail}",
+        color=style.color if status is None else _CLOSED_COLOR,
+    )
+    if rec.note:
+        embed.add_field(name="一言", value=rec.note, inline=False)
+    if rec.members:
+        embed.add_field(
+            name="参加",
+            value=" ".join(f"<@{uid}>" for uid in rec.members),
+            inline=False,
+        )
+    embed.set_footer(text=f"募集主: {rec.owner_name}")
+    return embed
 
 
 class UnratedRecruitModal(discord.ui.Modal, title="VALO募集（アンレ）"):
@@ -56,18 +116,25 @@ class UnratedRecruitModal(discord.ui.Modal, title="VALO募集（アンレ）"):
         super().__init__()
         self.view = view
 
+    @timed("valo_recruit:unrated_submit")
     async def on_submit(self, interaction: discord.Interaction) -> None:
-        if _has_forbidden_mentions(self.note.value):
+        bad = _forbidden_message(interaction.user.id, self.note.value)
+        if bad:
+            await interaction.response.send_message(bad, ephemeral=True)
+            return
+        need = _parse_need(self.need.value)
+        if need is None:
             await interaction.response.send_message(
-                "@here/@everyone/メンションは禁止だよ。",
-                ephemeral=True,
+                f"人数は 1〜{MAX_NEED} の数字で入力してね。", ephemeral=True
             )
             return
-        ok, msg = self.view.check_and_touch_cooldown(interaction.user.id)
+        ok, msg = self.view.check_and_touch_cooldown(
+            interaction.guild_id, interaction.user.id
+        )
         if not ok:
             await interaction.response.send_message(msg, ephemeral=True)
             return
-        await self.view.send_unrated(interaction, self.need.value, self.note.value)
+        await self.view.send_unrated(interaction, need, self.note.value)
 
 
 class CompRecruitModal(discord.ui.Modal, title="VALO募集（コンペ）"):
@@ -91,20 +158,27 @@ class CompRecruitModal(discord.ui.Modal, title="VALO募集（コンペ）"):
         self.mention_role_id = mention_role_id
         self.role_label = role_label
 
+    @timed("valo_recruit:comp_submit")
     async def on_submit(self, interaction: discord.Interaction) -> None:
-        if _has_forbidden_mentions(self.note.value):
+        bad = _forbidden_message(interaction.user.id, self.note.value)
+        if bad:
+            await interaction.response.send_message(bad, ephemeral=True)
+            return
+        need = _parse_need(self.need.value)
+        if need is None:
             await interaction.response.send_message(
-                "@here/@everyone/メンションは禁止だよ。",
-                ephemeral=True,
+                f"人数は 1〜{MAX_NEED} の数字で入力してね。", ephemeral=True
             )
             return
-        ok, msg = self.view.check_and_touch_cooldown(interaction.user.id)
+        ok, msg = self.view.check_and_touch_cooldown(
+            interaction.guild_id, interaction.user.id
+        )
         if not ok:
             await interaction.response.send_message(msg, ephemeral=True)
             return
         await self.view.send_comp(
             interaction,
-            self.need.value,
+            need,
             self.note.value,
             self.mention_role_id,
             self.role_label,
@@ -125,6 +199,7 @@ class CompTypeSelect(discord.ui.Select):
         )
         self._v = view
 
+    @timed("valo_recruit:comp_type")
     async def callback(self, interaction: discord.Interaction) -> None:
         picked_role_id = int(self.values[0])
         member = interaction.user
@@ -134,7 +209,7 @@ class CompTypeSelect(discord.ui.Select):
                 ephemeral=True,
             )
             return
-        if not any(r.id == picked_role_id for r in member.roles):
+        if member.get_role(picked_role_id) is None:
             await interaction.response.send_message(
                 "自分の所属しているロールを選んでね。",
                 ephemeral=True,
@@ -146,89 +221,126 @@ class CompTypeSelect(discord.ui.Select):
 
 
 class CompTypeSelectView(discord.ui.View):
-    def __init__(self, main_view: "ValoRecruitView"):
+    def __init__(self, main_view: "ValoRecruitView", gachi_role_id: int,
+                 enjoy_role_id: int):
         super().__init__(timeout=120)
         self.main_view = main_view
-        self.gachi_role_id = main_view.gachi_role_id
-        self.enjoy_role_id = main_view.enjoy_role_id
+        self.gachi_role_id = gachi_role_id
+        self.enjoy_role_id = enjoy_role_id
         self.add_item(CompTypeSelect(self))
 
 
+def _invited_text(invited: Optional[List[int]]) -> str:
+    if invited is None:
+        return "\n（お誘いを受け取る人がいないので、ロールにメンションしたよ）"
+    if not invited:
+        return ""
+    return "\nお誘いを送った: " + " ".join(f"<@{uid}>" for uid in invited)
+
+
+class RecruitPostView(discord.ui.View):
+    """募集投稿のボタン。どの投稿かは押されたメッセージのIDで引く（全投稿でこの1つを共有）。"""
+
+    def __init__(self, cog: "ValoRecruitCog", disabled: bool = False):
+        super().__init__(timeout=None)
+        self.cog = cog
+        if disabled:
+            for item in self.children:
+                if isinstance(item, discord.ui.Button):
+                    item.disabled = True
+
+    @discord.ui.button(
+        label="参加",
+        style=discord.ButtonStyle.success,
+        custom_id="valo_recruit:join",
+    )
+    @timed("valo_recruit:join")
+    async def join(self, interaction: discord.Interaction, _: discord.ui.Button):
+        await self.cog.handle_post(interaction, "join")
+
+    @discord.ui.button(
+        label="抜ける",
+        style=discord.ButtonStyle.secondary,
+        custom_id="valo_recruit:leave",
+    )
+    @timed("valo_recruit:leave")
+    async def leave(self, interaction: discord.Interaction, _: discord.ui.Button):
+        await self.cog.handle_post(interaction, "leave")
+
+    @discord.ui.button(
+        label="〆る",
+        style=discord.ButtonStyle.danger,
+        custom_id="valo_recruit:close",
+    )
+    @timed("valo_recruit:close")
+    async def close(self, interaction: discord.Interaction, _: discord.ui.Button):
+        await self.cog.handle_post(interaction, "close")
+
+
 class ValoRecruitView(discord.ui.View):
-    def __init__(self, channel_id: int, gachi_role_id: int, enjoy_role_id: int,
-                 cooldown_seconds: int):
+    """募集パネル。チャンネル/ロール/連投制限は押されたギルドの設定を使う。"""
+
+    def __init__(self, cog: "ValoRecruitCog"):
         super().__init__(timeout=None)
-        self.channel_id = channel_id
-        self.gachi_role_id = gachi_role_id
-        self.enjoy_role_id = enjoy_role_id
-        self.cooldown_seconds = cooldown_seconds
-        self._last_post_at: dict[int, float] = {}
+        self.cog = cog
+        self.config = cog.config
 
-    def check_and_touch_cooldown(self, user_id: int) -> tuple[bool, str]:
-        now = time.time()
-        last = self._last_post_at.get(user_id, 0.0)
-        left = _cooldown_left(now, last, self.cooldown_seconds)
+    def check_and_touch_cooldown(self, guild_id: int, user_id: int) -> tuple[bool, str]:
+        store = self.cog.store
+        left = store.cooldown_left(guild_id, user_id)
         if left > 0:
             return False, f"連投防止：あと **{left}秒** 待ってね。"
-        self._last_post_at[user_id] = now
+        cd = self.config.get_int(
+            guild_id, "VALO_RECRUIT_COOLDOWN_SECONDS", DEFAULT_COOLDOWN_SECONDS
+        )
+        store.touch_cooldown(guild_id, user_id, cd)
         return True, ""
 
-    async def _get_channel(self, client: discord.Client):
-        ch = client.get_channel(self.channel_id)
-        if isinstance(ch, discord.TextChannel):
+    async def _get_channel(self, client: discord.Client, guild_id: int):
+        ch = client.get_channel(self.config.get_int(guild_id, "VALO_RECRUIT_CHANNEL_ID"))
+        if isinstance(ch, discord.TextChannel) and ch.guild.id == guild_id:
             return ch
         return None
 
-    async def send_unrated(self, interaction: discord.Interaction, need: str,
+    async def send_unrated(self, interaction: discord.Interaction, need: int,
                            note: str) -> None:
-        channel = await self._get_channel(interaction.client)
+        channel = await self._get_channel(interaction.client, interaction.guild_id)
         if not channel:
             await interaction.response.send_message(
                 "募集チャンネルが見つからないよ。",
                 ephemeral=True,
             )
             return
-        embed = discord.Embed(
-            title="VALORANT 募集（アンレ）",
-            description=f"募集: **{need}人**",
-            color=discord.Color.blurple(),
+        # お誘いの索引を作るのに fetch することがあるので先に応答しておく
+        await interaction.response.defer(ephemeral=True)
+        _, invited = await self.cog.post_recruit(interaction, channel, "unrated", need, note, "", None)
+        await interaction.followup.send(
+            "アンレ募集を投下したよ。" + _invited_text(invited), ephemeral=True
         )
-        if note:
-            embed.add_field(name="一言", value=note, inline=False)
-        embed.set_footer(text=f"募集主: {interaction.user.display_name}")
 
-        am = discord.AllowedMentions(everyone=False, roles=False, users=False)
-        await channel.send(embed=embed, allowed_mentions=am)
-        await interaction.response.send_message("アンレ募集を投下したよ。", ephemeral=True)
-
-    async def send_comp(self, interaction: discord.Interaction, need: str,
+    async def send_comp(self, interaction: discord.Interaction, need: int,
                         note: str, mention_role_id: int, role_label: str) -> None:
-        channel = await self._get_channel(interaction.client)
+        channel = await self._get_channel(interaction.client, interaction.guild_id)
         if not channel:
             await interaction.response.send_message(
                 "募集チャンネルが見つからないよ。",
                 ephemeral=True,
             )
             return
-        mention = f"<@&{mention_role_id}>"
-        embed = discord.Embed(
-            title="VALORANT 募集（コンペ）",
-            description=f"タイプ: **{role_label}**\n募集: **{need}人**",
-            color=discord.Color.gold(),
+        await interaction.response.defer(ephemeral=True)
+        _, invited = await self.cog.post_recruit(
+            interaction, channel, "comp", need, note, role_label, mention_role_id
+        )
+        await interaction.followup.send(
+            "コンペ募集を投下したよ。" + _invited_text(invited), ephemeral=True
         )
-        if note:
-            embed.add_field(name="一言", value=note, inline=False)
-        embed.set_footer(text=f"募集主: {interaction.user.display_name}")
-
-        am = discord.AllowedMentions(everyone=False, roles=True, users=False)
-        await channel.send(content=mention, embed=embed, allowed_mentions=am)
-        await interaction.response.send_message("コンペ募集を投下したよ。", ephemeral=True)
 
     @discord.ui.button(
         label="アンレ募集",
         style=discord.ButtonStyle.primary,
         custom_id="valo_recruit:unrated",
     )
+    @timed("valo_recruit:unrated")
     async def unrated(self, interaction: discord.Interaction, _: discord.ui.Button):
         await interaction.response.send_modal(UnratedRecruitModal(self))
 
@@ -237,50 +349,366 @@ class ValoRecruitView(discord.ui.View):
         style=discord.ButtonStyle.success,
         custom_id="valo_recruit:comp",
     )
+    @timed("valo_recruit:comp")
     async def competitive(self, interaction: discord.Interaction,
                           _: discord.ui.Button):
-        view = CompTypeSelectView(self)
+        gid = interaction.guild_id
+        gachi_id = self.config.get_int(gid, "VALO_ROLE_GACHI_ID")
+        enjoy_id = self.config.get_int(gid, "VALO_ROLE_ENJOY_ID")
+        if not gachi_id or not enjoy_id:
+            await interaction.response.send_message(
+                "このサーバーではコンペ募集のロールが未設定だよ。",
+                ephemeral=True,
+            )
+            return
+        view = CompTypeSelectView(self, gachi_id, enjoy_id)
         await interaction.response.send_message(
             "コンペの募集タイプを選んでね（ガチ/エンジョイ）",
             view=view,
             ephemeral=True,
         )
 
+    @discord.ui.button(
+        label="🔔 お誘い ON/OFF",
+        style=discord.ButtonStyle.secondary,
+        custom_id="valo_recruit:optin",
+    )
+    @timed("valo_recruit:optin")
+    async def optin(self, interaction: discord.Interaction, _: discord.ui.Button):
+        await self.cog.toggle_optin(interaction)
+
 
 class ValoRecruitCog(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
-        channel_id = _get_int_env("VALO_RECRUIT_CHANNEL_ID")
-        gachi_id = _get_int_env("VALO_ROLE_GACHI_ID")
-        enjoy_id = _get_int_env("VALO_ROLE_ENJOY_ID")
-        cooldown = _get_opt_int_env("VALO_RECRUIT_COOLDOWN_SECONDS", 300)
-        self.view = ValoRecruitView(channel_id, gachi_id, enjoy_id, cooldown)
-        bot.add_view(self.view)
+        self.config = get_config()
+        self.store = RecruitStore(os.getenv("VALO_RECRUITS_PATH") or DEFAULT_PATH)
+        self.view = ValoRecruitView(self)
+        self.post_view = RecruitPostView(self)
+        # 参加/抜けるの連打で投稿の編集が続かないように
+        get_moderator().configure("valo_recruit:button", per_minute=12, burst=4)
+        # お誘いの索引はギルドごと。初めて使うときに opt-in 済みの人だけで作る
+        self._match: Dict[int, MatchIndex] = {}
+        self._match_built: Dict[int, float] = {}
+        self._match_locks: Dict[int, asyncio.Lock] = {}
+
+    async def cog_load(self) -> None:
+        self.store.load()
+        get_panels().register(
+            PanelKind("valo_recruit", self._render_panel, views=[self.view, self.post_view])
+        )
+        # 募集中の投稿は締切時刻にタイマーで閉じる（過ぎていればすぐ）
+        for rec in self.store.active():
+            self._schedule(rec)
+
+    async def cog_unload(self) -> None:
+        get_panels().unregister("valo_recruit")
+        get_scheduler().cancel_prefix("valo_recruit:")
+
+    # ------------------------------------------------------
+    # 募集投稿
+    # ------------------------------------------------------
+    def _schedule(self, rec: t_recruit) -> None:
+        get_scheduler().call_at(
+            rec.expires,
+            f"valo_recruit:{rec.message_id}",
+            functools.partial(self._finish, rec.message_id, "expired"),
+        )
 
-    @app_commands.command(name="valo_panel", description="VALO募集パネルを設置します")
-    @app_commands.checks.has_permissions(manage_guild=True)
-    async def valo_panel(self, interaction: discord.Interaction) -> None:
-        channel_id = _get_int_env("VALO_RECRUIT_CHANNEL_ID")
-        channel = interaction.client.get_channel(channel_id)
-        if not isinstance(channel, discord.TextChannel):
-            await interaction.response.send_message(
-                "募集チャンネルが見つからないよ。",
-                ephemeral=True,
-            )
+    async def post_recruit(
+        self,
+        interaction: discord.Interaction,
+        channel: discord.TextChannel,
+        kind: str,
+        need: int,
+        note: str,
+        label: str,
+        role_id: Optional[int],
+    ) -> tuple[t_recruit, Optional[List[int]]]:
+        """
+        募集を投稿する。お誘いを受け取る人がいれば上位 N 人にDMし、ロールへのメンションはしない。
+        戻り値の2つ目はDMした人（コンペで候補がいなくてロールにメンションしたときは None）。
+        """
+        idx = await self._index(interaction.guild)
+        owner = interaction.user
+        cands = idx.candidates(role_id, exclude=(owner.id,))
+        n = min(MAX_INVITE_COUNT, self.config.get_int(
+            interaction.guild_id, "VALO_RECRUIT_INVITE_COUNT", DEFAULT_INVITE_COUNT
+        ))
+        invited = idx.best(cands, idx.tier_of(r.id for r in owner.roles), n) if n > 0 else []
+        content = None
+        am = text_filter.NO_MENTIONS
+        if role_id and not invited:
+            content = f"<@&{role_id}>"
+            am = text_filter.ROLE_MENTIONS
+
+        ttl = self.config.get_int(
+            interaction.guild_id, "VALO_RECRUIT_TTL_MINUTES", DEFAULT_TTL_MINUTES
+        )
+        rec = t_recruit(
+            message_id=0,
+            guild_id=interaction.guild_id,
+            channel_id=channel.id,
+            owner_id=interaction.user.id,
+            owner_name=interaction.user.display_name,
+            kind=kind,
+            need=need,
+            expires=time.time() + max(1, ttl) * 60,
+            note=note or "",
+            label=label,
+        )
+        embed = _recruit_embed(rec)
+        msg = await channel.send(
+            content=content,
+            embed=embed,
+            view=self.post_view,
+            allowed_mentions=am,
+        )
+        rec.message_id = msg.id
+        self.store.add(rec)
+        self._schedule(rec)
+        if invited:
+            asyncio.create_task(self._send_invites(invited, msg, embed))
+        return rec, (None if content else invited)
+
+    async def _send_invites(self, user_ids: List[int], msg: discord.Message,
+                            embed: discord.Embed) -> None:
+        text = f"**{msg.guild.name}** でVALOの募集があるよ。参加するならこちら → {msg.jump_url}"
+
+        async def one(uid: int) -> bool:
+            try:
+                dm = await self.bot.create_dm(discord.Object(id=uid))
+                await dm.send(text, embed=embed)
+                return True
+            except (discord.Forbidden, discord.HTTPException):
+                return False
+
+        results = await asyncio.gather(*(one(uid) for uid in user_ids))
+        print(f"📨 VALO recruit invites: {sum(results)}/{len(user_ids)} sent")
+
+    # ------------------------------------------------------
+    # お誘い（マッチング索引）
+    # ------------------------------------------------------
+    async def _index(self, guild: discord.Guild) -> MatchIndex:
+        gid = guild.id
+        idx = self._match.get(gid)
+        if idx is not None and time.monotonic() - self._match_built.get(gid, 0.0) < INDEX_TTL_SECONDS:
+            return idx
+        lock = self._match_locks.setdefault(gid, asyncio.Lock())
+        async with lock:
+            idx = self._match.get(gid)
+            if idx is None or time.monotonic() - self._match_built.get(gid, 0.0) >= INDEX_TTL_SECONDS:
+                idx = await self._build_index(guild)
+                self._match[gid] = idx
+                self._match_built[gid] = time.monotonic()
+        return idx
+
+    async def _build_index(self, guild: discord.Guild) -> MatchIndex:
+        """opt-in 済みの人だけで作る。キャッシュにいない人は fetch（多ければ chunk）で取る。"""
+        gid = guild.id
+        tracked = [
+            self.config.get_int(gid, "VALO_ROLE_GACHI_ID"),
+            self.config.get_int(gid, "VALO_ROLE_ENJOY_ID"),
+        ]
+        rank_names = list(VALO_RANK_MAP.values())
+        rank_tiers = {
+            role.id: rank_names.index(role.name)
+            for role in guild.roles if role.name in rank_names
+        }
+        idx = MatchIndex(self.store.opted(gid), [r for r in tracked if r], rank_tiers)
+        members: Dict[int, discord.Member] = {}
+        missing = []
+        for uid in idx.opted:
+            member = guild.get_member(uid)
+            if member is not None:
+                members[uid] = member
+            else:
+                missing.append(uid)
+        if len(missing) > INDEX_FETCH_LIMIT:
+            wanted = set(missing)
+            members.update((m.id, m) for m in await chunk_members(guild) if m.id in wanted)
+        elif missing:
+            fetched = await asyncio.gather(*(get_or_fetch_member(guild, uid) for uid in missing))
+            members.update((m.id, m) for m in fetched if m is not None)
+        # fetch したメンバーは voice を持たないので、VC在席は voice キャッシュから見る
+        afk = guild.afk_channel
+        in_voice = {
+            m.id
+            for vc in guild.voice_channels if afk is None or vc.id != afk.id
+            for m in vc.members
+        }
+        for uid, member in members.items():
+            idx.update(uid, (r.id for r in member.roles), uid in in_voice)
+        print(f"🔔 VALO match index built: {len(members)}/{len(idx.opted)} members (guild={gid})")
+        return idx
+
+    @staticmethod
+    def _index_member(idx: MatchIndex, member: discord.Member) -> None:
+        vc = member.voice.channel if member.voice else None
+        afk = member.guild.afk_channel
+        idx.update(
+            member.id,
+            (r.id for r in member.roles),
+            vc is not None and (afk is None or vc.id != afk.id),
+        )
+
+    async def toggle_optin(self, interaction: discord.Interaction) -> None:
+        member = interaction.user
+        if not interaction.guild or not isinstance(member, discord.Member):
+            await interaction.response.send_message("サーバー内で使ってね。", ephemeral=True)
+            return
+        on = member.id not in self.store.opted(interaction.guild.id)
+        self.store.set_optin(interaction.guild.id, member.id, on)
+        # 索引がまだ無ければ、次に作るときに store から入る
+        idx = self._match.get(interaction.guild.id)
+        if on:
+            if idx is not None:
+                idx.opt_in(member.id)
+                self._index_member(idx, member)
+            msg = "🔔 お誘いを受け取るようにしたよ。合いそうな募集が出たらDMが届くよ。"
+        else:
+            if idx is not None:
+                idx.remove(member.id)
+            msg = "🔕 お誘いを止めたよ。"
+        await interaction.response.send_message(msg, ephemeral=True)
+
+    @commands.Cog.listener()
+    @timed("on_member_update:valorecruit")
+    async def on_member_update(self, before: discord.Member, after: discord.Member) -> None:
+        idx = self._match.get(after.guild.id)
+        if idx is not None and after.id in idx.opted and before.roles != after.roles:
+            self._index_member(idx, after)
+
+    @commands.Cog.listener()
+    @timed("on_voice_state_update:valorecruit")
+    async def on_voice_state_update(self, member: discord.Member, before, after) -> None:
+        if before.channel == after.channel:
             return
+        idx = self._match.get(member.guild.id)
+        if idx is not None and member.id in idx.opted:
+            self._index_member(idx, member)
+
+    # キャッシュにいない人の退出も届くよう raw イベントを使う
+    @commands.Cog.listener()
+    @timed("on_raw_member_remove:valorecruit")
+    async def on_raw_member_remove(self, payload: discord.RawMemberRemoveEvent) -> None:
+        uid = payload.user.id
+        if uid not in self.store.opted(payload.guild_id):
+            return
+        idx = self._match.get(payload.guild_id)
+        if idx is not None:
+            idx.remove(uid)
+        self.store.set_optin(payload.guild_id, uid, False)
+
+    @commands.Cog.listener()
+    @timed("on_guild_role_update:valorecruit")
+    async def on_guild_role_update(self, before: discord.Role, after: discord.Role) -> None:
+        # ランクロールの名前が変わったら索引を作り直す（次に使うとき）
+        if before.name != after.name:
+            self._match.pop(after.guild.id, None)
+
+    async def handle_post(self, interaction: discord.Interaction, action: str) -> None:
+        verdict = get_moderator().check("valo_recruit:button", interaction.user.id)
+        if not verdict.ok:
+            await interaction.response.send_message(verdict.message(), ephemeral=True)
+            return
+        mid = interaction.message.id if interaction.message else 0
+        rec = self.store.get(mid)
+        if rec is None:
+            await interaction.response.edit_message(view=RecruitPostView(self, disabled=True))
+            await interaction.followup.send("この募集はもう締め切られてるよ。", ephemeral=True)
+            return
+        uid = interaction.user.id
+
+        if action == "close":
+            perms = getattr(interaction.user, "guild_permissions", None)
+            if uid != rec.owner_id and not (perms and perms.manage_messages):
+                await interaction.response.send_message(
+                    "締め切れるのは募集主だけだよ。", ephemeral=True
+                )
+                return
+            await self._finish(mid, "closed", interaction)
+            return
+
+        if action == "join":
+            if uid == rec.owner_id:
+                await interaction.response.send_message("募集主は参加できないよ。", ephemeral=True)
+                return
+            if uid in rec.members:
+                await interaction.response.send_message("もう参加してるよ。", ephemeral=True)
+                return
+            rec.members.append(uid)
+        else:
+            if uid not in rec.members:
+                await interaction.response.send_message("参加していないよ。", ephemeral=True)
+                return
+            rec.members.remove(uid)
+
+        if rec.full:
+            await self._finish(mid, "full", interaction)
+            return
+        self.store.save()
+        await interaction.response.edit_message(embed=_recruit_embed(rec))
+
+    async def _finish(
+        self,
+        message_id: int,
+        status: str,
+        interaction: Optional[discord.Interaction] = None,
+    ) -> None:
+        """募集を閉じる。満員・〆はボタンの応答で、期限切れはタイマーから呼ばれる。"""
+        rec = self.store.remove(message_id)
+        get_scheduler().cancel(f"valo_recruit:{message_id}")
+        if rec is None:
+            return
+        embed = _recruit_embed(rec, status)
+        view = RecruitPostView(self, disabled=True)
+        if interaction is not None:
+            await interaction.response.edit_message(embed=embed, view=view)
+            return
+        await self.bot.wait_until_ready()
+        ch = self.bot.get_channel(rec.channel_id)
+        if ch is None:
+            return
+        try:
+            await ch.get_partial_message(message_id).edit(embed=embed, view=view)
+        except (discord.NotFound, discord.Forbidden, discord.HTTPException):
+            pass
+
+    def _render_panel(self, guild_id: int):
         embed = discord.Embed(
             title="VALORANT 募集",
             description=(
                 "ボタンを押して募集を投下してね。\n"
                 "・アンレ：人数だけでOK\n"
-                "・コンペ：所属のみ選択可→該当ロールへメンション\n"
+                "・コンペ：所属のみ選択可→合いそうな人にDMでお誘い（いなければロールへメンション）\n"
+                "・🔔 お誘い ON にすると、募集があったときにDMが届く\n"
                 "・here/everyone/本文メンションは禁止\n"
-                "・連投制限あり"
+                "・連投制限あり\n"
+                "・募集には「参加」ボタン付き。満員か期限切れで自動で締め切り"
             ),
             color=discord.Color.green(),
         )
-        await channel.send(embed=embed, view=self.view)
-        await interaction.response.send_message("募集パネルを設置したよ。", ephemeral=True)
+        return None, embed, self.view
+
+    @app_commands.command(name="valo_panel", description="VALO募集パネルを設置します")
+    @app_commands.checks.has_permissions(manage_guild=True)
+    async def valo_panel(self, interaction: discord.Interaction) -> None:
+        channel = await self.view._get_channel(interaction.client, interaction.guild_id)
+        if channel is None:
+            await interaction.response.send_message(
+                "募集チャンネルが見つからないよ。",
+                ephemeral=True,
+            )
+            return
+        await interaction.response.defer(ephemeral=True)
+        msg = await get_panels().publish(
+            self.bot, "valo_recruit", channel, interaction.guild_id, verify=True
+        )
+        await interaction.followup.send(
+            "募集パネルを設置したよ。" if msg is not None else "募集パネルはもう置いてあるよ。",
+            ephemeral=True,
+        )
 
 
 async def setup(bot: commands.Bot) -> None:
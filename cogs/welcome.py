@@ -1,61 +1,112 @@
+import asyncio
+import functools
 import os
 import random
+import time
 import discord
 from discord.ext import commands
 from discord.ui import View, Button
 from discord import app_commands
 
+from utils import text_filter
+from utils.guild_config import get_config
+from utils.members import get_or_fetch_member, member_ids_with_roles
+from utils.metrics import timed
+from utils.moderation import get_moderator
+from utils.raid import RaidDetector, t_raid_stats
+from utils.scheduler import get_scheduler
+
+
+def _get_env_float(key: str, default: float) -> float:
+    v = os.getenv(key)
+    if v is None or not v.strip():
+        return default
+    try:
+        return float(v)
+    except ValueError:
+        return default
+
+
+# --- 参加の集中（レイド）時の軽量モード ---
+DEFAULT_RAID_THRESHOLD = 8   # 窓の中の参加人数（RAID_JOIN_THRESHOLD）
+DEFAULT_RAID_WINDOW = 60     # 秒（RAID_WINDOW_SECONDS）
+VERIFY_CHANNEL_NAME = "welcome-verify"
+RAID_FLUSH_SECONDS = 5.0     # 共有チャンネルへの案内はこの間隔でまとめて送る
+RAID_MENTIONS_PER_MESSAGE = 50
+RAID_DRAIN_INTERVAL = 2.0    # 落ち着いたあと、待ってもらった人の部屋を作る間隔
+
 
 class Welcome(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.user_answers = {}
         self.processing_users = set()
+        # 時間帯ボタンはまとめて押されるので、既定より緩めの連打制限
+        get_moderator().configure("welcome_answer", per_minute=30, burst=8)
 
-        # --- 環境変数設定 ---
-        self.GUILD_ID = int(os.getenv("GUILD_ID"))
-        self.ADMIN_ID = int(os.getenv("ADMIN_ID"))
-        self.ROLE_A = int(os.getenv("ROLE_A"))
-        self.ROLE_B = int(os.getenv("ROLE_B"))
-        self.ROLE_C = int(os.getenv("ROLE_C"))
-        self.LEAVE_LOG_CHANNEL_ID = int(os.getenv("LEAVE_LOG_CHANNEL_ID"))
+        # --- ギルドごとの設定（ADMIN_ID / ROLE_A〜C / MANAGER_ROLE_IDS）---
+        self.config = get_config()
         self.WELCOME_CATEGORY_NAME = "welcome"
         self.LOG_CATEGORY_NAME = "log"
 
-        self.MANAGER_ROLE_IDS = {
-            int(r) for r in os.getenv("MANAGER_ROLE_IDS", "").split(",") if r.strip().isdigit()
-        }
+        # --- レイド検知。レイド中は部屋を作らず、共有チャンネルで待ってもらう ---
+        self.raid = RaidDetector(
+            young_days=_get_env_float("RAID_YOUNG_DAYS", 7.0),
+            calm=_get_env_float("RAID_CALM_SECONDS", 300.0),
+        )
+        self.pending: dict[int, dict[int, None]] = {}  # guild_id → 部屋待ちの member_id（参加順）
+        self._unannounced: dict[int, list[int]] = {}   # guild_id → まだ案内していない member_id
+        self._flush_scheduled: set[int] = set()
+        self._verify_ids: dict[int, int] = {}
+        self._drains: dict[int, asyncio.Task] = {}
+
+    async def cog_unload(self) -> None:
+        get_scheduler().cancel_prefix("welcome_raid:")
+        for task in self._drains.values():
+            task.cancel()
 
     # ------------------------------------------------------
     # ✅ 管理者判定
     # ------------------------------------------------------
+    def admin_id(self, guild_id: int) -> int:
+        return self.config.get_int(guild_id, "ADMIN_ID")
+
+    def staff_role_ids(self, guild_id: int) -> set[int]:
+        roles = {self.config.get_int(guild_id, k) for k in ("ROLE_A", "ROLE_B", "ROLE_C")}
+        roles.discard(0)
+        return roles
+
     def is_manager(self, member: discord.Member):
-        if member.id == self.ADMIN_ID:
+        if member.id == self.admin_id(member.guild.id):
             return True
-        return any(role.id in self.MANAGER_ROLE_IDS for role in member.roles)
+        managers = self.config.get_ids(member.guild.id, "MANAGER_ROLE_IDS")
+        return any(role.id in managers for role in member.roles)
 
     # ------------------------------------------------------
     # ✅ 担当者ランダム選出
     # ------------------------------------------------------
     async def pick_staff(self, guild: discord.Guild):
-        roleA = guild.get_role(self.ROLE_A)
-        roleB = guild.get_role(self.ROLE_B)
-        roleC = guild.get_role(self.ROLE_C)
-
-        candidates = [
-            m for m in guild.members
-            if (roleA in m.roles) or (roleB in m.roles) or (roleC in m.roles)
-        ]
-        if not candidates:
+        staff_roles = self.staff_role_ids(guild.id)
+        if not staff_roles:
             return None
 
+        # VCにいるメンバーは voice キャッシュにいるので、まずそこから探す
         vc_members = []
         for vc in guild.voice_channels:
             for m in vc.members:
-                if m in candidates:
+                if any(r.id in staff_roles for r in m.roles):
                     vc_members.append(m)
-
-        return random.choice(vc_members) if vc_members else random.choice(candidates)
+        if vc_members:
+            return random.choice(vc_members)
+
+        # いなければ担当ロールのメンバーIDから選ぶ（全体の取得は数分に1回）
+        candidates = await member_ids_with_roles(guild, staff_roles)
+        random.shuffle(candidates)
+        for uid in candidates[:3]:
+            member = await get_or_fetch_member(guild, uid)
+            if member is not None:
+                return member
+        return None
 
     # ------------------------------------------------------
     # ✅ Welcome Embed
@@ -88,6 +139,7 @@ class Welcome(commands.Cog):
             self.member = member
 
         @discord.ui.button(label="はい", style=discord.ButtonStyle.green)
+        @timed("welcome:age")
         async def yes(self, i, b):
             if i.user != self.member:
                 return await i.response.send_message("あなた専用です！", ephemeral=True)
@@ -98,6 +150,7 @@ class Welcome(commands.Cog):
             )
 
         @discord.ui.button(label="いいえ", style=discord.ButtonStyle.gray)
+        @timed("welcome:age")
         async def no(self, i, b):
             if i.user != self.member:
                 return await i.response.send_message("あなた専用です！", ephemeral=True)
@@ -123,12 +176,15 @@ class Welcome(commands.Cog):
             )
 
         @discord.ui.button(label="男", style=discord.ButtonStyle.blurple)
+        @timed("welcome:gender")
         async def male(self, i, b): await self.set_gender(i, "男")
 
         @discord.ui.button(label="女", style=discord.ButtonStyle.blurple)
+        @timed("welcome:gender")
         async def female(self, i, b): await self.set_gender(i, "女")
 
         @discord.ui.button(label="その他", style=discord.ButtonStyle.blurple)
+        @timed("welcome:gender")
         async def other(self, i, b): await self.set_gender(i, "その他")
 
     class Question3(View):
@@ -140,6 +196,9 @@ class Welcome(commands.Cog):
         async def toggle(self, i, label, b):
             if i.user != self.member:
                 return await i.response.send_message("あなた専用です！", ephemeral=True)
+            verdict = get_moderator().check("welcome_answer", i.user.id)
+            if not verdict.ok:
+                return await i.response.send_message(verdict.message(), ephemeral=True)
             await i.response.defer()
             ans = self.cog.user_answers[self.member.id]
             ans.setdefault("time", [])
@@ -154,21 +213,26 @@ class Welcome(commands.Cog):
             await i.message.edit(view=self)
 
         @discord.ui.button(label="朝", style=discord.ButtonStyle.green)
+        @timed("welcome:time")
         async def morning(self, i, b): await self.toggle(i, "朝", b)
         @discord.ui.button(label="昼", style=discord.ButtonStyle.green)
+        @timed("welcome:time")
         async def noon(self, i, b): await self.toggle(i, "昼", b)
         @discord.ui.button(label="夜", style=discord.ButtonStyle.green)
+        @timed("welcome:time")
         async def night(self, i, b): await self.toggle(i, "夜", b)
         @discord.ui.button(label="深夜", style=discord.ButtonStyle.green)
+        @timed("welcome:time")
         async def midnight(self, i, b): await self.toggle(i, "深夜", b)
 
         @discord.ui.button(label="✅ 完了", style=discord.ButtonStyle.red)
+        @timed("welcome:done")
         async def done(self, i, b):
             if i.user != self.member:
                 return await i.response.send_message("あなた専用です！", ephemeral=True)
             ans = self.cog.user_answers[self.member.id]
             times = ", ".join(ans.get("time", [])) or "未回答"
-            staff_id = ans.get("staff_id", self.cog.ADMIN_ID)
+            staff_id = ans.get("staff_id", self.cog.admin_id(i.guild_id))
             summary = (
                 "🎉 **回答ありがとうございます！**\n\n"
                 f"📌 年齢 → {ans['age']}\n"
@@ -176,13 +240,15 @@ class Welcome(commands.Cog):
                 f"📌 時間帯 → {times}\n\n"
                 f"<@{staff_id}> が確認します！"
             )
-            await i.response.edit_message(content=summary, view=None)
+            await i.response.edit_message(
+                content=summary, view=None, allowed_mentions=text_filter.USER_MENTIONS
+            )
 
     # ------------------------------------------------------
     # ✅ チャンネル作成処理
     # ------------------------------------------------------
     async def create_welcome_room(self, member):
-        guild = self.bot.get_guild(self.GUILD_ID)
+        guild = member.guild
 
         if member.id in self.processing_users:
             print(f"⚠️ Skipped duplicate welcome for {member}")
@@ -191,8 +257,9 @@ class Welcome(commands.Cog):
 
         try:
             staff = await self.pick_staff(guild)
-            staff_id = staff.id if staff else self.ADMIN_ID
-            staff_mention = staff.mention if staff else f"<@{self.ADMIN_ID}>"
+            admin_id = self.admin_id(guild.id)
+            staff_id = staff.id if staff else admin_id
+            staff_mention = staff.mention if staff else f"<@{admin_id}>"
             self.user_answers[member.id] = {"staff_id": staff_id}
 
             category = discord.utils.get(guild.categories, name=self.WELCOME_CATEGORY_NAME)
@@ -231,7 +298,10 @@ class Welcome(commands.Cog):
             ch = await guild.create_text_channel(name, category=category, overwrites=overwrites)
 
             try:
-                await ch.send(f"🔥 ようこそ {member.mention} さん！\n案内担当 → {staff_mention}")
+                await ch.send(
+                    f"🔥 ようこそ {member.mention} さん！\n案内担当 → {staff_mention}",
+                    allowed_mentions=text_filter.USER_MENTIONS,
+                )
                 await ch.send(embed=self.welcome_embed())
                 await ch.send("🧩 **Q1. 25歳以上ですか？**", view=self.Question1(self, member))
             except discord.Forbidden:
@@ -252,16 +322,226 @@ class Welcome(commands.Cog):
         finally:
             self.processing_users.discard(member.id)
 
+    # ------------------------------------------------------
+    # ✅ レイド時の軽量モード
+    # ------------------------------------------------------
+    def raid_threshold(self, guild_id: int) -> int:
+        return self.config.get_int(guild_id, "RAID_JOIN_THRESHOLD", DEFAULT_RAID_THRESHOLD)
+
+    def raid_window(self, guild_id: int) -> int:
+        return self.config.get_int(guild_id, "RAID_WINDOW_SECONDS", DEFAULT_RAID_WINDOW)
+
+    def raid_stats(self, guild_id: int) -> t_raid_stats:
+        return self.raid.stats(guild_id, self.raid_window(guild_id))
+
+    def raid_embed(self, guild_id: int, title: str, color: int) -> discord.Embed:
+        st = self.raid_stats(guild_id)
+        embed = discord.Embed(title=title, color=color)
+        embed.add_field(
+            name="📈 参加",
+            value=f"直近 {st.window}秒で **{st.joins}人**（{st.per_minute:.1f}人/分）\n"
+                  f"しきい値: {self.raid_threshold(guild_id)}人",
+            inline=False,
+        )
+        embed.add_field(
+            name="🆕 新しいアカウント",
+            value=f"{st.young}人（{st.young_ratio:.0%}）",
+            inline=True,
+        )
+        embed.add_field(
+            name="👯 似た名前",
+            value=f"{st.similar}人（{st.similar_ratio:.0%}）",
+            inline=True,
+        )
+        if st.raid:
+            mode = f"🛡️ 軽量モード（<t:{int(st.since)}:R> から・最大 {st.peak}人）"
+        else:
+            mode = "通常"
+        embed.add_field(name="⚙️ モード", value=mode, inline=False)
+        embed.add_field(
+            name="⏳ 部屋待ち", value=f"{len(self.pending.get(guild_id, ()))}人", inline=True
+        )
+        return embed
+
+    async def alert_staff(self, guild: discord.Guild, embed: discord.Embed) -> None:
+        """退出ログのチャンネルにスタッフ向けの通知を出す（未設定ならコンソールだけ）。"""
+        channel_id = self.config.get_int(guild.id, "LEAVE_LOG_CHANNEL_ID")
+        channel = guild.get_channel(channel_id) if channel_id else None
+        if channel is None:
+            print(f"⚠️ Raid alert not sent (no leave log channel, guild={guild.id})")
+            return
+        try:
+            await channel.send(embed=embed)
+        except discord.HTTPException as e:
+            print(f"⚠️ Raid alert failed (guild={guild.id}): {e}")
+
+    async def verify_channel(self, guild: discord.Guild):
+        """レイド中に待ってもらう共有チャンネル。無ければ welcome カテゴリに作る（書き込みは不可）。"""
+        ch = guild.get_channel(self._verify_ids.get(guild.id, 0))
+        if ch is None:
+            ch = discord.utils.get(guild.text_channels, name=VERIFY_CHANNEL_NAME)
+        if ch is None:
+            try:
+                category = discord.utils.get(guild.categories, name=self.WELCOME_CATEGORY_NAME)
+                if category is None:
+                    category = await guild.create_category(self.WELCOME_CATEGORY_NAME)
+                ch = await guild.create_text_channel(
+                    VERIFY_CHANNEL_NAME,
+                    category=category,
+                    overwrites={
+                        guild.default_role: discord.PermissionOverwrite(
+                            view_channel=True, send_messages=False, add_reactions=False
+                        ),
+                        guild.me: discord.PermissionOverwrite(view_channel=True, send_messages=True),
+                    },
+                )
+            except discord.HTTPException as e:
+                print(f"❌ Cannot create {VERIFY_CHANNEL_NAME} (guild={guild.id}): {e}")
+                return None
+        self._verify_ids[guild.id] = ch.id
+        return ch
+
+    def _schedule_calm(self, guild_id: int, at: float) -> None:
+        get_scheduler().call_at(
+            at, f"welcome_raid:calm:{guild_id}", functools.partial(self._check_calm, guild_id)
+        )
+
+    async def hold_member(self, member: discord.Member) -> None:
+        """部屋は後で作る。案内は RAID_FLUSH_SECONDS ごとにまとめて共有チャンネルへ。"""
+        gid = member.guild.id
+        self.pending.setdefault(gid, {})[member.id] = None
+        self._unannounced.setdefault(gid, []).append(member.id)
+        if gid not in self._flush_scheduled:
+            self._flush_scheduled.add(gid)
+            get_scheduler().call_at(
+                time.time() + RAID_FLUSH_SECONDS,
+                f"welcome_raid:flush:{gid}",
+                functools.partial(self._flush, gid),
+            )
+
+    async def _flush(self, guild_id: int) -> None:
+        self._flush_scheduled.discard(guild_id)
+        waiting = self.pending.get(guild_id, {})
+        ids = [uid for uid in self._unannounced.pop(guild_id, []) if uid in waiting]
+        guild = self.bot.get_guild(guild_id)
+        if not ids or guild is None:
+            return
+        ch = await self.verify_channel(guild)
+        if ch is None:
+            return
+        head = (
+            "🛡️ ただいま参加が集中しているため、案内のお部屋は落ち着いてから順番にお作りします。\n"
+            "このチャンネルで少しだけお待ちください🐶\n"
+        )
+        for i in range(0, len(ids), RAID_MENTIONS_PER_MESSAGE):
+            mentions = " ".join(f"<@{uid}>" for uid in ids[i:i + RAID_MENTIONS_PER_MESSAGE])
+            try:
+                await ch.send(head + mentions, allowed_mentions=text_filter.USER_MENTIONS)
+            except discord.HTTPException as e:
+                print(f"⚠️ Raid notice failed (guild={guild_id}): {e}")
+                return
+
+    async def _check_calm(self, guild_id: int) -> None:
+        guild = self.bot.get_guild(guild_id)
+        if guild is None:
+            return
+        if not self.raid.settle(guild_id, self.raid_threshold(guild_id)):
+            if self.raid.is_raid(guild_id):
+                # 参加がまだ多い: 窓が空くころにもう一度見る
+                self._schedule_calm(
+                    guild_id, max(self.raid.calm_at(guild_id), time.time() + self.raid_window(guild_id))
+                )
+            return
+        print(f"✅ Raid mode ended (guild={guild_id}, pending={len(self.pending.get(guild_id, ()))})")
+        await self.alert_staff(guild, self.raid_embed(guild_id, "✅ 参加の集中が落ち着きました", 0x57F287))
+        task = self._drains.get(guild_id)
+        if task is None or task.done():
+            self._drains[guild_id] = asyncio.create_task(self._drain(guild))
+
+    async def _drain(self, guild: discord.Guild) -> None:
+        """待ってもらった人の部屋を参加順に作る。またレイドになったら残りはそのまま待ってもらう。"""
+        waiting = self.pending.get(guild.id, {})
+        made = gone = failed = 0
+        while waiting and not self.raid.is_raid(guild.id):
+            uid = next(iter(waiting))
+            del waiting[uid]
+            member = guild.get_member(uid)
+            if member is None:
+                try:
+                    member = await guild.fetch_member(uid)
+                except discord.NotFound:
+                    gone += 1  # 退出済み
+                    continue
+                except discord.HTTPException as e:
+                    failed += 1
+                    print(f"⚠️ Deferred welcome dropped: could not fetch {uid} (guild={guild.id}): {e}")
+                    continue
+            if await self.create_welcome_room(member) is not None:
+                made += 1
+            else:
+                failed += 1
+                print(f"⚠️ Deferred welcome room failed for {member} ({uid})")
+            await asyncio.sleep(RAID_DRAIN_INTERVAL)
+        print(
+            f"🏠 Deferred welcome rooms created: {made} "
+            f"(guild={guild.id}, left={gone}, failed={failed}, still waiting={len(waiting)})"
+        )
+
+    @commands.Cog.listener()
+    @timed("on_raw_member_remove:welcome")
+    async def on_raw_member_remove(self, payload: discord.RawMemberRemoveEvent):
+        waiting = self.pending.get(payload.guild_id)
+        if waiting:
+            waiting.pop(payload.user.id, None)
+
     # ------------------------------------------------------
     # ✅ on_member_join（競合防止）
     # ------------------------------------------------------
     @commands.Cog.listener()
+    @timed("on_member_join:welcome")
     async def on_member_join(self, member):
         if member.id in self.processing_users:
             print(f"⚠️ Skipped auto-create for {member} (manual welcome running)")
             return
+        guild = member.guild
+        if not self.staff_role_ids(guild.id) and not self.admin_id(guild.id):
+            return  # welcome 未設定のサーバー
+
+        started = self.raid.observe(
+            guild.id,
+            member.created_at.timestamp(),
+            member.name,
+            threshold=self.raid_threshold(guild.id),
+            window=self.raid_window(guild.id),
+        )
+        if self.raid.is_raid(guild.id):
+            # 名前のチェックやスタッフ選びも省いて、待ち行列に入れるだけにする
+            await self.hold_member(member)
+            self._schedule_calm(guild.id, self.raid.calm_at(guild.id))
+            if started:
+                print(f"🛡️ Raid mode started (guild={guild.id})")
+                await self.alert_staff(
+                    guild, self.raid_embed(guild.id, "🛡️ 参加が集中しています（軽量モード）", 0xED4245)
+                )
+            return
+
+        if text_filter.find_forbidden(member.display_name) == "invite":
+            print(f"⚠️ Joined with an invite link in the name: {member} ({member.id})")
+        verdict = get_moderator().check("welcome", member.id, member.display_name, rate=False)
+        if verdict.reason == "ng_word":
+            print(f"⚠️ Joined with an NG word in the name: {member} ({member.id}) → {verdict.detail}")
         await self.create_welcome_room(member)
 
+    # ------------------------------------------------------
+    # ✅ /raid_status コマンド
+    # ------------------------------------------------------
+    @app_commands.command(name="raid_status", description="参加の集中（レイド）検知の状況を表示します")
+    async def raid_status_slash(self, interaction: discord.Interaction):
+        if not self.is_manager(interaction.user):
+            return await interaction.response.send_message("⛔ 管理者のみ実行可", ephemeral=True)
+        embed = self.raid_embed(interaction.guild_id, "🛡️ 参加の状況", 0x5865F2)
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
     # ------------------------------------------------------
     # ✅ /welcome コマンド
     # ------------------------------------------------------
@@ -278,7 +558,7 @@ class Welcome(commands.Cog):
             )
 
         await interaction.response.send_message(
-            f"✅ {user.display_name} の部屋を作成しました → {ch.mention}",
+            f"✅ {text_filter.neutralize(user.display_name)} の部屋を作成しました → {ch.mention}",
             ephemeral=False
         )
 
@@ -290,7 +570,7 @@ class Welcome(commands.Cog):
         if not self.is_manager(interaction.user):
             return await interaction.response.send_message("⛔ 管理者のみ実行可", ephemeral=True)
 
-        guild = self.bot.get_guild(self.GUILD_ID)
+        guild = interaction.guild
         log_cat = discord.utils.get(guild.categories, name=self.LOG_CATEGORY_NAME)
         if log_cat is None:
             log_cat = await guild.create_category(self.LOG_CATEGORY_NAME)
@@ -301,20 +581,6 @@ class Welcome(commands.Cog):
             ephemeral=False
         )
 
-    # ------------------------------------------------------
-    # ✅ 起動後同期
-    # ------------------------------------------------------
-    @commands.Cog.listener()
-    async def on_ready(self):
-        guild = discord.Object(id=self.GUILD_ID)
-        try:
-            self.bot.tree.add_command(self.welcome_slash, guild=guild)
-            self.bot.tree.add_command(self.ok_slash, guild=guild)
-            synced = await self.bot.tree.sync(guild=guild)
-            print(f"✅ Slash commands synced to guild {self.GUILD_ID}: {[cmd.name for cmd in synced]}")
-        except Exception as e:
-            print(f"⚠️ Failed to sync slash commands: {e}")
-
 
 async def setup(bot):
     await bot.add_cog(Welcome(bot))
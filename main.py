@@ -1,57 +1,309 @@
 import os
+import time
 import asyncio
+from datetime import datetime, timezone
+
 import discord
 from dotenv import load_dotenv
 from discord.ext import commands
 
+from utils import jsonio
+from utils.command_sync import SyncCoordinator
+from utils.guild_config import get_config
+from utils.metrics import InstrumentedTree, process_rss_mb, rate_limit_trace
+from utils.panels import get_panels
+
+BOOT_STARTED = time.perf_counter()
+
 load_dotenv()
-intents = discord.Intents.all()
+
+# PERF_PROFILE=fast で orjson / uvloop を使う（入っていなければ標準のまま）
+PERF_PROFILE = (os.getenv("PERF_PROFILE") or "").strip().lower()
+print(f"⚙️ Perf profile: {PERF_PROFILE or 'default'} (json: {jsonio.configure(PERF_PROFILE)})")
 
 COGS = [
+    "cogs.guild_settings",
     "cogs.welcome",
     "cogs.reaction_roles",
     "cogs.valomap",
     "cogs.leave_log",
     "cogs.valocheck",
+    "cogs.valocheck_stats",
     "cogs.valorecruit",
     "cogs.dm_forward",
-    "cogs.2025_xmas_gacha",
     "cogs.2026_joya_gacha",
-    "cogs.2026_omikuji_gacha",
+    "cogs.events",
+    "cogs.bot_stats",
 ]
 
-class MyBot(commands.Bot):
+# 季節Cog：期間外は読み込まない（.env で "開始/終了" のISO形式で上書き可）
+# SEASONAL_FORCE=all または カンマ区切りのCog名 で期間外でも読み込む
+SEASONAL_COGS = {
+    "cogs.2026_joya_gacha": (
+        "JOYA_WINDOW",
+        "2025-12-31T00:00:00+09:00/2026-01-08T00:00:00+09:00",
+    ),
+}
+
+
+# Cogごとに必要な Gateway intents とメンバーキャッシュ（discord.MemberCacheFlags の名前）
+# 読み込むCogの分だけを有効にする。INTENTS_MODE=all で従来どおり全部。
+# "joined" は参加した人と、更新イベントが届いた人をキャッシュする（起動時の全件取得はしない）。
+# キャッシュに頼らないCogも、何を使うかをここに書いておく（空なら guilds だけで動く）。
+COG_REQUIREMENTS = {
+    "cogs.guild_settings": {},
+    # 新規参加者の get_member（待ってもらった人の部屋作り・回答ボタン）と担当スタッフのVC在席
+    "cogs.welcome": {"intents": ("members", "voice_states"), "cache": ("voice", "joined")},
+    # メンバーは payload.member か fetch で取る
+    "cogs.reaction_roles": {"intents": ("guild_reactions", "emojis_and_stickers")},
+    "cogs.valomap": {},
+    "cogs.leave_log": {"intents": ("members", "moderation")},
+    # メンバーは interaction.user か fetch_member で取り、ロールは guild.get_role（guilds で足りる）
+    "cogs.valocheck": {},
+    "cogs.valocheck_stats": {},
+    # お誘いの索引: ロールの変更（on_member_update はキャッシュにいる人にしか届かない）とVC在席
+    "cogs.valorecruit": {"intents": ("members", "voice_states"), "cache": ("voice", "joined")},
+    "cogs.dm_forward": {"intents": ("dm_messages", "message_content")},
+    # メンバーは interaction.user か get_or_fetch_member で取る
+    "cogs.2026_joya_gacha": {},
+    # 全員の名前戻しは chunk_members、VCポイントは VC にいる人のキャッシュ
+    "cogs.events": {"intents": ("members", "voice_states"), "cache": ("voice",)},
+    "cogs.bot_stats": {},
+}
+
+
+def _parse_window(raw: str):
+    try:
+        start_raw, end_raw = raw.split("/", 1)
+        start = datetime.fromisoformat(start_raw.strip())
+        end = datetime.fromisoformat(end_raw.strip())
+    except ValueError:
+        return None
+    if start.tzinfo is None or end.tzinfo is None:
+        return None
+    return start, end
+
+
+def _seasonal_skip_reason(cog: str):
+    if cog not in SEASONAL_COGS:
+        return None
+    force = {x.strip() for x in os.getenv("SEASONAL_FORCE", "").split(",") if x.strip()}
+    if "all" in force or cog in force:
+        return None
+    key, default = SEASONAL_COGS[cog]
+    window = _parse_window(os.getenv(key) or default)
+    if window is None:
+        return f"invalid {key}"
+    start, end = window
+    now = datetime.now(timezone.utc)
+    if start <= now < end:
+        return None
+    return f"outside {start.isoformat()} - {end.isoformat()}"
+
+
+FULL_CACHE = os.getenv("INTENTS_MODE", "").strip().lower() == "all"
+
+
+def _build_intents(cogs):
+    if FULL_CACHE:
+        return discord.Intents.all(), discord.MemberCacheFlags.from_intents(discord.Intents.all())
+
+    intents = discord.Intents.none()
+    intents.guilds = True
+    cache = discord.MemberCacheFlags.none()
+    for cog in cogs:
+        if cog not in COG_REQUIREMENTS:
+            print(f"⚠️ {cog} has no COG_REQUIREMENTS entry (guilds intent only)")
+        req = COG_REQUIREMENTS.get(cog, {})
+        for name in req.get("intents", ()):
+            setattr(intents, name, True)
+        for name in req.get("cache", ()):
+            setattr(cache, name, True)
+    return intents, cache
+
+
+# 起動時に一度だけ決める（intents の計算と setup_hook で同じ判定を使う）
+SKIPPED = {cog: reason for cog in COGS if (reason := _seasonal_skip_reason(cog)) is not None}
+ACTIVE_COGS = [cog for cog in COGS if cog not in SKIPPED]
+intents, member_cache_flags = _build_intents(ACTIVE_COGS)
+print(
+    "🧩 Intents: " + ", ".join(name for name, on in intents if on)
+    + " / member cache: " + (", ".join(name for name, on in member_cache_flags if on) or "none")
+)
+
+
+class StartupProfiler:
+    """Cogごとの import / __init__ / cog_load と同期時間を記録する。"""
+
+    def __init__(self):
+        self.rows = []
+        self.marks = None
+        self.sync_sec = 0.0
+
+    def begin(self, cog: str):
+        self.marks = {"name": cog, "start": time.perf_counter()}
+
+    def mark(self, key: str):
+        if self.marks is not None:
+            self.marks.setdefault(key, time.perf_counter())
+
+    def end(self, status: str):
+        m = self.marks
+        self.marks = None
+        if m is None:
+            return
+        done = time.perf_counter()
+        start = m["start"]
+        new = m.get("new", done)
+        add = m.get("add_cog", done)
+        added = m.get("added", done)
+        self.rows.append(
+            (
+                m["name"],
+                new - start,
+                add - new,
+                added - add,
+                done - start,
+                status,
+            )
+        )
+
+    def report(self) -> str:
+        lines = [
+            f"{'cog':<28} {'import':>8} {'__init__':>9} {'cog_load':>9} {'total':>8}  status"
+        ]
+        total = 0.0
+        for name, t_imp, t_init, t_load, t_all, status in self.rows:
+            total += t_all
+            lines.append(
+                f"{name:<28} {t_imp * 1000:>6.1f}ms {t_init * 1000:>7.1f}ms "
+                f"{t_load * 1000:>7.1f}ms {t_all * 1000:>6.1f}ms  {status}"
+            )
+        lines.append(f"{'(cogs total)':<28} {total * 1000:>6.1f}ms")
+        lines.append(f"{'(tree.sync)':<28} {self.sync_sec * 1000:>6.1f}ms")
+        return "\n".join(lines)
+
+
+# SHARDED=1 で AutoShardedBot を使う（SHARD_COUNT 未指定なら Discord 推奨数）
+SHARDED = os.getenv("SHARDED", "") == "1"
+_BotBase = commands.AutoShardedBot if SHARDED else commands.Bot
+
+
+class MyBot(_BotBase):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.profiler = StartupProfiler()
+        self.command_sync = SyncCoordinator(self.tree)
+        self.ready_reported = False
+
+    async def add_cog(self, cog, /, **kwargs) -> None:
+        self.profiler.mark("add_cog")
+        await super().add_cog(cog, **kwargs)
+        self.profiler.mark("added")
+
+    async def _load_profiled(self, cog: str) -> None:
+        # Cog.__new__ は __init__ の直前に呼ばれるので、そこで import と __init__ を切り分ける
+        profiler = self.profiler
+        orig_new = commands.Cog.__new__
+
+        def _new(cls, *args, **kwargs):
+            profiler.mark("new")
+            return orig_new(cls, *args, **kwargs)
+
+        profiler.begin(cog)
+        commands.Cog.__new__ = _new
+        try:
+            await self.load_extension(cog)
+        except Exception as e:
+            profiler.end("failed")
+            print(f"❌ Failed to load {cog}: {e}")
+            return
+        finally:
+            commands.Cog.__new__ = orig_new
+        profiler.end("loaded")
+        print(f"✅ Loaded: {cog}")
+
     async def setup_hook(self) -> None:
         for cog in COGS:
-            try:
-                await self.load_extension(cog)
-                print(f"✅ Loaded: {cog}")
-            except Exception as e:
-                print(f"❌ Failed to load {cog}: {e}")
+            reason = SKIPPED.get(cog)
+            if reason is not None:
+                self.profiler.rows.append((cog, 0.0, 0.0, 0.0, 0.0, f"skipped ({reason})"))
+                print(f"⏭️ Skipped: {cog} ({reason})")
+                continue
+            await self._load_profiled(cog)
 
-        guild = discord.Object(id=int(os.getenv("GUILD_ID")))
+        # 各Cogが登録したパネルの永続Viewをまとめて登録し、ログイン後に一度だけ確認する
+        get_panels().start(self)
 
-        # Cog側の @app_commands.command をギルドに即反映させる
-        self.tree.copy_global_to(guild=guild)
-        await self.tree.sync(guild=guild)
+        # Cog側の @app_commands.command を設定のある各ギルドに即反映させる
+        # ツリーが前回から変わっていなければスキップする
+        started = time.perf_counter()
+        force = os.getenv("COMMAND_SYNC_FORCE", "") == "1"
+        for guild_id in get_config().guild_ids():
+            await self.sync_guild(discord.Object(id=guild_id), force=force)
+        self.profiler.sync_sec = time.perf_counter() - started
 
-        print(
-            f"✅ Slash commands synced to guild {guild.id}: "
-            f"{[cmd.name for cmd in self.tree.get_commands(guild=guild)]}"
-        )
+        print("⏱ Startup profile\n" + self.profiler.report())
+        print(f"🧠 RSS after setup: {process_rss_mb():.1f} MB")
+
+    async def sync_guild(self, guild, force: bool = False) -> None:
+        self.tree.copy_global_to(guild=guild)
+        try:
+            synced = await self.command_sync.sync(guild=guild, force=force)
+        except discord.HTTPException as e:
+            print(f"⚠️ Slash command sync failed for guild {guild.id}: {e}")
+            return
+        names = [cmd.name for cmd in self.tree.get_commands(guild=guild)]
+        if synced:
+            print(f"✅ Slash commands synced to guild {guild.id}: {names}")
+        else:
+            print(f"✅ Slash commands unchanged for guild {guild.id} (sync skipped): {names}")
 
 bot = MyBot(
     command_prefix="/",
     intents=intents,
+    member_cache_flags=member_cache_flags,
+    # メンバーは起動時にまとめて取得しない。必要なCogがギルド単位で取りに行く（utils/members.py）
+    chunk_guilds_at_startup=FULL_CACHE,
+    max_messages=1000 if FULL_CACHE else None,
+    tree_cls=InstrumentedTree,
+    # REST 429 を HTTP クライアントの応答で数える（/bot_stats）
+    http_trace=rate_limit_trace(),
+    **({"shard_count": int(os.getenv("SHARD_COUNT"))} if SHARDED and os.getenv("SHARD_COUNT") else {}),
     application_id=int(os.getenv("APPLICATION_ID")),
 )
 
 @bot.event
 async def on_ready():
     print(f"✅ Logged in as {bot.user} ({bot.user.id})")
+    if not bot.ready_reported:
+        bot.ready_reported = True
+        print(f"⏱ Restart-to-ready: {time.perf_counter() - BOOT_STARTED:.2f}s")
+    members = sum(len(g.members) for g in bot.guilds)
+    print(f"🧠 RSS: {process_rss_mb():.1f} MB (guilds: {len(bot.guilds)}, cached members: {members})")
+    if SHARDED:
+        print(f"🧩 Shards: {bot.shard_count}")
+
+@bot.event
+async def on_guild_join(guild: discord.Guild):
+    # 新しいギルドにもコマンドを出す（設定は /guild_config_set で入れてもらう）
+    print(f"➕ Joined guild {guild.name} ({guild.id})")
+    await bot.sync_guild(guild)
 
 async def main():
     await bot.start(os.getenv("DISCORD_TOKEN"))
 
+def _install_event_loop() -> None:
+    if PERF_PROFILE != "fast":
+        return
+    try:
+        import uvloop
+    except ImportError:
+        print("⚠️ uvloop is not installed; using the default asyncio loop")
+        return
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    print("⚙️ Event loop: uvloop")
+
 if __name__ == "__main__":
+    _install_event_loop()
     asyncio.run(main())
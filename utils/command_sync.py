@@ -0,0 +1,70 @@
+import hashlib
+import os
+
+from discord import app_commands
+
+from utils import jsonio
+
+DEFAULT_STATE_PATH = "data/command_sync.json"
+
+
+def tree_signature(tree: app_commands.CommandTree, guild=None) -> str:
+    """コマンドツリーをAPIに送る形に直列化してハッシュ化する。"""
+    payload = [cmd.to_dict(tree) for cmd in tree.get_commands(guild=guild)]
+    payload.sort(key=lambda d: (d.get("type", 1), d.get("name", "")))
+    raw = jsonio.canonical(payload)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class SyncCoordinator:
+    """
+    tree.sync をまとめて引き受ける。前回同期したツリーのハッシュをディスクに残し、
+    変わったときだけ sync を呼ぶ（再接続や再起動で同期APIを叩かない）。
+    """
+
+    def __init__(self, tree: app_commands.CommandTree, path: str = DEFAULT_STATE_PATH):
+        self.tree = tree
+        self.path = path
+        self._state = self._load()
+
+    def _load(self) -> dict:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = jsonio.load(f)
+            if isinstance(data, dict):
+                return data
+        except (OSError, ValueError):
+            pass
+        return {}
+
+    def _save(self) -> None:
+        d = os.path.dirname(self.path)
+        if d:
+            os.makedirs(d, exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            jsonio.dump(self._state, f)
+        os.replace(tmp, self.path)
+
+    @staticmethod
+    def _key(guild) -> str:
+        return "global" if guild is None else str(guild.id)
+
+    async def sync(self, guild=None, force: bool = False) -> bool:
+        """同期した場合は True、ハッシュが同じでスキップした場合は False。"""
+        key = self._key(guild)
+        sig = tree_signature(self.tree, guild)
+        if not force and self._state.get(key) == sig:
+            return False
+        await self.tree.sync(guild=guild)
+        self._state[key] = sig
+        try:
+            self._save()
+        except OSError as e:
+            print(f"⚠️ Failed to save command sync state: {e}")
+        return True
+
+    def forget(self, guild=None) -> None:
+        """次回の sync を強制したいとき用。"""
+        self._state.pop(self._key(guild), None)
+
@@ -0,0 +1,392 @@
+import csv
+import glob
+import os
+import random
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from utils import jsonio
+from utils.metrics import track_flush
+
+# 季節イベントの定義（data/events/<id>.json）と共通ストア。
+# Cog は cogs/events.py。イベント追加はファイルを置いて /event_reload するだけ。
+
+DEFAULT_DIR = os.path.join("data", "events")
+DEFAULT_STATE_PATH = os.path.join("data", "events_state.json")
+STATE_NONE = "__NONE__"
+
+DEFAULT_COLORS = {"UR": 0xFFD700, "SR": 0xC77DFF, "R": 0x4D96FF}
+
+
+@dataclass(frozen=True)
+class t_event_reward:
+    weight: int
+    rarity: str
+    icon: str
+    title: str
+    name: str
+    desc: str
+
+
+class RewardSampler:
+    """累積重みを一度だけ作って random.choices(cum_weights=...) で引く。"""
+
+    def __init__(self, rewards: List[t_event_reward]):
+        self.rewards = list(rewards)
+        self._cum: List[int] = []
+        # レアリティの良し悪しは定義で先に出てきた順（上ほど良い）
+        self._rank: Dict[str, int] = {}
+        total = 0
+        for r in self.rewards:
+            total += r.weight
+            self._cum.append(total)
+            self._rank.setdefault(r.rarity, len(self._rank))
+
+    def __len__(self) -> int:
+        return len(self.rewards)
+
+    def draw(self, k: int = 1, rng: random.Random = random) -> List[t_event_reward]:
+        if not self.rewards:
+            return []
+        return rng.choices(self.rewards, cum_weights=self._cum, k=k)
+
+    def rarity_rank(self, rarity: str) -> int:
+        return self._rank.get(rarity, len(self._rank))
+
+    def best(self, picks: List[t_event_reward]) -> t_event_reward:
+        """一番良いもの。レアリティが同じなら出にくい（weight が小さい）方。"""
+        return min(picks, key=lambda r: (self.rarity_rank(r.rarity), r.weight))
+
+
+@dataclass(frozen=True)
+class t_event:
+    """
+    1イベント分の定義。JSONのキー:
+      id, title, window {start, end}（ISO・タイムゾーン必須）,
+      rewards [{weight, rarity, icon, title, name, desc}] または rewards_csv,
+      cost / cooldown_sec / multi_pull / points {initial, vc_per_minute},
+      nickname {format, max_len}, panel {title, description, color, button, multi_button, footer},
+      result {title, author, color}, closed {title, messages, footer},
+      legacy {state, points, points_ledger, panel_kind, panel_channel_env}（以前の専用Cogからの引き継ぎ。一度だけ）
+    """
+
+    id: str
+    title: str
+    start: datetime
+    end: datetime
+    sampler: RewardSampler
+    cost: int
+    cooldown_sec: int
+    multi_pull: int
+    points_initial: int
+    points_vc_per_minute: int
+    nick_format: str
+    nick_max_len: int
+    panel: Dict
+    result: Dict
+    closed: Dict
+    colors: Dict[str, int]
+    legacy: Dict[str, str]
+    source: str
+    mtime: float
+
+    @property
+    def uses_points(self) -> bool:
+        return self.cost > 0 or self.points_vc_per_minute > 0
+
+    @property
+    def renames(self) -> bool:
+        return bool(self.nick_format)
+
+    def is_open(self, now: Optional[datetime] = None) -> bool:
+        now = now or datetime.now(self.start.tzinfo)
+        return self.start <= now < self.end
+
+    def color_for(self, rarity: str) -> int:
+        return self.colors.get(rarity, 0x9AA0A6)
+
+
+def _parse_dt(raw, key: str) -> datetime:
+    try:
+        dt = datetime.fromisoformat(str(raw).strip())
+    except ValueError:
+        raise ValueError(f"{key} が ISO 8601 ではない: {raw!r}")
+    if dt.tzinfo is None:
+        raise ValueError(f"{key} にタイムゾーンがない: {raw!r}")
+    return dt
+
+
+def _reward_from(row: Dict) -> Optional[t_event_reward]:
+    try:
+        w = int(str(row.get("weight", "")).strip())
+    except ValueError:
+        return None
+    rarity = str(row.get("rarity", "") or "").strip()
+    title = str(row.get("title", "") or "").strip()
+    name = str(row.get("name", "") or "").strip()
+    if w <= 0 or not rarity or not title:
+        return None
+    return t_event_reward(
+        w,
+        rarity,
+        str(row.get("icon", "") or "").strip(),
+        title,
+        name or title,
+        str(row.get("desc", "") or "").strip(),
+    )
+
+
+def _read_rewards(data: Dict, base_dir: str) -> List[t_event_reward]:
+    rows = list(data.get("rewards") or [])
+    csv_path = data.get("rewards_csv")
+    if csv_path:
+        if not os.path.isabs(csv_path):
+            csv_path = os.path.join(base_dir, csv_path)
+        with open(csv_path, "r", encoding="utf-8", newline="") as f:
+            rows.extend(csv.DictReader(f))
+    return [r for r in (_reward_from(row) for row in rows) if r is not None]
+
+
+def _read_legacy(data: Dict, base_dir: str) -> Dict[str, str]:
+    legacy = {str(k): str(v) for k, v in (data.get("legacy") or {}).items() if v}
+    for key in ("state", "points", "points_ledger"):
+        if key in legacy and not os.path.isabs(legacy[key]):
+            legacy[key] = os.path.join(base_dir, legacy[key])
+    return legacy
+
+
+def load_event(path: str) -> t_event:
+    """定義ファイルを読む。不正なら ValueError（メッセージはそのまま管理者に見せる）。"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = jsonio.load(f)
+    except OSError as e:
+        raise ValueError(f"読めない: {e}")
+    if not isinstance(data, dict):
+        raise ValueError("トップレベルがオブジェクトではない")
+
+    event_id = str(data.get("id") or os.path.splitext(os.path.basename(path))[0])
+    if not event_id.replace("_", "").isalnum() or not event_id.isascii():
+        raise ValueError(f"id は英数字と _ のみ: {event_id!r}")
+    window = data.get("window") or {}
+    start = _parse_dt(window.get("start"), "window.start")
+    end = _parse_dt(window.get("end"), "window.end")
+    if end <= start:
+        raise ValueError("window.end が start より前")
+
+    try:
+        rewards = _read_rewards(data, os.path.dirname(path))
+    except OSError as e:
+        raise ValueError(f"rewards_csv が読めない: {e}")
+    if not rewards:
+        raise ValueError("rewards が空")
+
+    points = data.get("points") or {}
+    nickname = data.get("nickname") or {}
+    colors = dict(DEFAULT_COLORS)
+    for k, v in (data.get("colors") or {}).items():
+        colors[str(k)] = int(str(v), 0) if isinstance(v, str) else int(v)
+
+    return t_event(
+        id=event_id.lower(),
+        title=str(data.get("title") or event_id),
+        start=start,
+        end=end,
+        sampler=RewardSampler(rewards),
+        cost=max(0, int(data.get("cost", 0))),
+        cooldown_sec=max(0, int(data.get("cooldown_sec", 0))),
+        multi_pull=max(0, int(data.get("multi_pull", 0))),
+        points_initial=max(0, int(points.get("initial", 0))),
+        points_vc_per_minute=max(0, int(points.get("vc_per_minute", 0))),
+        nick_format=str(nickname.get("format") or ""),
+        nick_max_len=int(nickname.get("max_len", 32)),
+        panel=dict(data.get("panel") or {}),
+        result=dict(data.get("result") or {}),
+        closed=dict(data.get("closed") or {}),
+        colors=colors,
+        legacy=_read_legacy(data, os.path.dirname(path)),
+        source=path,
+        mtime=os.path.getmtime(path),
+    )
+
+
+class EventRegistry:
+    """data/events/*.json を読み、変更のあったファイルだけ読み直す。"""
+
+    def __init__(self, directory: str = DEFAULT_DIR):
+        self.directory = directory
+        self.events: Dict[str, t_event] = {}
+        self.errors: Dict[str, str] = {}
+
+    def get(self, event_id: str) -> Optional[t_event]:
+        return self.events.get(event_id)
+
+    def reload(self, force: bool = False) -> Tuple[List[str], List[str]]:
+        """(読み直したid, 消えたid) を返す。エラーは self.errors に残す。"""
+        paths = sorted(glob.glob(os.path.join(self.directory, "*.json")))
+        known = {ev.source: ev for ev in self.events.values()}
+        events: Dict[str, t_event] = {}
+        errors: Dict[str, str] = {}
+        changed: List[str] = []
+        for path in paths:
+            old = known.get(path)
+            try:
+                if old is not None and not force and os.path.getmtime(path) == old.mtime:
+                    ev = old
+                else:
+                    ev = load_event(path)
+                    changed.append(ev.id)
+            except (OSError, ValueError, TypeError) as e:
+                errors[os.path.basename(path)] = str(e)
+                if old is not None:
+                    ev = old  # 壊れた編集では前の定義を使い続ける
+                else:
+                    continue
+            if ev.id in events:
+                errors[os.path.basename(path)] = f"id が重複: {ev.id}"
+                continue
+            events[ev.id] = ev
+        removed = [eid for eid in self.events if eid not in events]
+        self.events = events
+        self.errors = errors
+        return changed, removed
+
+
+class EventStore:
+    """
+    全イベント共通の状態ファイル（data/events_state.json）。
+    {"events": {"<id>": {"next": {"gid:uid": ts}, "orig_nick": {"gid": {"uid": nick}}, "meta": {...}}}}
+    ポイントはイベントごとの台帳（utils/points.py）に持つ。
+
+    変更はメモリ上で行い dirty を立てるだけ。書き出しは Cog の定期 flush とアンロード時。
+    """
+
+    def __init__(self, path: str = DEFAULT_STATE_PATH):
+        self.path = path
+        self._data: Dict = {"events": {}}
+        self.dirty = False
+        self.load()
+
+    def load(self) -> None:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = jsonio.load(f)
+        except (OSError, ValueError):
+            data = {}
+        if not isinstance(data, dict) or not isinstance(data.get("events"), dict):
+            data = {"events": {}}
+        self._data = data
+        self.dirty = False
+
+    def flush(self) -> bool:
+        if not self.dirty:
+            return False
+        d = os.path.dirname(self.path)
+        if d:
+            os.makedirs(d, exist_ok=True)
+        tmp = self.path + ".tmp"
+        with track_flush("events"):
+            with open(tmp, "w", encoding="utf-8") as f:
+                jsonio.dump(self._data, f)
+            os.replace(tmp, self.path)
+        self.dirty = False
+        return True
+
+    def _section(self, event_id: str, name: str) -> Dict:
+        ev = self._data["events"].setdefault(event_id, {})
+        return ev.setdefault(name, {})
+
+    # ---- ポイント（以前はここに持っていた。台帳へ移すときに取り出す） ----
+    def take_points(self, event_id: str) -> Dict[str, int]:
+        ev = self._data["events"].get(event_id) or {}
+        points = ev.pop("points", None)
+        if not isinstance(points, dict):
+            return {}
+        self.dirty = True
+        return points
+
+    # ---- クールダウン ----
+    def cooldown_left(self, event_id: str, gid: int, uid: int) -> int:
+        nxt = self._section(event_id, "next").get(f"{gid}:{uid}", 0)
+        return max(0, int(nxt) - int(time.time()))
+
+    def set_cooldown(self, event_id: str, gid: int, uid: int, sec: int) -> None:
+        if sec <= 0:
+            return
+        self._section(event_id, "next")[f"{gid}:{uid}"] = int(time.time()) + sec
+        self.dirty = True
+
+    # ---- 元のニックネーム ----
+    def orig_nick(self, event_id: str, gid: int, uid: int) -> Optional[str]:
+        v = self._section(event_id, "orig_nick").get(str(gid), {}).get(str(uid))
+        return v if isinstance(v, str) else None
+
+    def remember_nick(self, event_id: str, gid: int, uid: int, nick: Optional[str]) -> None:
+        g = self._section(event_id, "orig_nick").setdefault(str(gid), {})
+        if str(uid) in g:
+            return
+        g[str(uid)] = STATE_NONE if nick is None else nick
+        self.dirty = True
+
+    def forget_nick(self, event_id: str, gid: int, uid: int) -> None:
+        g = self._section(event_id, "orig_nick").get(str(gid), {})
+        if g.pop(str(uid), None) is not None:
+            self.dirty = True
+
+    def import_nicks(self, event_id: str, orig_nick: Dict) -> int:
+        """以前の Cog の state にあった {gid: {uid: nick}} を取り込む（こちらに記録がある人はそのまま）。"""
+        n = 0
+        for gid, users in orig_nick.items():
+            if not str(gid).isdigit() or not isinstance(users, dict):
+                continue
+            g = self._section(event_id, "orig_nick").setdefault(str(gid), {})
+            for uid, nick in users.items():
+                if str(uid).isdigit() and isinstance(nick, str) and str(uid) not in g:
+                    g[str(uid)] = nick
+                    n += 1
+        if n:
+            self.dirty = True
+        return n
+
+    def nick_guilds(self, event_id: str) -> List[int]:
+        return [int(g) for g, v in self._section(event_id, "orig_nick").items() if v and g.isdigit()]
+
+    def nick_targets(self, event_id: str, gid: int) -> Dict[int, Optional[str]]:
+        g = self._section(event_id, "orig_nick").get(str(gid), {})
+        return {
+            int(uid): (None if v == STATE_NONE else v)
+            for uid, v in g.items() if uid.isdigit()
+        }
+
+    # ---- 開催状態 ----
+    def meta(self, event_id: str) -> Dict:
+        """closed_done など、イベント単位の小さな状態。変更したら dirty を立てること。"""
+        return self._section(event_id, "meta")
+
+    # ---- リセット ----
+    def reset(self, event_id: str, gid: int) -> int:
+        """ギルドのクールダウンを消す（ポイントは台帳側）。元ニックネームは戻すまで残す。"""
+        prefix = f"{gid}:"
+        sec = self._section(event_id, "next")
+        keys = [k for k in sec if k.startswith(prefix)]
+        for key in keys:
+            del sec[key]
+        self.dirty = True
+        return len(keys)
+
+
+def base_name(name: str) -> str:
+    s = name.strip()
+    for sep in ("＠", "@"):
+        if sep in s:
+            s = s.split(sep, 1)[0].strip()
+    return s or "unknown"
+
+
+def make_nick(fmt: str, display_name: str, alias: str, max_len: int = 32) -> str:
+    nick = fmt.replace("{base}", base_name(display_name)).replace(
+        "{name}", alias.strip() or "無名"
+    )
+    return nick[:max_len]
@@ -0,0 +1,220 @@
+import os
+import time
+from typing import Optional
+
+from utils import jsonio
+
+DEFAULT_PATH = "data/guild_config.json"
+
+# 設定キーは .env と同じ名前。kind: id / int / ids / map / str
+# shared=True のキーは .env の値を全ギルドの既定値にする（IDでない数値やラベル）。
+# shared=False のキー（チャンネル/ロールID）は、.env の値を GUILD_ID のギルドにだけ使う。
+KEYS: dict[str, tuple[str, bool]] = {
+    # welcome
+    "ADMIN_ID": ("id", False),
+    "ROLE_A": ("id", False),
+    "ROLE_B": ("id", False),
+    "ROLE_C": ("id", False),
+    "MANAGER_ROLE_IDS": ("ids", False),
+    "RAID_JOIN_THRESHOLD": ("int", True),
+    "RAID_WINDOW_SECONDS": ("int", True),
+    # leave_log
+    "LEAVE_LOG_CHANNEL_ID": ("id", False),
+    # reaction_roles（.env では RR_xxx=emoji_id:role_id を並べる）
+    "REACTION_ROLE_MESSAGE_IDS": ("ids", False),
+    "REACTION_ROLE_MAP": ("map", False),
+    # valocheck
+    "ROLE_ENJOY_ID": ("id", False),
+    "ROLE_GACHI_ID": ("id", False),
+    "VALO_ROLE_LOG_CHANNEL_ID": ("id", False),
+    "VALO_CHECK_THRESH_ENJOY_ONLY": ("int", True),
+    "VALO_CHECK_THRESH_GACHI_ONLY": ("int", True),
+    # valorecruit
+    "VALO_RECRUIT_CHANNEL_ID": ("id", False),
+    "VALO_ROLE_GACHI_ID": ("id", False),
+    "VALO_ROLE_ENJOY_ID": ("id", False),
+    "VALO_RECRUIT_COOLDOWN_SECONDS": ("int", True),
+    "VALO_RECRUIT_TTL_MINUTES": ("int", True),
+    "VALO_RECRUIT_INVITE_COUNT": ("int", True),
+    # joya
+    "JOYA_CHANNEL_ID": ("id", False),
+    "JOYA_WINNER_ROLE_ID": ("id", False),
+    "JOYA_BLOCK_ROLE_ID": ("id", False),
+    # events（VCポイントを数えないVC。AFKチャンネルは常に除外）
+    "EVENT_REST_VC_ID": ("id", False),
+}
+
+
+def _parse(kind: str, raw):
+    """設定値を型に合わせて変換する。不正なら ValueError。"""
+    if kind in ("id", "int"):
+        return int(str(raw).strip())
+    if kind == "ids":
+        if isinstance(raw, (list, tuple, set, frozenset)):
+            return frozenset(int(x) for x in raw)
+        return frozenset(int(x) for x in str(raw).split(",") if x.strip())
+    if kind == "map":
+        if isinstance(raw, dict):
+            return {int(k): int(v) for k, v in raw.items()}
+        out = {}
+        for part in str(raw).split(","):
+            if not part.strip():
+                continue
+            k, v = part.split(":", 1)
+            out[int(k)] = int(v)
+        return out
+    return str(raw)
+
+
+def _to_json(kind: str, value):
+    if kind == "ids":
+        return sorted(value)
+    if kind == "map":
+        return {str(k): v for k, v in value.items()}
+    return value
+
+
+class GuildConfig:
+    """
+    ギルドごとの設定（data/guild_config.json）。
+    {"guilds": {"<guild_id>": {"ROLE_ENJOY_ID": 123, ...}, "*": {...}}}
+
+    参照順: ギルドの値 → "*" の値 → .env（shared キー、または GUILD_ID のギルド）→ 既定値。
+    解決結果は (guild_id, key) ごとにキャッシュし、ファイルが更新されたら読み直す。
+    """
+
+    CHECK_INTERVAL = 5.0
+
+    def __init__(self, path: str = DEFAULT_PATH, home_guild_id: int = 0):
+        self.path = path
+        self.home_guild_id = int(home_guild_id or 0)
+        self._guilds: dict[str, dict] = {}
+        self._cache: dict[tuple[int, str], object] = {}
+        self._mtime = 0.0
+        self._checked = 0.0
+        self.load()
+
+    # ------------------------------------------------------
+    # 読み書き
+    # ------------------------------------------------------
+    def load(self) -> None:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = jsonio.load(f)
+            self._mtime = os.path.getmtime(self.path)
+        except (OSError, ValueError):
+            data = {}
+            self._mtime = 0.0
+        guilds = data.get("guilds") if isinstance(data, dict) else None
+        self._guilds = {
+            str(k): v for k, v in (guilds or {}).items() if isinstance(v, dict)
+        }
+        self._cache.clear()
+
+    def _maybe_reload(self) -> None:
+        now = time.monotonic()
+        if now - self._checked < self.CHECK_INTERVAL:
+            return
+        self._checked = now
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            mtime = 0.0
+        if mtime != self._mtime:
+            self.load()
+
+    def save(self) -> None:
+        d = os.path.dirname(self.path)
+        if d:
+            os.makedirs(d, exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            jsonio.dump({"guilds": self._guilds}, f)
+        os.replace(tmp, self.path)
+        self._mtime = os.path.getmtime(self.path)
+        self._cache.clear()
+
+    def set(self, guild_id: int, key: str, raw: str) -> None:
+        kind, _shared = KEYS[key]
+        value = _parse(kind, raw)
+        self._guilds.setdefault(str(guild_id), {})[key] = _to_json(kind, value)
+        self.save()
+
+    def unset(self, guild_id: int, key: str) -> bool:
+        section = self._guilds.get(str(guild_id))
+        if not section or key not in section:
+            return False
+        del section[key]
+        self.save()
+        return True
+
+    # ------------------------------------------------------
+    # 参照
+    # ------------------------------------------------------
+    def _env(self, key: str):
+        if key == "REACTION_ROLE_MAP":
+            parts = [v for k, v in os.environ.items() if k.startswith("RR_") and v]
+            return ",".join(parts) or None
+        v = os.getenv(key)
+        return v if v else None
+
+    def _resolve(self, guild_id: int, key: str):
+        kind, shared = KEYS[key]
+        for section in (self._guilds.get(str(guild_id)), self._guilds.get("*")):
+            if section and key in section:
+                try:
+                    return _parse(kind, section[key])
+                except (TypeError, ValueError):
+                    print(f"⚠️ Invalid guild config {guild_id}.{key}={section[key]!r}")
+                    break
+        if shared or guild_id == self.home_guild_id:
+            raw = self._env(key)
+            if raw is not None:
+                try:
+                    return _parse(kind, raw)
+                except (TypeError, ValueError):
+                    print(f"⚠️ Invalid env {key}={raw!r}")
+        return None
+
+    def get(self, guild_id: Optional[int], key: str, default=None):
+        self._maybe_reload()
+        gid = int(guild_id or self.home_guild_id)
+        ck = (gid, key)
+        if ck not in self._cache:
+            self._cache[ck] = self._resolve(gid, key)
+        value = self._cache[ck]
+        return default if value is None else value
+
+    def get_int(self, guild_id: Optional[int], key: str, default: int = 0) -> int:
+        return self.get(guild_id, key, default)
+
+    def get_ids(self, guild_id: Optional[int], key: str) -> frozenset:
+        return self.get(guild_id, key, frozenset())
+
+    def get_map(self, guild_id: Optional[int], key: str) -> dict:
+        return self.get(guild_id, key, {})
+
+    def section(self, guild_id: int) -> dict:
+        return dict(self._guilds.get(str(guild_id), {}))
+
+    def guild_ids(self) -> list[int]:
+        """設定のあるギルド（GUILD_ID を含む）。"""
+        out = {int(k) for k in self._guilds if k.isdigit()}
+        if self.home_guild_id:
+            out.add(self.home_guild_id)
+        return sorted(out)
+
+
+_config: Optional[GuildConfig] = None
+
+
+def get_config() -> GuildConfig:
+    """.env を読んだあと（Cogの読み込み時）に初めて作る。"""
+    global _config
+    if _config is None:
+        home = os.getenv("GUILD_ID") or "0"
+        _config = GuildConfig(
+            os.getenv("GUILD_CONFIG_PATH") or DEFAULT_PATH,
+            int(home) if home.isdigit() else 0,
+        )
+    return _config
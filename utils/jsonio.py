@@ -0,0 +1,48 @@
+import json
+
+try:
+    import orjson
+except ImportError:  # orjson は任意
+    orjson = None
+
+# main.py が .env を読んだあとで configure() を呼ぶ。それまでは標準の json。
+BACKEND = "json"
+
+
+def configure(profile: str = "") -> str:
+    """PERF_PROFILE=fast のとき orjson を使う。使ったバックエンド名を返す。"""
+    global BACKEND
+    if (profile or "").strip().lower() == "fast" and orjson is not None:
+        BACKEND = "orjson"
+    else:
+        BACKEND = "json"
+    return BACKEND
+
+
+def loads(data):
+    if BACKEND == "orjson":
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps(obj, *, indent: bool = False) -> str:
+    """ensure_ascii=False 相当（日本語はそのまま）。dictのint keyは文字列になる。"""
+    if BACKEND == "orjson":
+        opt = orjson.OPT_NON_STR_KEYS
+        if indent:
+            opt |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, option=opt).decode("utf-8")
+    return json.dumps(obj, ensure_ascii=False, indent=2 if indent else None)
+
+
+def load(f):
+    return loads(f.read())
+
+
+def dump(obj, f, *, indent: bool = True) -> None:
+    f.write(dumps(obj, indent=indent))
+
+
+def canonical(obj) -> str:
+    """ハッシュ用。バックエンドに関係なく同じ文字列になるよう常に標準の json を使う。"""
+    return json.dumps(obj, sort_keys=True, ensure_ascii=False)
@@ -0,0 +1,107 @@
+import heapq
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set
+
+# VALO募集の「お誘い」用の索引（1ギルド分）。お誘いを受け取る設定にしたメンバーだけを持つ。
+# ロールごと・VCにいるかどうかで集合を分けておき、候補は集合の積で出す（ギルド全員は見ない）。
+
+# VALORANT ランクの 絵文字名 → ロール名（低い順。/rrcreate_valorank と募集のお誘いで共用）
+VALO_RANK_MAP = {
+    "v_iron_1": "v_Iron",
+    "v_bronze_1": "v_Bronze",
+    "v_silver_1": "v_Silver",
+    "v_gold_1": "v_Gold",
+    "v_platinum_1": "v_Platinum",
+    "v_diamond_1": "v_Diamond",
+    "v_ascendant_1": "v_Ascendant",
+    "v_immortal_1": "v_Immortal",
+    "v_radiant": "v_Radiant",
+}
+
+
+class MatchIndex:
+    """
+    tracked: 索引に入れるロール（ガチ/エンジョイなど）。rank_tiers: ランクロールID → 段階（0 が一番下）。
+    それ以外のロールは持たない。
+    """
+
+    def __init__(self, opted: Iterable[int] = (), tracked: Iterable[int] = (),
+                 rank_tiers: Optional[Dict[int, int]] = None):
+        self.opted: Set[int] = set(opted)
+        self.rank_tiers: Dict[int, int] = dict(rank_tiers or {})
+        self.tracked: FrozenSet[int] = frozenset(tracked) | frozenset(self.rank_tiers)
+        self.by_role: Dict[int, Set[int]] = {}
+        self.in_voice: Set[int] = set()
+        self.tier: Dict[int, int] = {}
+        self._roles: Dict[int, FrozenSet[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self.opted)
+
+    # ------------------------------------------------------
+    # 更新
+    # ------------------------------------------------------
+    def tier_of(self, role_ids: Iterable[int]) -> Optional[int]:
+        tiers = [self.rank_tiers[r] for r in role_ids if r in self.rank_tiers]
+        return max(tiers) if tiers else None
+
+    def update(self, user_id: int, role_ids: Iterable[int], in_voice: bool) -> None:
+        """opt-in 済みのメンバーのロール（追跡対象のものだけ）・ランク・VC在席を入れ直す。"""
+        if user_id not in self.opted:
+            return
+        roles = self.tracked.intersection(role_ids)
+        tier = self.tier_of(roles)
+        old = self._roles.get(user_id, frozenset())
+        for rid in old - roles:
+            bucket = self.by_role.get(rid)
+            if bucket is not None:
+                bucket.discard(user_id)
+                if not bucket:
+                    del self.by_role[rid]
+        for rid in roles - old:
+            self.by_role.setdefault(rid, set()).add(user_id)
+        self._roles[user_id] = roles
+        if tier is None:
+            self.tier.pop(user_id, None)
+        else:
+            self.tier[user_id] = tier
+        self.set_voice(user_id, in_voice)
+
+    def set_voice(self, user_id: int, present: bool) -> None:
+        if present and user_id in self.opted:
+            self.in_voice.add(user_id)
+        else:
+            self.in_voice.discard(user_id)
+
+    def opt_in(self, user_id: int) -> None:
+        self.opted.add(user_id)
+
+    def remove(self, user_id: int) -> None:
+        self.opted.discard(user_id)
+        self._drop(user_id)
+
+    def _drop(self, user_id: int) -> None:
+        for rid in self._roles.pop(user_id, frozenset()):
+            bucket = self.by_role.get(rid)
+            if bucket is not None:
+                bucket.discard(user_id)
+                if not bucket:
+                    del self.by_role[rid]
+        self.tier.pop(user_id, None)
+        self.in_voice.discard(user_id)
+
+    # ------------------------------------------------------
+    # 候補
+    # ------------------------------------------------------
+    def candidates(self, role_id: Optional[int], exclude: Iterable[int] = ()) -> Set[int]:
+        pool = self.opted if role_id is None else self.by_role.get(role_id, set())
+        return pool.difference(exclude)
+
+    def best(self, cands: Set[int], owner_tier: Optional[int], limit: int) -> List[int]:
+        """VCにいる人を優先し、次にランクが募集主に近い順。"""
+
+        def key(uid: int):
+            t = self.tier.get(uid)
+            dist = abs(t - owner_tier) if t is not None and owner_tier is not None else 99
+            return (uid not in self.in_voice, dist, uid)
+
+        return heapq.nsmallest(limit, cands, key=key)
@@ -0,0 +1,56 @@
+import time
+from typing import Iterable, Optional
+
+import discord
+
+# main.py は必要最小限のメンバーキャッシュで起動する（MemberCacheFlags で voice/joined のみ）。
+# 全メンバーが要る処理はここを通して、その時だけギルド単位で chunk する。
+
+_ROLE_TTL = 600.0
+_role_cache: dict[tuple[int, frozenset], tuple[float, list[int]]] = {}
+
+
+async def get_or_fetch_member(guild: discord.Guild, user_id: int) -> Optional[discord.Member]:
+    member = guild.get_member(user_id)
+    if member is not None:
+        return member
+    try:
+        return await guild.fetch_member(user_id)
+    except (discord.NotFound, discord.Forbidden, discord.HTTPException):
+        return None
+
+
+async def chunk_members(guild: discord.Guild) -> list[discord.Member]:
+    """
+    ギルドの全メンバーを取得する（キャッシュには残さない）。
+    members intent が無い構成では、キャッシュにいる分だけを返す。
+    """
+    if guild.chunked:
+        return list(guild.members)
+    try:
+        return await guild.chunk(cache=False)
+    except discord.ClientException:
+        return list(guild.members)
+
+
+async def member_ids_with_roles(
+    guild: discord.Guild, role_ids: Iterable[int], ttl: float = _ROLE_TTL
+) -> list[int]:
+    """
+    指定ロールのどれかを持つメンバーのID。全体の chunk は ttl 秒に1回だけ行い、
+    IDだけを覚えておく（メンバー本体はキャッシュしない）。
+    """
+    wanted = frozenset(int(r) for r in role_ids if r)
+    if not wanted:
+        return []
+    key = (guild.id, wanted)
+    now = time.monotonic()
+    hit = _role_cache.get(key)
+    if hit is not None and now - hit[0] <= ttl:
+        return list(hit[1])
+    ids = [
+        m.id for m in await chunk_members(guild)
+        if any(r.id in wanted for r in m.roles)
+    ]
+    _role_cache[key] = (now, ids)
+    return list(ids)
@@ -0,0 +1,283 @@
+import functools
+import os
+import time
+from bisect import bisect_left
+from collections import deque
+from contextlib import contextmanager
+
+import aiohttp
+from discord import app_commands
+
+DEFAULT_BUCKETS = (
+    0.001,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+
+def _label_key(labels: dict) -> tuple:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _escape(v: str) -> str:
+    return v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _fmt_labels(key: tuple, extra: tuple = ()) -> str:
+    items = key + extra
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in items) + "}"
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help = help_text
+        self.values: dict[tuple, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = _label_key(labels)
+        self.values[key] = self.values.get(key, 0.0) + amount
+
+    def get(self, **labels) -> float:
+        return self.values.get(_label_key(labels), 0.0)
+
+    def render(self) -> list[str]:
+        return [f"{self.name}{_fmt_labels(k)} {v}" for k, v in self.values.items()]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, **labels) -> None:
+        self.values[_label_key(labels)] = float(value)
+
+
+class _Series:
+    __slots__ = ("counts", "sum", "count", "recent")
+
+    def __init__(self, n_buckets: int, window: int):
+        self.counts = [0] * (n_buckets + 1)
+        self.sum = 0.0
+        self.count = 0
+        self.recent = deque(maxlen=window)
+
+
+class Histogram:
+    """
+    Prometheus 形式のバケット集計に加えて、直近 window 件から p50/p99 を出す。
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, buckets=DEFAULT_BUCKETS, window: int = 1024):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(buckets)
+        self.window = window
+        self.series: dict[tuple, _Series] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = _label_key(labels)
+        s = self.series.get(key)
+        if s is None:
+            s = self.series[key] = _Series(len(self.buckets), self.window)
+        s.counts[bisect_left(self.buckets, value)] += 1
+        s.sum += value
+        s.count += 1
+        s.recent.append(value)
+
+    def quantile(self, q: float, **labels) -> float:
+        s = self.series.get(_label_key(labels))
+        if s is None or not s.recent:
+            return 0.0
+        data = sorted(s.recent)
+        idx = min(len(data) - 1, int(q * len(data)))
+        return data[idx]
+
+    def summary(self) -> list[tuple[dict, int, float, float]]:
+        """[(labels, count, p50, p99)]"""
+        out = []
+        for key, s in self.series.items():
+            data = sorted(s.recent)
+            if not data:
+                continue
+            p50 = data[min(len(data) - 1, int(0.50 * len(data)))]
+            p99 = data[min(len(data) - 1, int(0.99 * len(data)))]
+            out.append((dict(key), s.count, p50, p99))
+        return out
+
+    def render(self) -> list[str]:
+        lines = []
+        for key, s in self.series.items():
+            acc = 0
+            for bound, n in zip(self.buckets, s.counts):
+                acc += n
+                lines.append(f"{self.name}_bucket{_fmt_labels(key, (('le', str(bound)),))} {acc}")
+            lines.append(f"{self.name}_bucket{_fmt_labels(key, (('le', '+Inf'),))} {s.count}")
+            lines.append(f"{self.name}_sum{_fmt_labels(key)} {s.sum}")
+            lines.append(f"{self.name}_count{_fmt_labels(key)} {s.count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: dict[str, object] = {}
+
+    def _get(self, cls, name: str, help_text: str, **kwargs):
+        m = self._metrics.get(name)
+        if m is None:
+            m = self._metrics[name] = cls(name, help_text, **kwargs)
+        return m
+
+    def counter(self, name: str, help_text: str = "") -> Counter:
+        return self._get(Counter, name, help_text)
+
+    def gauge(self, name: str, help_text: str = "") -> Gauge:
+        return self._get(Gauge, name, help_text)
+
+    def histogram(self, name: str, help_text: str = "", **kwargs) -> Histogram:
+        return self._get(Histogram, name, help_text, **kwargs)
+
+    def render_prometheus(self) -> str:
+        lines = []
+        for name, m in self._metrics.items():
+            if m.help:
+                lines.append(f"# HELP {name} {m.help}")
+            lines.append(f"# TYPE {name} {m.kind}")
+            lines.extend(m.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+HANDLER_SECONDS = REGISTRY.histogram(
+    "bot_handler_seconds", "Interaction handler / listener latency"
+)
+HANDLER_ERRORS = REGISTRY.counter(
+    "bot_handler_errors_total", "Exceptions raised from handlers"
+)
+STORE_FLUSH_SECONDS = REGISTRY.histogram(
+    "bot_store_flush_seconds", "Time spent writing a store to disk"
+)
+LOOP_LAG_SECONDS = REGISTRY.histogram(
+    "bot_event_loop_lag_seconds", "Scheduling drift of the event loop"
+)
+LOOP_LAG_LAST = REGISTRY.gauge(
+    "bot_event_loop_lag_last_seconds", "Most recent event loop drift sample"
+)
+LOOP_STALL_SECONDS = REGISTRY.histogram(
+    "bot_event_loop_stall_seconds", "Event loop stalls caught by the watchdog"
+)
+MODERATION_HITS = REGISTRY.counter(
+    "bot_moderation_hits_total", "NG-word and rate-limit hits in utils/moderation, by scope and reason"
+)
+REST_429 = REGISTRY.counter(
+    "bot_rest_429_total", "REST responses with HTTP 429, by X-RateLimit-Scope"
+)
+
+
+@contextmanager
+def track(handler: str):
+    """with track("xxx"): ... の区間をハンドラ時間として記録する。"""
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        HANDLER_ERRORS.inc(handler=handler)
+        raise
+    finally:
+        HANDLER_SECONDS.observe(time.perf_counter() - started, handler=handler)
+
+
+@contextmanager
+def track_flush(store: str):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        STORE_FLUSH_SECONDS.observe(time.perf_counter() - started, store=store)
+
+
+def timed(handler: str):
+    """async ハンドラ / リスナー用デコレータ。Cog.listener や ui.button の内側に付ける。"""
+
+    def deco(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            with track(handler):
+                return await func(*args, **kwargs)
+
+        return wrapper
+
+    return deco
+
+
+class InstrumentedTree(app_commands.CommandTree):
+    """
+    スラッシュコマンドの実行時間を一か所で測る。開始時刻を interaction.extras に置き、
+    on_app_command_completion（cogs/bot_stats.py）で記録する。
+    """
+
+    async def interaction_check(self, interaction) -> bool:
+        interaction.extras["metrics_t0"] = time.perf_counter()
+        return True
+
+    async def on_error(self, interaction, error) -> None:
+        name = interaction.command.qualified_name if interaction.command else "unknown"
+        HANDLER_ERRORS.inc(handler=f"/{name}")
+        await super().on_error(interaction, error)
+
+
+def observe_app_command(interaction, command) -> None:
+    t0 = interaction.extras.get("metrics_t0")
+    if t0 is None:
+        return
+    HANDLER_SECONDS.observe(
+        time.perf_counter() - t0, handler=f"/{command.qualified_name}"
+    )
+
+
+def process_rss_mb() -> float:
+    """現在の RSS（MB）。/proc が無い環境では最大RSS。"""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024
+    except (OSError, ValueError, IndexError):
+        import resource
+
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def rate_limit_trace() -> aiohttp.TraceConfig:
+    """
+    discord.py の HTTP クライアントに付ける（Client(http_trace=...)）。429 の応答を scope ごとに数える。
+    ログの文言に頼らないので、ルート単位・グローバル・Cloudflare のどれでも1回ずつ数えられる
+    （discord.py側は自動でリトライする）。
+    """
+    trace = aiohttp.TraceConfig()
+
+    async def on_request_end(session, ctx, params) -> None:
+        resp = params.response
+        if resp.status != 429:
+            return
+        scope = resp.headers.get("X-RateLimit-Scope")
+        if not scope:
+            scope = "global" if resp.headers.get("X-RateLimit-Global") else "unknown"
+        REST_429.inc(scope=scope)
+
+    trace.on_request_end.append(on_request_end)
+    return trace
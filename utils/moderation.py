@@ -0,0 +1,241 @@
+import os
+import time
+import unicodedata
+from collections import deque
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from utils import metrics
+
+# 利用者が書いた文（VALO募集の一言 / DM転送 / welcome）の共通チェック。
+# - NGワード: data/ng_words.txt を Aho–Corasick のオートマトンにして1回の走査で全語を探す
+#   （全角半角・大文字小文字・カタカナ/ひらがな・空白の違いは正規化でそろえる）
+# - 連投: ユーザーごとのトークンバケツ
+# どちらも同期で呼べる（イベントループを止めるほどの処理はしない）。
+
+DEFAULT_PATH = os.path.join("data", "ng_words.txt")
+
+# カタカナ → ひらがな（ァ..ヶ）。ヴ・ヵ・ヶ もひらがな側にある文字に寄せる
+_FOLD = {c: c - 0x60 for c in range(0x30A1, 0x30F7)}
+# 空白・ゼロ幅文字・よく挟まれる記号は消す（「ば か」「ば.か」対策）
+for _ch in " \t\r\n\u3000\u200b\u200c\u200d\ufeff._-*・/|":
+    _FOLD[ord(_ch)] = None
+
+
+def normalize(text: str) -> str:
+    """NFKC（全角英数・半角カナをそろえる）→ 小文字 → カタカナをひらがなに → 区切り文字を消す。"""
+    return unicodedata.normalize("NFKC", text).lower().translate(_FOLD)
+
+
+class AhoCorasick:
+    """正規化済みの語の集合から作るオートマトン。search は最初に見つかった語を返す。"""
+
+    def __init__(self, words: Iterable[str]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[Optional[str]] = [None]
+        for w in words:
+            if w:
+                self._add(w)
+        self._build()
+
+    def __len__(self) -> int:
+        return sum(1 for o in self._out if o is not None)
+
+    def _add(self, word: str) -> None:
+        node = 0
+        for ch in word:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(None)
+            node = nxt
+        self._out[node] = word
+
+    def _build(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self._goto[node].items():
+                queue.append(nxt)
+                f = self._fail[node]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                cand = self._goto[f].get(ch, 0)
+                self._fail[nxt] = cand if cand != nxt else 0
+                # 途中で終わる短い語も拾えるよう、失敗先の出力を引き継ぐ
+                if self._out[nxt] is None:
+                    self._out[nxt] = self._out[self._fail[nxt]]
+
+    def search(self, text: str) -> Optional[str]:
+        goto, fail, out = self._goto, self._fail, self._out
+        node = 0
+        for ch in text:
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if out[node] is not None:
+                return out[node]
+        return None
+
+
+class WordList:
+    """
+    NGワードのファイル（1行1語、# 以降はコメント）。更新されたら次の呼び出しで読み直す。
+    ファイルの確認は CHECK_INTERVAL 秒に1回まで。
+    """
+
+    CHECK_INTERVAL = 5.0
+
+    def __init__(self, path: str = DEFAULT_PATH):
+        self.path = path
+        self.matcher = AhoCorasick(())
+        self._mtime = 0.0
+        self._checked = 0.0
+        self.load()
+
+    def load(self) -> None:
+        words = set()
+        try:
+            self._mtime = os.path.getmtime(self.path)
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    w = normalize(line.split("#", 1)[0].strip())
+                    if w:
+                        words.add(w)
+        except OSError:
+            self._mtime = 0.0
+        self.matcher = AhoCorasick(sorted(words))
+        self._checked = time.monotonic()
+
+    def _maybe_reload(self) -> None:
+        now = time.monotonic()
+        if now - self._checked < self.CHECK_INTERVAL:
+            return
+        self._checked = now
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            mtime = 0.0
+        if mtime != self._mtime:
+            self.load()
+            print(f"🧹 NG words reloaded: {len(self.matcher)} entries")
+
+    def find(self, text: str) -> Optional[str]:
+        self._maybe_reload()
+        if not text:
+            return None
+        return self.matcher.search(normalize(text))
+
+
+class RateLimiter:
+    """
+    (scope, user_id) ごとのトークンバケツ。per_minute の速さで回復し、最大 burst 回まで続けて使える。
+    満タンに戻ったバケツは掃除の対象（件数が前回の2倍を超えたらまとめて捨てる）。
+    """
+
+    def __init__(self, per_minute: float, burst: int):
+        self.rate = max(0.001, per_minute) / 60.0
+        self.burst = max(1, burst)
+        self._buckets: Dict[Tuple[str, int], Tuple[float, float]] = {}
+        self._prune_at = 256
+
+    def allow(self, scope: str, user_id: int, now: Optional[float] = None) -> bool:
+        now = time.monotonic() if now is None else now
+        key = (scope, user_id)
+        tokens, last = self._buckets.get(key, (float(self.burst), now))
+        tokens = min(float(self.burst), tokens + (now - last) * self.rate)
+        ok = tokens >= 1.0
+        if ok:
+            tokens -= 1.0
+        self._buckets[key] = (tokens, now)
+        if len(self._buckets) >= self._prune_at:
+            self._prune(now)
+        return ok
+
+    def retry_after(self, scope: str, user_id: int, now: Optional[float] = None) -> int:
+        now = time.monotonic() if now is None else now
+        tokens, last = self._buckets.get((scope, user_id), (float(self.burst), now))
+        tokens = min(float(self.burst), tokens + (now - last) * self.rate)
+        if tokens >= 1.0:
+            return 0
+        return int((1.0 - tokens) / self.rate) + 1
+
+    def _prune(self, now: float) -> None:
+        full = self.burst / self.rate
+        self._buckets = {k: v for k, v in self._buckets.items() if now - v[1] < full}
+        self._prune_at = max(256, 2 * len(self._buckets))
+
+
+@dataclass(frozen=True)
+class Verdict:
+    ok: bool
+    reason: str = ""  # "ng_word" / "rate"
+    detail: str = ""
+
+    def message(self) -> str:
+        if self.reason == "ng_word":
+            return "使えない言葉が含まれているよ。書き直してね。"
+        if self.reason == "rate":
+            return f"送信が多すぎるよ。あと **{self.detail}秒** 待ってね。"
+        return ""
+
+
+_OK = Verdict(True)
+
+
+class Moderator:
+    """
+    scope（"valo_recruit" / "dm_forward" など）ごとに連投の速さを変えられる。
+    configure していない scope は既定の速さ（MOD_RATE_PER_MINUTE / MOD_RATE_BURST）。
+    """
+
+    def __init__(self, words: WordList, default: RateLimiter):
+        self.words = words
+        self.default = default
+        self._limiters: Dict[str, RateLimiter] = {}
+
+    def configure(self, scope: str, per_minute: float, burst: int) -> None:
+        self._limiters[scope] = RateLimiter(per_minute, burst)
+
+    def check(self, scope: str, user_id: int, text: str = "", rate: bool = True) -> Verdict:
+        """NGワード → 連投 の順に見る。NGワードで弾いた分はバケツを減らさない。"""
+        hit = self.words.find(text)
+        if hit is not None:
+            metrics.MODERATION_HITS.inc(scope=scope, reason="ng_word")
+            return Verdict(False, "ng_word", hit)
+        if rate:
+            limiter = self._limiters.get(scope, self.default)
+            if not limiter.allow(scope, user_id):
+                metrics.MODERATION_HITS.inc(scope=scope, reason="rate")
+                return Verdict(False, "rate", str(limiter.retry_after(scope, user_id)))
+        return _OK
+
+
+def _get_float_env(key: str, default: float) -> float:
+    v = os.getenv(key)
+    if v is None or not v.strip():
+        return default
+    try:
+        return float(v)
+    except ValueError:
+        return default
+
+
+_moderator: Optional[Moderator] = None
+
+
+def get_moderator() -> Moderator:
+    global _moderator
+    if _moderator is None:
+        _moderator = Moderator(
+            WordList(os.getenv("NG_WORDS_PATH") or DEFAULT_PATH),
+            RateLimiter(
+                _get_float_env("MOD_RATE_PER_MINUTE", 6.0),
+                int(_get_float_env("MOD_RATE_BURST", 3)),
+            ),
+        )
+    return _moderator
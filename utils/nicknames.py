@@ -0,0 +1,116 @@
+import asyncio
+from typing import Dict, List, Optional, Tuple
+
+import discord
+
+# ガチャの連打で member.edit(nick=...) が何本も飛ばないよう、メンバーごとに1本にまとめる。
+# 最初の変更はすぐ送り、その後 delay 秒の間に来た変更は最後の1つだけを送る。
+
+_Key = Tuple[int, int]
+
+
+class _Slot:
+    __slots__ = ("member", "nick", "waiters", "written", "ok", "busy", "task")
+
+    def __init__(self, member: discord.Member, nick: Optional[str]):
+        self.member = member
+        self.nick = nick
+        self.waiters: List[asyncio.Future] = []
+        self.written: Optional[str] = None
+        self.ok = False
+        self.busy = False
+        self.task: Optional[asyncio.Task] = None
+
+
+class NickWriter:
+    """
+    set(member, nick) は実際に書き込まれた（または書く必要がなかった）かを返す。
+    途中で別の名前に上書きされた呼び出しは、最後に書いた結果を受け取る。
+    """
+
+    def __init__(self, reason: str, delay: float = 1.5):
+        self.reason = reason
+        self.delay = max(0.0, delay)
+        self._slots: Dict[_Key, _Slot] = {}
+        # 最後に自分で書いた (変更前, 変更後)。キャッシュのメンバー情報が古くても二重に書かないため
+        self._applied: Dict[_Key, Tuple[Optional[str], Optional[str]]] = {}
+        self.sent = 0
+        self.skipped = 0
+
+    def _is_current(self, key: _Key, member: discord.Member, nick: Optional[str]) -> bool:
+        if (member.nick or None) == nick:
+            return True
+        applied = self._applied.get(key)
+        return applied is not None and applied[1] == nick and (member.nick or None) == applied[0]
+
+    async def set(self, member: discord.Member, nick: Optional[str]) -> bool:
+        nick = nick or None
+        key = (member.guild.id, member.id)
+        slot = self._slots.get(key)
+        if slot is None:
+            if self._is_current(key, member, nick):
+                self.skipped += 1
+                return True
+            slot = _Slot(member, nick)
+            self._slots[key] = slot
+        else:
+            slot.member = member
+            slot.nick = nick
+            if not slot.waiters and not slot.busy and slot.written == nick:
+                # 書いたばかりの名前と同じ
+                self.skipped += 1
+                return slot.ok
+        fut = asyncio.get_running_loop().create_future()
+        slot.waiters.append(fut)
+        if slot.task is None:
+            slot.task = asyncio.create_task(self._run(key, slot))
+        return await fut
+
+    async def _run(self, key: _Key, slot: _Slot) -> None:
+        try:
+            while slot.waiters:
+                nick, waiters = slot.nick, slot.waiters
+                slot.waiters = []
+                before = slot.member.nick or None
+                if slot.written is not None and nick == slot.written and slot.ok:
+                    ok = True
+                    self.skipped += len(waiters)
+                else:
+                    slot.written = nick
+                    slot.busy = True
+                    try:
+                        ok = await self._edit(slot.member, nick)
+                    finally:
+                        slot.busy = False
+                    slot.ok = ok
+                    if ok:
+                        self._applied[key] = (before, nick)
+                for fut in waiters:
+                    if not fut.done():
+                        fut.set_result(ok)
+                if self.delay:
+                    await asyncio.sleep(self.delay)
+        finally:
+            for fut in slot.waiters:
+                if not fut.done():
+                    fut.set_result(False)
+            if self._slots.get(key) is slot:
+                del self._slots[key]
+
+    async def _edit(self, member: discord.Member, nick: Optional[str]) -> bool:
+        self.sent += 1
+        try:
+            await member.edit(nick=nick, reason=self.reason)
+            return True
+        except (discord.Forbidden, discord.HTTPException):
+            return False
+
+    def forget(self, guild_id: int, user_id: int) -> None:
+        self._applied.pop((guild_id, user_id), None)
+
+    def close(self) -> None:
+        """待ち時間中のものを打ち切る（未送信の変更は失敗扱い）。"""
+        for slot in list(self._slots.values()):
+            if slot.task is not None:
+                slot.task.cancel()
+        self._slots.clear()
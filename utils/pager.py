@@ -0,0 +1,47 @@
+from typing import List, Optional
+
+import discord
+
+from utils.metrics import timed
+
+
+class EmbedPager(discord.ui.View):
+    """
+    Embed を1ページずつめくる View（結果表示用。永続ではない）。
+    ページが1枚なら送り/戻しボタンは出さない。サブクラスでボタンを足してよい。
+    """
+
+    def __init__(self, pages: Optional[List[discord.Embed]] = None, timeout: float = 300):
+        super().__init__(timeout=timeout)
+        self.pages = list(pages or [])
+        self.index = 0
+        if len(self.pages) <= 1:
+            self.remove_item(self.prev_page)
+            self.remove_item(self.next_page)
+        else:
+            self._sync()
+
+    @property
+    def first(self) -> Optional[discord.Embed]:
+        return self.pages[0] if self.pages else None
+
+    def _sync(self) -> None:
+        self.prev_page.disabled = self.index <= 0
+        self.next_page.disabled = self.index >= len(self.pages) - 1
+        self.prev_page.label = f"◀ {self.index}/{len(self.pages) - 1}" if self.index else "◀"
+
+    async def _show(self, interaction: discord.Interaction) -> None:
+        self._sync()
+        await interaction.response.edit_message(embed=self.pages[self.index], view=self)
+
+    @discord.ui.button(label="◀", style=discord.ButtonStyle.secondary, row=1)
+    @timed("pager:page")
+    async def prev_page(self, interaction: discord.Interaction, button: discord.ui.Button) -> None:
+        self.index = max(0, self.index - 1)
+        await self._show(interaction)
+
+    @discord.ui.button(label="▶", style=discord.ButtonStyle.secondary, row=1)
+    @timed("pager:page")
+    async def next_page(self, interaction: discord.Interaction, button: discord.ui.Button) -> None:
+        self.index = min(len(self.pages) - 1, self.index + 1)
+        await self._show(interaction)
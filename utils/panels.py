@@ -0,0 +1,312 @@
+import asyncio
+import hashlib
+import os
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import discord
+
+from utils import jsonio
+
+DEFAULT_PATH = os.path.join("data", "panels.json")
+
+# render(guild_id) -> (content, embed, view)
+Render = Callable[[int], Tuple[Optional[str], Optional[discord.Embed], discord.ui.View]]
+
+
+@dataclass
+class PanelKind:
+    """
+    パネルの種類（例: "joya", "event:2026_omikuji"）。
+    render: ギルドごとの現在あるべき表示。views: 起動時に登録する永続View。
+    targets: 自動で置くべき (guild_id, channel_id)。無ければコマンドで置いたものだけ管理する。
+    """
+
+    name: str
+    render: Render
+    views: Sequence[discord.ui.View] = ()
+    targets: Optional[Callable[[], Iterable[Tuple[int, int]]]] = None
+
+
+@dataclass
+class _Record:
+    channel_id: int
+    message_id: int
+    view: str = ""
+    hash: str = ""
+
+
+def content_hash(content: Optional[str], embed: Optional[discord.Embed], view: discord.ui.View) -> str:
+    payload = {
+        "content": content or "",
+        "embed": embed.to_dict() if embed is not None else None,
+        "components": view.to_components() if view is not None else [],
+    }
+    return hashlib.sha256(jsonio.canonical(payload).encode("utf-8")).hexdigest()[:16]
+
+
+class PanelRegistry:
+    """
+    投稿済みパネルの台帳（data/panels.json）。(種類, ギルド) ごとに1枚。
+    {"panels": {"<kind>": {"<guild_id>": {channel_id, message_id, view, hash}}}}
+
+    起動後に一度だけ全パネルを確認し（同時実行数を制限）、表示が変わったものだけ編集、
+    消えていたものだけ投稿し直す。再接続（on_ready の再発火）では何もしない。
+    """
+
+    def __init__(self, path: str = DEFAULT_PATH, concurrency: int = 4):
+        self.path = path
+        self.concurrency = max(1, concurrency)
+        self.kinds: Dict[str, PanelKind] = {}
+        self._records: Dict[str, Dict[str, _Record]] = {}
+        self._client: Optional[discord.Client] = None
+        self._verify_task: Optional[asyncio.Task] = None
+        # 起動後に登録された種類の確認タスク（参照を持っておかないと途中で回収されうる）
+        self._late_verify: Set[asyncio.Task] = set()
+        self.load()
+
+    # ------------------------------------------------------
+    # 台帳
+    # ------------------------------------------------------
+    def load(self) -> None:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = jsonio.load(f)
+        except (OSError, ValueError):
+            data = {}
+        panels = data.get("panels") if isinstance(data, dict) else None
+        self._records = {}
+        for kind, guilds in (panels or {}).items():
+            if not isinstance(guilds, dict):
+                continue
+            for gid, rec in guilds.items():
+                try:
+                    self._records.setdefault(kind, {})[str(gid)] = _Record(
+                        int(rec["channel_id"]),
+                        int(rec["message_id"]),
+                        str(rec.get("view", "")),
+                        str(rec.get("hash", "")),
+                    )
+                except (KeyError, TypeError, ValueError):
+                    continue
+
+    def save(self) -> None:
+        data = {
+            kind: {gid: vars(rec) for gid, rec in guilds.items()}
+            for kind, guilds in self._records.items() if guilds
+        }
+        d = os.path.dirname(self.path)
+        if d:
+            os.makedirs(d, exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            jsonio.dump({"panels": data}, f)
+        os.replace(tmp, self.path)
+
+    def record(self, kind: str, guild_id: int) -> Optional[_Record]:
+        return self._records.get(kind, {}).get(str(guild_id))
+
+    def records(self, kind: str) -> List[Tuple[int, _Record]]:
+        return [(int(g), r) for g, r in self._records.get(kind, {}).items()]
+
+    def adopt(self, kind: str, guild_id: int, channel_id: int, message_id: int) -> None:
+        """以前の保存形式（各Cogの state）にあったパネルを台帳に移す。既にあれば何もしない。"""
+        if not channel_id or not message_id or self.record(kind, guild_id) is not None:
+            return
+        self._records.setdefault(kind, {})[str(guild_id)] = _Record(int(channel_id), int(message_id))
+        self.save()
+
+    def rename(self, old: str, new: str) -> int:
+        """種類の名前が変わったパネルを引き継ぐ（新しい名前で置いてあるギルドはそのまま）。移した数を返す。"""
+        moved = self._records.pop(old, None) or {}
+        if not moved:
+            return 0
+        dest = self._records.setdefault(new, {})
+        n = 0
+        for gid, rec in moved.items():
+            if gid not in dest:
+                dest[gid] = rec
+                n += 1
+        self.save()
+        return n
+
+    def forget(self, kind: str, guild_id: int) -> None:
+        if self._records.get(kind, {}).pop(str(guild_id), None) is not None:
+            self.save()
+
+    # ------------------------------------------------------
+    # 種類の登録
+    # ------------------------------------------------------
+    def register(self, kind: PanelKind) -> None:
+        self.kinds[kind.name] = kind
+        if self._client is not None:
+            # 起動後に読み込まれたCog（リロードなど）はその場で登録・確認する
+            for view in kind.views:
+                self._client.add_view(view)
+            task = asyncio.create_task(
+                self._verify(self._client, [kind.name]), name=f"panels:verify:{kind.name}"
+            )
+            self._late_verify.add(task)
+            task.add_done_callback(self._verify_done)
+
+    def _verify_done(self, task: asyncio.Task) -> None:
+        self._late_verify.discard(task)
+        if task.cancelled():
+            return
+        e = task.exception()
+        if e is not None:
+            print(f"⚠️ Panel verify task {task.get_name()} failed: {e!r}")
+
+    def unregister(self, name: str) -> None:
+        self.kinds.pop(name, None)
+
+    def start(self, client: discord.Client) -> None:
+        """全Cogの読み込み後に一度だけ呼ぶ。永続Viewをまとめて登録し、確認タスクを起こす。"""
+        if self._client is not None:
+            return
+        self._client = client
+        views = [v for kind in self.kinds.values() for v in kind.views]
+        for view in views:
+            client.add_view(view)
+        print(f"🪧 Registered {len(views)} persistent views for {len(self.kinds)} panel kinds")
+        self._verify_task = asyncio.create_task(self._verify(client, list(self.kinds)))
+
+    # ------------------------------------------------------
+    # 投稿・更新
+    # ------------------------------------------------------
+    async def publish(
+        self,
+        client: discord.Client,
+        name: str,
+        channel: discord.abc.Messageable,
+        guild_id: int,
+        verify: bool = False,
+    ) -> Optional[discord.Message]:
+        """
+        パネルを置く。同じチャンネルに置いてあれば、表示が変わったときだけ編集する
+        （verify=True なら変わっていなくてもメッセージが残っているか確かめる）。
+        別のチャンネルなら新しく投稿し、古いものは消す。何もしなければ None。
+        """
+        kind = self.kinds[name]
+        content, embed, view = kind.render(guild_id)
+        h = content_hash(content, embed, view)
+        rec = self.record(name, guild_id)
+        if rec is not None and rec.channel_id == getattr(channel, "id", 0):
+            try:
+                if rec.hash == h:
+                    if not verify:
+                        return None
+                    await channel.fetch_message(rec.message_id)
+                    return None
+                msg = await channel.get_partial_message(rec.message_id).edit(
+                    content=content, embed=embed, view=view
+                )
+                self._store(name, guild_id, msg.channel.id, msg.id, view, h)
+                return msg
+            except discord.NotFound:
+                pass
+        elif rec is not None:
+            await self._delete(client, rec)
+        msg = await channel.send(content=content, embed=embed, view=view)
+        self._store(name, guild_id, msg.channel.id, msg.id, view, h)
+        return msg
+
+    async def refresh(self, client: discord.Client, name: str, guild_id: int) -> bool:
+        """台帳にあるパネルを今の表示に合わせる（変わっていなければ何もしない）。"""
+        rec = self.record(name, guild_id)
+        kind = self.kinds.get(name)
+        if rec is None or kind is None:
+            return False
+        ch = client.get_channel(rec.channel_id)
+        if ch is None:
+            return False
+        try:
+            return await self.publish(client, name, ch, guild_id) is not None
+        except (discord.Forbidden, discord.HTTPException) as e:
+            print(f"⚠️ Panel {name}/{guild_id} refresh failed: {e}")
+            return False
+
+    def _store(self, name, guild_id, channel_id, message_id, view, h) -> None:
+        self._records.setdefault(name, {})[str(guild_id)] = _Record(
+            int(channel_id), int(message_id), type(view).__name__, h
+        )
+        self.save()
+
+    async def _delete(self, client: discord.Client, rec: _Record) -> None:
+        ch = client.get_channel(rec.channel_id)
+        if ch is None:
+            return
+        try:
+            await ch.get_partial_message(rec.message_id).delete()
+        except (discord.NotFound, discord.Forbidden, discord.HTTPException):
+            pass
+
+    # ------------------------------------------------------
+    # 起動時の確認
+    # ------------------------------------------------------
+    async def _verify(self, client: discord.Client, names: List[str]) -> None:
+        await client.wait_until_ready()
+        sem = asyncio.Semaphore(self.concurrency)
+        jobs = []
+        for name in names:
+            kind = self.kinds.get(name)
+            if kind is None:
+                continue
+            for guild_id, rec in self.records(name):
+                jobs.append(self._verify_one(client, sem, name, guild_id, rec))
+            if kind.targets is not None:
+                for guild_id, channel_id in kind.targets():
+                    if channel_id and self.record(name, guild_id) is None:
+                        jobs.append(self._post_target(client, sem, name, guild_id, channel_id))
+        if not jobs:
+            return
+        results = await asyncio.gather(*jobs, return_exceptions=True)
+        changed = sum(1 for r in results if r is True)
+        failed = [r for r in results if isinstance(r, BaseException)]
+        print(f"🪧 Panels verified: {len(jobs)} checked, {changed} updated, {len(failed)} failed")
+        for e in failed[:5]:
+            print(f"⚠️ Panel verify error: {e!r}")
+
+    async def _verify_one(self, client, sem, name: str, guild_id: int, rec: _Record) -> bool:
+        kind = self.kinds[name]
+        content, embed, view = kind.render(guild_id)
+        h = content_hash(content, embed, view)
+        ch = client.get_channel(rec.channel_id)
+        if ch is None:
+            return False
+        async with sem:
+            try:
+                if rec.hash != h:
+                    msg = await ch.get_partial_message(rec.message_id).edit(
+                        content=content, embed=embed, view=view
+                    )
+                else:
+                    await ch.fetch_message(rec.message_id)
+                    return False
+            except discord.NotFound:
+                msg = await ch.send(content=content, embed=embed, view=view)
+            except discord.Forbidden:
+                return False
+        self._store(name, guild_id, msg.channel.id, msg.id, view, h)
+        return True
+
+    async def _post_target(self, client, sem, name: str, guild_id: int, channel_id: int) -> bool:
+        ch = client.get_channel(channel_id)
+        if ch is None:
+            return False
+        async with sem:
+            return await self.publish(client, name, ch, guild_id) is not None
+
+
+_registry: Optional[PanelRegistry] = None
+
+
+def get_panels() -> PanelRegistry:
+    global _registry
+    if _registry is None:
+        try:
+            concurrency = int(os.getenv("PANEL_VERIFY_CONCURRENCY") or 4)
+        except ValueError:
+            concurrency = 4
+        _registry = PanelRegistry(os.getenv("PANELS_PATH") or DEFAULT_PATH, concurrency)
+    return _registry
@@ -0,0 +1,245 @@
+import os
+from typing import Dict, Optional, Tuple
+
+from utils import jsonio
+from utils.metrics import track_flush
+from utils.ranking import RankIndex
+
+# イベントのポイント台帳（cogs/events.py がポイントを使うイベントごとに1つ持つ）。
+# キーは "guild_id:user_id"。順位表はギルドごと。
+
+
+def _replay(points_path: str, ledger_path: str, initial: int) -> Tuple[Dict[str, int], int, int, int]:
+    """スナップショットと台帳から (残高, 初期値, seq, 再生した行数) を戻す。キーの形は問わない。"""
+    points: Dict[str, int] = {}
+    seq = 0
+    try:
+        with open(points_path, "r", encoding="utf-8") as f:
+            data = jsonio.load(f)
+    except (OSError, ValueError):
+        data = {}
+    if isinstance(data, dict) and isinstance(data.get("points"), dict):
+        seq = int(data.get("seq", 0))
+        initial = int(data.get("initial", initial))
+        raw = data["points"]
+    else:
+        raw = data if isinstance(data, dict) else {}  # 以前の {uid: pt} 形式
+    for k, v in raw.items():
+        try:
+            points[str(k)] = int(v)
+        except (TypeError, ValueError):
+            continue
+
+    def apply(key: str, delta: int) -> None:
+        points[key] = max(0, points.get(key, initial) + delta)
+
+    replayed = 0
+    try:
+        with open(ledger_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    rec = jsonio.loads(line)
+                except ValueError:
+                    continue  # 書きかけの最終行
+                if not isinstance(rec, dict) or int(rec.get("seq", 0)) <= seq:
+                    continue
+                op = rec.get("op")
+                if op == "add":
+                    apply(str(rec["uid"]), int(rec["delta"]))
+                elif op == "batch":
+                    for key, delta in rec.get("deltas", {}).items():
+                        apply(str(key), int(delta))
+                elif op == "epoch":
+                    initial = int(rec.get("initial", initial))
+                    points = {}
+                elif op == "reset":
+                    prefix = f"{rec.get('guild')}:"
+                    points = {k: v for k, v in points.items() if not k.startswith(prefix)}
+                seq = int(rec["seq"])
+                replayed += 1
+    except OSError:
+        pass
+    return points, initial, seq, replayed
+
+
+def _split(key: str) -> Optional[Tuple[int, int]]:
+    gid, sep, uid = key.partition(":")
+    if not sep or not gid.isdigit() or not uid.isdigit():
+        return None
+    return int(gid), int(uid)
+
+
+class PointLedger:
+    """
+    ポイントの台帳。増減はすべて1行ずつ JSONL に追記し、残高はメモリ上で持つ。
+      {"seq": 12, "op": "add", "uid": "1:123", "delta": -50, "reason": "draw"}
+      {"seq": 13, "op": "batch", "deltas": {"1:123": 1, "1:456": 1}, "reason": "vc"}
+      {"seq": 14, "op": "reset", "guild": "1"}      # ギルドの全員を初期値に戻す
+      {"seq": 15, "op": "epoch", "initial": 500}   # 全員リセット（おみくじCogの台帳にだけある）
+    一定件数ごとに残高のスナップショット（points_path）を書き、台帳を切り詰める。
+    起動時はスナップショット + それより新しい seq の行を再生して残高を戻す。
+    残高が無いユーザーは、その時点の初期値を持っているものとして扱う。
+    順位表（rank）は増減のたびに差分で更新し、VCの一括加算は1回でまとめて反映する。
+    """
+
+    def __init__(self, points_path: str, ledger_path: str, initial: int,
+                 snapshot_every: int = 1000):
+        self._points_path = points_path
+        self._ledger_path = ledger_path
+        self._initial = int(initial)
+        self._snapshot_every = max(1, snapshot_every)
+        self._points: Dict[str, int] = {}
+        self._seq = 0
+        self._since_snapshot = 0
+        self._fp = None
+        self._ranks: Dict[int, RankIndex] = {}
+
+    def _ensure_dir(self, path: str) -> None:
+        d = os.path.dirname(path)
+        if d and not os.path.exists(d):
+            os.makedirs(d, exist_ok=True)
+
+    @property
+    def empty(self) -> bool:
+        return not self._points and self._seq == 0
+
+    # ------------------------------------------------------
+    # 読み込み・スナップショット
+    # ------------------------------------------------------
+    def load(self) -> None:
+        self._points, self._initial, self._seq, replayed = _replay(
+            self._points_path, self._ledger_path, self._initial
+        )
+        self._since_snapshot = replayed
+        self._rebuild_ranks()
+        print(
+            f"💰 Point ledger loaded: {os.path.basename(self._points_path)} "
+            f"{len(self._points)} users, seq={self._seq}, replayed={replayed}"
+        )
+
+    def import_legacy(self, points_path: str, ledger_path: str, guild_id: int) -> int:
+        """
+        以前の {uid: pt} 形式の残高（と台帳）を guild_id のものとして取り込み、すぐスナップショットを書く。
+        空の台帳にだけ使う。取り込んだ人数を返す。
+        """
+        points, initial, _seq, _n = _replay(points_path, ledger_path, self._initial)
+        if not points:
+            return 0
+        self._initial = initial
+        n = 0
+        for uid, pts in points.items():
+            if uid.isdigit():
+                self._points[f"{guild_id}:{uid}"] = pts
+                n += 1
+        self._rebuild_ranks()
+        self.snapshot()
+        return n
+
+    def import_points(self, points: Dict[str, int]) -> int:
+        """"gid:uid" をキーにした残高をそのまま取り込み、すぐスナップショットを書く。"""
+        n = 0
+        for key, pts in points.items():
+            if _split(str(key)) is None:
+                continue
+            self._points[str(key)] = max(0, int(pts))
+            n += 1
+        if n:
+            self._rebuild_ranks()
+            self.snapshot()
+        return n
+
+    def _rebuild_ranks(self) -> None:
+        by_guild: Dict[int, Dict[int, int]] = {}
+        for key, pts in self._points.items():
+            ids = _split(key)
+            if ids is not None:
+                by_guild.setdefault(ids[0], {})[ids[1]] = pts
+        self._ranks = {gid: RankIndex(scores) for gid, scores in by_guild.items()}
+
+    def snapshot(self) -> None:
+        """残高を書き出し、台帳を空にする（スナップショットの seq 以前の行は不要）。"""
+        self._ensure_dir(self._points_path)
+        tmp = self._points_path + ".tmp"
+        with track_flush("event_points"):
+            with open(tmp, "w", encoding="utf-8") as f:
+                jsonio.dump({"seq": self._seq, "initial": self._initial, "points": self._points}, f)
+            os.replace(tmp, self._points_path)
+            self._close_fp()
+            with open(self._ledger_path, "w", encoding="utf-8"):
+                pass
+        self._since_snapshot = 0
+
+    def close(self) -> None:
+        if self._since_snapshot:
+            self.snapshot()
+        self._close_fp()
+
+    def _close_fp(self) -> None:
+        if self._fp is not None:
+            self._fp.close()
+            self._fp = None
+
+    # ------------------------------------------------------
+    # 追記
+    # ------------------------------------------------------
+    def _append(self, rec: Dict) -> None:
+        self._seq += 1
+        rec["seq"] = self._seq
+        if self._fp is None:
+            self._ensure_dir(self._ledger_path)
+            self._fp = open(self._ledger_path, "a", encoding="utf-8")
+        self._fp.write(jsonio.dumps(rec) + "\n")
+        self._fp.flush()
+        self._since_snapshot += 1
+
+    def _maybe_snapshot(self) -> None:
+        # 追記した行を残高に反映してから呼ぶ
+        if self._since_snapshot >= self._snapshot_every:
+            self.snapshot()
+
+    def _apply(self, key: str, delta: int) -> int:
+        cur = self._points.get(key, self._initial) + delta
+        if cur < 0:
+            cur = 0
+        self._points[key] = cur
+        return cur
+
+    # ------------------------------------------------------
+    # 操作（どれも await を挟まないのでロック不要）
+    # ------------------------------------------------------
+    def rank(self, guild_id: int) -> RankIndex:
+        r = self._ranks.get(guild_id)
+        if r is None:
+            r = self._ranks[guild_id] = RankIndex()
+        return r
+
+    def get(self, guild_id: int, user_id: int) -> int:
+        return self._points.get(f"{guild_id}:{user_id}", self._initial)
+
+    def add(self, guild_id: int, user_id: int, delta: int, reason: str) -> int:
+        key = f"{guild_id}:{user_id}"
+        self._append({"op": "add", "uid": key, "delta": int(delta), "reason": reason})
+        cur = self._apply(key, int(delta))
+        self.rank(guild_id).update(int(user_id), cur)
+        self._maybe_snapshot()
+        return cur
+
+    def add_many(self, guild_id: int, deltas: Dict[int, int], reason: str) -> None:
+        if not deltas:
+            return
+        batch = {f"{guild_id}:{uid}": int(d) for uid, d in deltas.items()}
+        self._append({"op": "batch", "deltas": batch, "reason": reason})
+        self.rank(guild_id).update_many(
+            (int(key.split(":", 1)[1]), self._apply(key, d)) for key, d in batch.items()
+        )
+        self._maybe_snapshot()
+
+    def reset_guild(self, guild_id: int) -> int:
+        prefix = f"{guild_id}:"
+        keys = [k for k in self._points if k.startswith(prefix)]
+        self._append({"op": "reset", "guild": str(guild_id)})
+        for k in keys:
+            del self._points[k]
+        self.rank(guild_id).clear()
+        self._maybe_snapshot()
+        return len(keys)
@@ -0,0 +1,169 @@
+import re
+import time
+from collections import Counter, deque
+from dataclasses import dataclass
+from typing import Deque, Dict, Optional, Tuple
+
+from utils.moderation import normalize
+
+# 参加の集中（レイド）の検知。ギルドごとに直近 window 秒の参加を持ち、
+# 人数・新しいアカウントの数・似た名前の数を、参加と期限切れのたびに足し引きで更新する
+# （参加のたびに窓の中を数え直さない）。
+
+_DIGITS = re.compile(r"\d+")
+
+# 似た名前とみなす先頭の文字数（「raider01」「raider02」→ どちらも "raider"）
+NAME_KEY_LEN = 6
+
+
+def name_key(name: str) -> str:
+    """正規化して数字を抜いた先頭 NAME_KEY_LEN 文字。数字だけの名前は "#"。"""
+    key = _DIGITS.sub("", normalize(name or ""))[:NAME_KEY_LEN]
+    return key or "#"
+
+
+@dataclass(frozen=True)
+class t_raid_stats:
+    joins: int
+    window: int  # 秒
+    young: int
+    similar: int
+    raid: bool
+    since: float  # raid のときだけ。開始時刻（time.time）
+    peak: int
+
+    @property
+    def per_minute(self) -> float:
+        return self.joins * 60.0 / self.window if self.window else 0.0
+
+    @property
+    def young_ratio(self) -> float:
+        return self.young / self.joins if self.joins else 0.0
+
+    @property
+    def similar_ratio(self) -> float:
+        return self.similar / self.joins if self.joins else 0.0
+
+
+class JoinWindow:
+    """1ギルド分の直近の参加。(時刻, 新しいアカウントか, 名前のキー) を古い順に持つ。"""
+
+    def __init__(self, seconds: int):
+        self.seconds = max(1, int(seconds))
+        self._joins: Deque[Tuple[float, bool, str]] = deque()
+        self._names: Counter = Counter()
+        self.young = 0
+
+    def __len__(self) -> int:
+        return len(self._joins)
+
+    @property
+    def similar(self) -> int:
+        """名前のキーが窓の中の他の参加と重なっている人数（同じキーの2人目以降）。"""
+        return len(self._joins) - len(self._names)
+
+    def add(self, now: float, young: bool, key: str) -> None:
+        self.expire(now)
+        self._joins.append((now, young, key))
+        self._names[key] += 1
+        if young:
+            self.young += 1
+
+    def expire(self, now: float) -> None:
+        edge = now - self.seconds
+        joins, names = self._joins, self._names
+        while joins and joins[0][0] <= edge:
+            _ts, young, key = joins.popleft()
+            if young:
+                self.young -= 1
+            left = names[key] - 1
+            if left:
+                names[key] = left
+            else:
+                del names[key]
+
+
+class RaidDetector:
+    """
+    threshold: 窓の中の参加がこの人数に達したらレイド扱い。
+    その半分以上でも、新しいアカウント（young_days 日未満）か似た名前が過半数ならレイド扱い。
+    レイド中は、最後に条件を満たしてから calm 秒たち、参加が半分未満に落ちていれば終わる。
+    """
+
+    YOUNG_SHARE = 0.5
+    SIMILAR_SHARE = 0.5
+
+    def __init__(self, young_days: float = 7.0, calm: float = 300.0):
+        self.young_seconds = young_days * 86400.0
+        self.calm = calm
+        self._windows: Dict[int, JoinWindow] = {}
+        self._since: Dict[int, float] = {}
+        self._last_hit: Dict[int, float] = {}
+        self._peak: Dict[int, int] = {}
+
+    def _window(self, guild_id: int, seconds: int) -> JoinWindow:
+        w = self._windows.get(guild_id)
+        if w is None:
+            w = self._windows[guild_id] = JoinWindow(seconds)
+        else:
+            w.seconds = max(1, int(seconds))  # 設定の変更は次の expire から効く
+        return w
+
+    def _hit(self, w: JoinWindow, threshold: int) -> bool:
+        n = len(w)
+        if n >= threshold:
+            return True
+        if n * 2 < threshold:
+            return False
+        return w.young > n * self.YOUNG_SHARE or w.similar > n * self.SIMILAR_SHARE
+
+    def is_raid(self, guild_id: int) -> bool:
+        return guild_id in self._since
+
+    def observe(self, guild_id: int, created_at: float, name: str, *, threshold: int,
+                window: int, now: Optional[float] = None) -> bool:
+        """参加を1件入れる。この参加でレイド扱いに切り替わったら True。"""
+        now = time.time() if now is None else now
+        w = self._window(guild_id, window)
+        w.add(now, now - created_at < self.young_seconds, name_key(name))
+        if not self._hit(w, max(2, threshold)):
+            return False
+        self._last_hit[guild_id] = now
+        self._peak[guild_id] = max(self._peak.get(guild_id, 0), len(w))
+        if guild_id in self._since:
+            return False
+        self._since[guild_id] = now
+        return True
+
+    def calm_at(self, guild_id: int) -> float:
+        """レイド中なら、終わるかどうかを次に確かめる時刻。"""
+        return self._last_hit.get(guild_id, 0.0) + self.calm
+
+    def settle(self, guild_id: int, threshold: int, now: Optional[float] = None) -> bool:
+        """レイド中で、落ち着いていれば終わらせて True。"""
+        if guild_id not in self._since:
+            return False
+        now = time.time() if now is None else now
+        w = self._windows.get(guild_id)
+        if w is not None:
+            w.expire(now)
+        if now < self.calm_at(guild_id) or (w is not None and len(w) * 2 >= max(2, threshold)):
+            return False
+        del self._since[guild_id]
+        self._last_hit.pop(guild_id, None)
+        self._peak.pop(guild_id, None)
+        return True
+
+    def stats(self, guild_id: int, window: int, now: Optional[float] = None) -> t_raid_stats:
+        now = time.time() if now is None else now
+        w = self._window(guild_id, window)
+        w.expire(now)
+        return t_raid_stats(
+            joins=len(w),
+            window=w.seconds,
+            young=w.young,
+            similar=w.similar,
+            raid=guild_id in self._since,
+            since=self._since.get(guild_id, 0.0),
+            peak=self._peak.get(guild_id, len(w)),
+        )
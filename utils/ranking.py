@@ -0,0 +1,154 @@
+from bisect import bisect_left, bisect_right, insort
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# 点数の高い順の順位表。キーは (-score, user_id) で、ソート済みのバケットに分けて持つ。
+# バケットごとの件数は Fenwick 木で持ち、順位（何番目か）と n 番目の取り出しを O(log n) にする。
+
+_LOAD = 256
+
+
+class _Fenwick:
+    def __init__(self, sizes: List[int]):
+        self.n = len(sizes)
+        self.tree = [0] * (self.n + 1)
+        for i, v in enumerate(sizes):
+            self.add(i, v)
+
+    def add(self, i: int, delta: int) -> None:
+        i += 1
+        while i <= self.n:
+            self.tree[i] += delta
+            i += i & -i
+
+    def prefix(self, i: int) -> int:
+        """バケット 0..i-1 の件数の合計。"""
+        s = 0
+        while i > 0:
+            s += self.tree[i]
+            i -= i & -i
+        return s
+
+    def find(self, k: int) -> Tuple[int, int]:
+        """k 番目（0始まり）を含むバケットと、その中での位置。"""
+        pos = 0
+        step = 1 << self.n.bit_length()
+        while step:
+            nxt = pos + step
+            if nxt <= self.n and self.tree[nxt] <= k:
+                pos = nxt
+                k -= self.tree[nxt]
+            step >>= 1
+        return pos, k
+
+
+class RankIndex:
+    def __init__(self, scores: Optional[Dict[int, int]] = None):
+        self._score: Dict[int, int] = {}
+        self._buckets: List[List[Tuple[int, int]]] = []
+        self._firsts: List[Tuple[int, int]] = []
+        self._fw = _Fenwick([])
+        self.rebuild(scores or {})
+
+    def __len__(self) -> int:
+        return len(self._score)
+
+    # ------------------------------------------------------
+    # 更新
+    # ------------------------------------------------------
+    def rebuild(self, scores: Dict[int, int]) -> None:
+        self._score = {int(u): int(s) for u, s in scores.items()}
+        keys = sorted((-s, u) for u, s in self._score.items())
+        self._buckets = [keys[i:i + _LOAD] for i in range(0, len(keys), _LOAD)]
+        self._reindex()
+
+    def clear(self) -> None:
+        self.rebuild({})
+
+    def _reindex(self) -> None:
+        self._firsts = [b[0] for b in self._buckets]
+        self._fw = _Fenwick([len(b) for b in self._buckets])
+
+    def _locate(self, key: Tuple[int, int]) -> int:
+        i = bisect_right(self._firsts, key) - 1
+        return max(i, 0)
+
+    def _remove(self, key: Tuple[int, int]) -> None:
+        bi = self._locate(key)
+        b = self._buckets[bi]
+        j = bisect_left(b, key)
+        if j >= len(b) or b[j] != key:
+            return
+        del b[j]
+        if not b:
+            del self._buckets[bi]
+            self._reindex()
+            return
+        self._fw.add(bi, -1)
+        if j == 0:
+            self._firsts[bi] = b[0]
+
+    def _insert(self, key: Tuple[int, int]) -> None:
+        if not self._buckets:
+            self._buckets.append([key])
+            self._reindex()
+            return
+        bi = self._locate(key)
+        b = self._buckets[bi]
+        insort(b, key)
+        if len(b) > 2 * _LOAD:
+            self._buckets[bi:bi + 1] = [b[:_LOAD], b[_LOAD:]]
+            self._reindex()
+            return
+        self._fw.add(bi, 1)
+        self._firsts[bi] = b[0]
+
+    def update(self, user_id: int, score: int) -> None:
+        user_id = int(user_id)
+        old = self._score.get(user_id)
+        if old == score:
+            return
+        if old is not None:
+            self._remove((-old, user_id))
+        self._score[user_id] = int(score)
+        self._insert((-int(score), user_id))
+
+    def update_many(self, items: Iterable[Tuple[int, int]]) -> None:
+        """まとめて更新する。件数が多ければ1回のソートで作り直す。"""
+        items = list(items)
+        if len(items) * 8 > len(self._score):
+            merged = dict(self._score)
+            merged.update((int(u), int(s)) for u, s in items)
+            self.rebuild(merged)
+            return
+        for u, s in items:
+            self.update(u, s)
+
+    # ------------------------------------------------------
+    # 参照
+    # ------------------------------------------------------
+    def rank(self, user_id: int) -> Optional[int]:
+        """1始まりの順位。同点は同じ順位（上にいる人数 + 1）。"""
+        score = self._score.get(int(user_id))
+        if score is None:
+            return None
+        key = (-score, -1)  # 同点の中で一番前
+        bi = self._locate(key)
+        b = self._buckets[bi]
+        return self._fw.prefix(bi) + bisect_left(b, key) + 1
+
+    def score(self, user_id: int) -> Optional[int]:
+        return self._score.get(int(user_id))
+
+    def page(self, offset: int, limit: int) -> List[Tuple[int, int]]:
+        """offset 番目（0始まり）から limit 件の (user_id, score)。"""
+        out: List[Tuple[int, int]] = []
+        if offset < 0 or offset >= len(self._score):
+            return out
+        bi, j = self._fw.find(offset)
+        while bi < len(self._buckets) and len(out) < limit:
+            b = self._buckets[bi]
+            for neg, uid in b[j:j + (limit - len(out))]:
+                out.append((uid, -neg))
+            bi += 1
+            j = 0
+        return out
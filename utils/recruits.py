@@ -0,0 +1,143 @@
+import os
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Optional, Set
+
+from utils import jsonio
+
+DEFAULT_PATH = os.path.join("data", "valo_recruits.json")
+
+
+@dataclass
+class t_recruit:
+    """募集1件。キーは投稿メッセージのID。"""
+
+    message_id: int
+    guild_id: int
+    channel_id: int
+    owner_id: int
+    owner_name: str
+    kind: str  # "unrated" / "comp"
+    need: int
+    expires: float
+    note: str = ""
+    label: str = ""
+    members: List[int] = field(default_factory=list)
+
+    @property
+    def full(self) -> bool:
+        return len(self.members) >= self.need
+
+
+class RecruitStore:
+    """
+    募集中の投稿と連投制限（data/valo_recruits.json）。締め切った募集は消すので、持つのは募集中の分だけ。
+    {"recruits": {"<message_id>": {...}}, "cooldowns": {"<guild_id>:<user_id>": 解除時刻},
+     "optin": {"<guild_id>": [お誘いを受け取る user_id, ...]}}
+
+    連投制限は解除時刻で持ち、件数が前回の掃除の2倍を超えたら過ぎたものをまとめて捨てる。
+    """
+
+    def __init__(self, path: str = DEFAULT_PATH):
+        self.path = path
+        self.recruits: Dict[int, t_recruit] = {}
+        self._cooldowns: Dict[str, float] = {}
+        self._prune_at = 64
+        self._optin: Dict[int, Set[int]] = {}
+
+    def load(self) -> None:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = jsonio.load(f)
+        except (OSError, ValueError):
+            data = {}
+        if not isinstance(data, dict):
+            data = {}
+        self.recruits = {}
+        for mid, raw in (data.get("recruits") or {}).items():
+            try:
+                rec = t_recruit(**raw)
+                rec.message_id = int(mid)
+            except TypeError:
+                continue
+            self.recruits[rec.message_id] = rec
+        self._cooldowns = {
+            str(k): float(v) for k, v in (data.get("cooldowns") or {}).items()
+        }
+        self._optin = {}
+        for gid, uids in (data.get("optin") or {}).items():
+            try:
+                self._optin[int(gid)] = {int(u) for u in uids}
+            except (TypeError, ValueError):
+                continue
+        self._prune(time.time())
+
+    def save(self) -> None:
+        data = {
+            "recruits": {
+                str(mid): {k: v for k, v in asdict(rec).items() if k != "message_id"}
+                for mid, rec in self.recruits.items()
+            },
+            "cooldowns": self._cooldowns,
+            "optin": {str(gid): sorted(uids) for gid, uids in self._optin.items() if uids},
+        }
+        d = os.path.dirname(self.path)
+        if d:
+            os.makedirs(d, exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            jsonio.dump(data, f)
+        os.replace(tmp, self.path)
+
+    # ------------------------------------------------------
+    # 募集
+    # ------------------------------------------------------
+    def get(self, message_id: int) -> Optional[t_recruit]:
+        return self.recruits.get(int(message_id))
+
+    def add(self, rec: t_recruit) -> None:
+        self.recruits[rec.message_id] = rec
+        self.save()
+
+    def remove(self, message_id: int) -> Optional[t_recruit]:
+        rec = self.recruits.pop(int(message_id), None)
+        if rec is not None:
+            self.save()
+        return rec
+
+    def active(self) -> List[t_recruit]:
+        return list(self.recruits.values())
+
+    # ------------------------------------------------------
+    # 連投制限
+    # ------------------------------------------------------
+    def cooldown_left(self, guild_id: int, user_id: int, now: Optional[float] = None) -> int:
+        now = time.time() if now is None else now
+        until = self._cooldowns.get(f"{guild_id}:{user_id}", 0.0)
+        return max(0, int(until - now))
+
+    def touch_cooldown(self, guild_id: int, user_id: int, seconds: int,
+                       now: Optional[float] = None) -> None:
+        now = time.time() if now is None else now
+        self._cooldowns[f"{guild_id}:{user_id}"] = now + seconds
+        if len(self._cooldowns) >= self._prune_at:
+            self._prune(now)
+        # 保存は募集の追加と一緒に行う
+
+    def _prune(self, now: float) -> None:
+        self._cooldowns = {k: v for k, v in self._cooldowns.items() if v > now}
+        self._prune_at = max(64, 2 * len(self._cooldowns))
+
+    # ------------------------------------------------------
+    # お誘い（opt-in）
+    # ------------------------------------------------------
+    def opted(self, guild_id: int) -> Set[int]:
+        return set(self._optin.get(guild_id, ()))
+
+    def set_optin(self, guild_id: int, user_id: int, on: bool) -> None:
+        uids = self._optin.setdefault(guild_id, set())
+        if on:
+            uids.add(user_id)
+        else:
+            uids.discard(user_id)
+        self.save()
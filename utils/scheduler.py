@@ -0,0 +1,109 @@
+import asyncio
+import functools
+import heapq
+import itertools
+import time
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple, Union
+
+# 時刻指定の処理（イベントの開始/終了など）を1本のタイマーヒープでまとめて扱う。
+# 各Cogがポーリングしたり、押されるたびに時刻を比べたりしなくて済むようにする。
+
+Callback = Callable[[], Awaitable[None]]
+
+
+class Scheduler:
+    """
+    key ごとに1つの予約を持つ。同じ key で予約し直すと前のものは取り消される。
+    取り消しはヒープから消さずに無効印を付けるだけ（先頭に来たときに捨てる）。
+    """
+
+    # 時計の補正やスリープ復帰に備えて、待つのは最大でこの秒数まで
+    MAX_SLEEP = 300.0
+
+    def __init__(self) -> None:
+        self._heap: List[list] = []
+        self._entries: Dict[str, list] = {}
+        self._seq = itertools.count()
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        # 実行中のコールバック。参照を持っておかないと途中で GC されることがある
+        self._running: Set[asyncio.Task] = set()
+
+    def call_at(self, when: Union[datetime, float], key: str, callback: Callback) -> None:
+        ts = when.timestamp() if isinstance(when, datetime) else float(when)
+        self.cancel(key)
+        entry = [ts, next(self._seq), key, callback, True]
+        self._entries[key] = entry
+        heapq.heappush(self._heap, entry)
+        self._ensure_running()
+        if self._heap[0] is entry and self._wake is not None:
+            self._wake.set()
+
+    def cancel(self, key: str) -> bool:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return False
+        entry[4] = False
+        return True
+
+    def cancel_prefix(self, prefix: str) -> int:
+        keys = [k for k in self._entries if k.startswith(prefix)]
+        for k in keys:
+            self.cancel(k)
+        return len(keys)
+
+    def pending(self) -> List[Tuple[float, str]]:
+        return sorted((e[0], e[2]) for e in self._entries.values())
+
+    def _ensure_running(self) -> None:
+        if self._task is not None and not self._task.done():
+            return
+        self._wake = asyncio.Event()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            while self._heap and not self._heap[0][4]:
+                heapq.heappop(self._heap)
+            self._wake.clear()
+            if not self._heap:
+                await self._wake.wait()
+                continue
+            delay = self._heap[0][0] - time.time()
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=min(delay, self.MAX_SLEEP))
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            entry = heapq.heappop(self._heap)
+            entry[4] = False
+            if self._entries.get(entry[2]) is entry:
+                del self._entries[entry[2]]
+            task = asyncio.create_task(entry[3](), name=f"scheduler:{entry[2]}")
+            self._running.add(task)
+            task.add_done_callback(functools.partial(self._done, entry[2]))
+
+    def _done(self, key: str, task: asyncio.Task) -> None:
+        self._running.discard(task)
+        if task.cancelled():
+            return
+        e = task.exception()
+        if e is not None:
+            print(f"⚠️ Scheduled task {key} failed: {e!r}")
+
+
+_scheduler: Optional[Scheduler] = None
+
+
+def get_scheduler() -> Scheduler:
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = Scheduler()
+    return _scheduler
@@ -0,0 +1,68 @@
+import re
+from typing import Optional
+
+import discord
+
+# 利用者が書いた文を投稿・転送する前のチェック（VALO募集の一言 / DM転送 / welcome）。
+# 正規表現は1本にまとめて一度だけコンパイルし、どの種類に当たったかは名前付きグループで見る。
+
+_PATTERN = re.compile(
+    r"(?P<everyone>@(?:everyone|here))"
+    r"|(?P<role><@&\d*>?)"
+    r"|(?P<user><@!?\d*>?)"
+    r"|(?P<channel><#\d+>)"
+    r"|(?P<invite>(?:https?://)?(?:www\.)?"
+    r"(?:discord(?:app)?\.com/invite|discord\.gg|dsc\.gg)/[\w-]+)",
+    re.IGNORECASE,
+)
+
+LABELS = {
+    "everyone": "@everyone/@here",
+    "role": "ロールメンション",
+    "user": "ユーザーメンション",
+    "channel": "チャンネルリンク",
+    "invite": "招待リンク",
+}
+
+# 送信時に使う AllowedMentions。毎回作らず、この定数を使い回す（書き換えないこと）
+NO_MENTIONS = discord.AllowedMentions.none()
+ROLE_MENTIONS = discord.AllowedMentions(everyone=False, roles=True, users=False)
+USER_MENTIONS = discord.AllowedMentions(everyone=False, roles=False, users=True)
+
+
+def _may_match(text: str) -> bool:
+    # メンションは必ず @ か <# を含み、招待リンクは "gg/" か "/invite" を含む。
+    # どれも無い文（ほとんどの一言。"VCあり / 初心者OK" のような区切りの / も含む）は正規表現を通さない
+    if "@" in text or "<#" in text:
+        return True
+    if "/" not in text:
+        return False
+    low = text.lower()
+    return "gg/" in low or "/invite" in low
+
+
+def find_forbidden(text: Optional[str]) -> Optional[str]:
+    """最初に見つかった禁止要素の種類（LABELS のキー）。無ければ None。"""
+    if not text or not _may_match(text):
+        return None
+    m = _PATTERN.search(text)
+    return m.lastgroup if m else None
+
+
+def has_forbidden(text: Optional[str]) -> bool:
+    return find_forbidden(text) is not None
+
+
+def _neutralize(m: re.Match) -> str:
+    if m.lastgroup == "invite":
+        return "[招待リンク]"
+    s = m.group(0)
+    # @ / # の直後にゼロ幅スペースを入れて、メンションとして解釈されないようにする
+    return s[:2] + "\u200b" + s[2:] if s.startswith("<") else s[:1] + "\u200b" + s[1:]
+
+
+def neutralize(text: Optional[str]) -> str:
+    """表示用に無害化する（メンションは崩し、招待リンクは伏せる）。"""
+    if not text:
+        return ""
+    return _PATTERN.sub(_neutralize, text)
@@ -0,0 +1,160 @@
+import os
+import sys
+import time
+import asyncio
+import threading
+import traceback
+from collections import Counter
+from typing import Optional
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _short(path: str) -> str:
+    if path.startswith(_ROOT + os.sep):
+        return os.path.relpath(path, _ROOT)
+    return os.path.basename(path)
+
+
+def _site_of(stack: traceback.StackSummary) -> tuple[str, list[str]]:
+    """
+    ブロックしている箇所を「一番内側のリポジトリ内フレーム」で代表させる。
+    json.dump などライブラリ内で止まっていても、呼び出し元のCog側の行に集約される。
+    """
+    lines = [f"{_short(f.filename)}:{f.lineno} {f.name}" for f in stack[-8:]]
+    for f in reversed(stack):
+        if f.filename.startswith(_ROOT) and not f.filename.endswith("watchdog.py"):
+            site = f"{_short(f.filename)}:{f.lineno} {f.name}"
+            inner = stack[-1]
+            if inner is not f:
+                site += f" → {inner.name}"
+            return site, lines
+    if stack:
+        f = stack[-1]
+        return f"{_short(f.filename)}:{f.lineno} {f.name}", lines
+    return "unknown", lines
+
+
+class _Offender:
+    __slots__ = ("site", "count", "total", "worst", "stack")
+
+    def __init__(self, site: str):
+        self.site = site
+        self.count = 0
+        self.total = 0.0
+        self.worst = 0.0
+        self.stack: list[str] = []
+
+
+class LoopWatchdog:
+    """
+    イベントループの停止を検知する。
+
+    ループ上のハートビートタスクが時刻を更新し、別スレッドがそれを監視する。
+    更新が threshold 以上止まったら、ループスレッドのスタックを sys._current_frames() で採取し、
+    停止が終わった時点で最も多く採取された箇所に停止時間を計上する。
+    """
+
+    def __init__(self, threshold: float = 0.2, sample_interval: float = 0.02):
+        self.threshold = threshold
+        self.sample_interval = sample_interval
+        self.beat_interval = max(0.01, threshold / 4)
+        self._beat = time.monotonic()
+        self._loop_thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._offenders: dict[str, _Offender] = {}
+        self._pending: list[tuple[str, float, list[str]]] = []
+        self.stalls = 0
+
+    # ------------------------------------------------------
+    # 起動 / 停止（ループ上から呼ぶ）
+    # ------------------------------------------------------
+    def start(self) -> None:
+        if self._task is not None:
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._beat = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.create_task(self._heartbeat())
+        self._thread = threading.Thread(
+            target=self._watch, name="loop-watchdog", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        self._thread = None
+
+    async def _heartbeat(self) -> None:
+        while True:
+            self._beat = time.monotonic()
+            await asyncio.sleep(self.beat_interval)
+
+    # ------------------------------------------------------
+    # 監視スレッド
+    # ------------------------------------------------------
+    def _watch(self) -> None:
+        limit = self.beat_interval + self.threshold
+        samples: Counter = Counter()
+        stacks: dict[str, list[str]] = {}
+        stalled_since = None
+
+        while not self._stop.wait(self.sample_interval):
+            beat = self._beat
+            gap = time.monotonic() - beat
+            if gap > limit:
+                if stalled_since is None:
+                    stalled_since = beat
+                frame = sys._current_frames().get(self._loop_thread_id)
+                if frame is None:
+                    continue
+                site, lines = _site_of(traceback.extract_stack(frame))
+                del frame
+                samples[site] += 1
+                stacks.setdefault(site, lines)
+                continue
+
+            if stalled_since is not None and samples:
+                # 再開後の最初のハートビートまでを停止時間とみなす
+                duration = max(0.0, beat - stalled_since - self.beat_interval)
+                site = samples.most_common(1)[0][0]
+                self._record(site, duration, stacks[site])
+            stalled_since = None
+            samples.clear()
+            stacks.clear()
+
+    def _record(self, site: str, duration: float, stack: list[str]) -> None:
+        with self._lock:
+            o = self._offenders.get(site)
+            if o is None:
+                o = self._offenders[site] = _Offender(site)
+            o.count += 1
+            o.total += duration
+            if duration >= o.worst:
+                o.worst = duration
+                o.stack = stack
+            self.stalls += 1
+            if len(self._pending) < 200:
+                self._pending.append((site, duration, stack))
+
+    # ------------------------------------------------------
+    # 参照（ループ上から呼ぶ）
+    # ------------------------------------------------------
+    def drain(self) -> list[tuple[str, float, list[str]]]:
+        """前回呼び出し以降に終わった停止 [(site, 秒, stack)]"""
+        with self._lock:
+            out = self._pending
+            self._pending = []
+        return out
+
+    def top(self, n: int = 5) -> list[tuple[str, int, float, float, list[str]]]:
+        """停止時間の合計が大きい順 [(site, 回数, 合計秒, 最大秒, 最大時のstack)]"""
+        with self._lock:
+            rows = sorted(self._offenders.values(), key=lambda o: o.total, reverse=True)
+            return [(o.site, o.count, o.total, o.worst, list(o.stack)) for o in rows[:n]]